@@ -0,0 +1,98 @@
+"""Cold-start regression check for ``mpcfill --help``.
+
+Runs the CLI in fresh interpreters with ``python -X importtime`` and fails
+(exit status 1) when the import cost of ``mpcfill --help`` exceeds a budget
+or when heavy modules (``requests``, search, catalog) get imported at all.
+
+Usage:
+    python benchmarks/cli_startup.py [--budget-ms 40] [--runs 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+HELP_SNIPPET = (
+    "import sys\n"
+    f"sys.path.insert(0, {str(SRC)!r})\n"
+    "from mpcfill.cli import main\n"
+    "try:\n"
+    "    main(['--help'])\n"
+    "except SystemExit:\n"
+    "    pass\n"
+)
+# Modules that must stay unloaded when only printing help
+FORBIDDEN = (
+    "requests",
+    "urllib3",
+    "mpcfill.search",
+    "mpcfill.filters",
+    "mpcfill.services.catalog",
+    "mpcfill.http.client",
+)
+
+
+def _import_times(code: str) -> dict:
+    """Return top-level module → cumulative import time (µs) for ``code``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  "):
+            continue  # nested import, already counted by its parent
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure_ms() -> float:
+    """Import time (ms) added by ``mpcfill --help`` over a bare interpreter."""
+    baseline = _import_times("pass")
+    times = _import_times(HELP_SNIPPET)
+    return sum(t for name, t in times.items() if name not in baseline) / 1000
+
+
+def loaded_forbidden() -> list:
+    """Return forbidden modules loaded by ``mpcfill --help``."""
+    code = HELP_SNIPPET + (
+        f"print('\\n'.join(m for m in sys.modules if m.startswith({FORBIDDEN!r})))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return [line for line in proc.stdout.splitlines() if line in FORBIDDEN]
+
+
+def main():
+    """Measure CLI cold start and exit non-zero on regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=40.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [measure_ms() for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"mpcfill --help import time: median {median:.1f} ms over {args.runs} runs")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"FAIL: over budget of {args.budget_ms:.1f} ms")
+        failed = True
+    forbidden = loaded_forbidden()
+    if forbidden:
+        print(f"FAIL: heavy modules imported for --help: {', '.join(forbidden)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
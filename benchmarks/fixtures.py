@@ -0,0 +1,106 @@
+"""Synthetic, deterministic MPCFill data for the benchmarks.
+
+Shaped like the service's responses: a source catalog, a three-level tag
+tree, languages, and ``/2/cards/`` records. :func:`install_fake_catalog`
+serves the catalog from ``client.get`` so that no network access is needed;
+call it before importing modules that fetch at import time
+(``mpcfill.filters``, ``mpcfill.search_settings``).
+"""
+
+import random
+from typing import Dict, List
+
+LANGUAGES = ["EN", "DE", "FR", "IT", "ES", "JA", "PT", "RU", "KO", "ZH"]
+WORDS = (
+    "lightning bolt counterspell dark ritual swords plowshares giant growth "
+    "llanowar elves serra angel shivan dragon wrath god birds paradise "
+    "the of aether vial goblin guide thoughtseize tarmogoyf delver secrets"
+).split()
+
+
+def make_sources(n: int) -> Dict[str, Dict]:
+    """Return a ``/2/sources/`` results mapping with ``n`` sources."""
+    return {
+        str(i): {
+            "pk": i,
+            "key": f"source_{i}",
+            "name": f"Source {i}",
+            "identifier": f"s{i}",
+            "sourceType": "Google Drive",
+            "externalLink": None,
+            "description": "",
+        }
+        for i in range(1, n + 1)
+    }
+
+
+def make_tags(roots: int = 12, children: int = 4, grandchildren: int = 3) -> List:
+    """Return a ``/2/tags/`` tag tree: ``NSFW`` plus ``roots * (1 + c + c * g)``."""
+    tree = [{"name": "NSFW", "parent": None, "children": []}]
+    for r in range(roots):
+        root = f"Tag {r}"
+        kids = []
+        for c in range(children):
+            child = f"{root}.{c}"
+            kids.append(
+                {
+                    "name": child,
+                    "parent": root,
+                    "children": [
+                        {"name": f"{child}.{g}", "parent": child, "children": []}
+                        for g in range(grandchildren)
+                    ],
+                }
+            )
+        tree.append({"name": root, "parent": None, "children": kids})
+    return tree
+
+
+def make_cards(n: int, n_sources: int, seed: int = 0) -> List[Dict]:
+    """Return ``n`` raw card records spread over ``n_sources`` sources."""
+    rng = random.Random(seed)
+    tag_names = [t["name"] for t in make_tags()]
+    cards = []
+    for i in range(n):
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 4))).title()
+        source = rng.randint(1, n_sources)
+        cards.append(
+            {
+                "identifier": f"{i:08x}{rng.getrandbits(64):016x}",
+                "cardType": "TOKEN" if i % 10 == 0 else "CARD",
+                "name": name,
+                "priority": rng.randint(0, 20),
+                "source": f"source_{source}",
+                "sourceName": f"Source {source}",
+                "sourceId": source,
+                "sourceVerbose": f"Source {source}",
+                "sourceType": "Google Drive",
+                "sourceExternalLink": None,
+                "dpi": rng.choice([300, 600, 800, 1200]),
+                "searchq": name.lower(),
+                "extension": rng.choice(["png", "jpg"]),
+                "dateCreated": "1st January, 2024",
+                "dateModified": "1st January, 2024",
+                "size": rng.randint(500_000, 30_000_000),
+                "downloadLink": f"https://example.invalid/{i}",
+                "smallThumbnailUrl": f"https://example.invalid/{i}/small",
+                "mediumThumbnailUrl": f"https://example.invalid/{i}/medium",
+                "language": rng.choice(LANGUAGES),
+                "tags": rng.sample(tag_names, rng.randint(0, 3)),
+            }
+        )
+    return cards
+
+
+def install_fake_catalog(n_sources: int):
+    """Serve synthetic sources, tags and languages from ``client.get``."""
+    from mpcfill.http.client import client
+
+    catalog = {
+        "/2/sources/": {"results": make_sources(n_sources)},
+        "/2/tags/": {"tags": make_tags()},
+        "/2/languages/": {
+            "languages": [{"code": c, "name": c.title()} for c in LANGUAGES]
+        },
+    }
+    client.get = lambda path, params=None: catalog[path]
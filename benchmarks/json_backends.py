@@ -0,0 +1,112 @@
+"""Compare the installed JSON backends on mpcfill-shaped payloads.
+
+Times encoding of an editorSearch request (full source priority list plus a
+batch of queries) and decoding of a large ``/2/cards/`` metadata response
+for every backend that ``mpcfill.json_backend`` can load (orjson, msgspec,
+stdlib json). The incremental parser used for streamed responses
+(``mpcfill.http.json_stream``, stdlib-based) is timed on the same body for
+reference.
+
+Usage:
+    python benchmarks/json_backends.py [--sources 400] [--cards 5000] [--runs 20]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mpcfill.http.json_stream import iter_object_items  # noqa: E402
+from mpcfill.json_backend import available_backends  # noqa: E402
+
+
+def editor_search_payload(n_sources: int, n_queries: int = 20) -> dict:
+    """Build a request shaped like ``SearchSettings.to_dict()`` + queries."""
+    return {
+        "searchSettings": {
+            "searchTypeSettings": {"fuzzySearch": False, "filterCardbacks": False},
+            "sourceSettings": {"sources": [[i, True] for i in range(n_sources)]},
+            "filterSettings": {
+                "minimumDPI": 600,
+                "maximumDPI": 1500,
+                "maximumSize": 30,
+                "languages": ["EN"],
+                "includesTags": [],
+                "excludesTags": ["NSFW"],
+            },
+        },
+        "queries": [
+            {"query": f"card name {i}", "cardType": "CARD"} for i in range(n_queries)
+        ],
+    }
+
+
+def metadata_response(n_cards: int) -> dict:
+    """Build a ``/2/cards/`` response with ``n_cards`` results."""
+    return {
+        "results": {
+            f"id{i}": {
+                "identifier": f"id{i}",
+                "cardType": "CARD",
+                "name": f"Card Name {i} — Ærathi",
+                "priority": i % 7,
+                "source": "src",
+                "sourceName": "Source Name",
+                "sourceId": i % 400,
+                "sourceVerbose": "Source Verbose",
+                "sourceType": "Google Drive",
+                "dpi": 800,
+                "searchq": f"card name {i}",
+                "extension": "png",
+                "dateCreated": "1st January, 2024",
+                "dateModified": "1st January, 2024",
+                "size": 12345678,
+                "downloadLink": f"https://example.invalid/{i}",
+                "smallThumbnailUrl": f"https://example.invalid/s/{i}",
+                "mediumThumbnailUrl": f"https://example.invalid/m/{i}",
+                "language": "EN",
+                "tags": ["Full Art", "Extended"],
+            }
+            for i in range(n_cards)
+        }
+    }
+
+
+def _best(stmt, runs: int) -> float:
+    """Return the best of ``runs`` single executions, in milliseconds."""
+    return min(timeit.repeat(stmt, number=1, repeat=runs)) * 1000
+
+
+def main(argv=None) -> int:
+    """Run the comparison and print one row per backend."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, default=400)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    request = editor_search_payload(args.sources)
+    response = metadata_response(args.cards)
+    body = available_backends()["json"].dumps(response)
+    print(
+        f"editorSearch request: {args.sources} sources; "
+        f"metadata response: {args.cards} cards, {len(body) / 1e6:.1f} MB"
+    )
+    print(f"{'backend':<8}  {'encode req (ms)':>15}  {'decode resp (ms)':>16}")
+    for name, backend in available_backends().items():
+        encode_ms = _best(lambda: backend.dumps(request), args.runs)
+        decode_ms = _best(lambda: backend.loads(body), args.runs)
+        print(f"{name:<8}  {encode_ms:>15.3f}  {decode_ms:>16.2f}")
+
+    chunks = [body[i : i + 64 * 1024] for i in range(0, len(body), 64 * 1024)]
+    stream_ms = _best(
+        lambda: sum(1 for _ in iter_object_items(chunks, ("results",))), args.runs
+    )
+    print(f"{'stream':<8}  {'-':>15}  {stream_ms:>16.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Microbenchmarks for the pure-Python hot paths.
+
+Times each path on synthetic fixtures (see ``benchmarks/fixtures.py``; no
+network access) and measures its memory with ``tracemalloc``: the peak
+allocated during one call and what is still held by its result. Results
+can be saved as JSON and compared against an earlier run.
+
+Usage:
+    python benchmarks/microbench.py [--cards 5000] [--sources 400]
+        [--filter card] [--save results.json]
+        [--baseline baseline.json] [--fail-over 1.25]
+
+With ``--baseline``, prints the time and memory ratio of every benchmark
+and exits with status 1 when one is slower than ``--fail-over`` times its
+baseline.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fixtures import install_fake_catalog, make_cards  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+def build_benchmarks(n_cards: int, n_sources: int) -> Dict[str, Callable]:
+    """Install the fixtures and return benchmark name -> zero-argument callable."""
+    install_fake_catalog(n_sources)
+    from mpcfill.cli import _print_table
+    from mpcfill.filters.tag_utils import collapse_tags_to_parents
+    from mpcfill.filters.tags import TagHierarchy, tag_hierarchy
+    from mpcfill.models.card import Card
+    from mpcfill.models.source_filter import SourceFilter
+    from mpcfill.models.sources import SourceCollection
+    from mpcfill.search_settings import SearchSettings
+    from mpcfill.utils import dict_to_namespace, namespace_to_dict, normalize_query
+
+    raw = make_cards(n_cards, n_sources)
+    names = [f"The {c['name']} (Showcase) - 2" for c in raw]
+    namespaces = [dict_to_namespace(c) for c in raw]
+    cards = [Card(c) for c in raw]
+    # Parents together with some of their own descendants, plus unknowns.
+    tags = [n.name for n in tag_hierarchy.walk()][::3] + ["Unknown tag"] * 5
+    settings = SearchSettings(minimum_dpi=600, languages=["EN", "DE"])
+    settings.set_source_priority_order([f"Source {i}" for i in range(1, 11)])
+    rows = [
+        {"Type": c["cardType"], "Name": c["name"], "ID": c["identifier"]} for c in raw
+    ]
+
+    def card_attribute_access():
+        return [(c.name, c.priority, c.sourceId, c.dpi) for c in cards]
+
+    def print_table():
+        with contextlib.redirect_stdout(io.StringIO()):
+            _print_table(["Type", "Name", "ID"], rows)
+
+    return {
+        "normalize_query": lambda: [normalize_query(n) for n in names],
+        "dict_to_namespace": lambda: [dict_to_namespace(c) for c in raw],
+        "namespace_to_dict": lambda: [namespace_to_dict(ns) for ns in namespaces],
+        "card_construction": lambda: [Card(c) for c in raw],
+        "card_attribute_access": card_attribute_access,
+        "collapse_tags_to_parents": lambda: collapse_tags_to_parents(tags),
+        "tag_hierarchy_build": TagHierarchy,
+        "source_collection_build": SourceCollection,
+        "source_filter_construction": SourceFilter,
+        "search_settings_to_dict": settings.to_dict,
+        "print_table": print_table,
+    }
+
+
+def measure(fn: Callable, min_time: float) -> Dict:
+    """Return the best time per call and the memory use of one call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=5, number=number)) / number
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "seconds_per_call": best,
+        "calls": number,
+        "peak_bytes": peak,
+        "retained_bytes": retained,
+    }
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], fail_over: float
+) -> Tuple[List[str], List[str]]:
+    """Return report lines and the names of benchmarks slower than allowed."""
+    lines = [f"{'benchmark':28} {'time':>8} {'peak mem':>9}"]
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            lines.append(f"{name:28} {'new':>8} {'new':>9}")
+            continue
+        t = new["seconds_per_call"] / old["seconds_per_call"]
+        m = new["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        flag = "  << slower" if t > fail_over else ""
+        lines.append(f"{name:28} {t:7.2f}x {m:8.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return lines, regressions
+
+
+def _format_us(seconds: float) -> str:
+    return f"{seconds * 1e6:12.1f} µs"
+
+
+def main(argv=None) -> int:
+    """Run the selected benchmarks, print and optionally save or compare them."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--sources", type=int, default=400)
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Seconds per timing repeat"
+    )
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument(
+        "--fail-over",
+        type=float,
+        default=1.25,
+        help="Time ratio over the baseline that counts as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = build_benchmarks(args.cards, args.sources)
+    if args.filter:
+        benchmarks = {k: v for k, v in benchmarks.items() if args.filter in k}
+
+    results = {}
+    print(f"{'benchmark':28} {'per call':>15} {'peak mem':>10} {'retained':>10}")
+    for name, fn in benchmarks.items():
+        r = results[name] = measure(fn, args.min_time)
+        print(
+            f"{name:28} {_format_us(r['seconds_per_call'])}"
+            f" {r['peak_bytes'] / 1024:7.0f} KiB {r['retained_bytes'] / 1024:6.0f} KiB"
+        )
+
+    if args.save:
+        payload = {
+            "version": RESULTS_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": {"cards": args.cards, "sources": args.sources},
+            "results": results,
+        }
+        Path(args.save).write_text(json.dumps(payload, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("fixtures") != {"cards": args.cards, "sources": args.sources}:
+            print("warning: baseline was run with different fixtures", file=sys.stderr)
+        lines, regressions = compare(results, baseline["results"], args.fail_over)
+        print()
+        print("\n".join(lines))
+        if regressions:
+            print(f"slower than {args.fail_over}x baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Per-request ``SearchSettings`` construction cost.
+
+Installs a synthetic catalog of ``--sources`` sources on the HTTP client (no
+network access is needed), then times:
+
+- ``SearchSettings()`` using the shared source catalog,
+- the same with a freshly built ``SourceCollection`` (the old per-request
+  cost),
+- a typical request profile: construct, prefer three sources, build the
+  payload with ``to_dict()``.
+
+Usage:
+    python benchmarks/settings_construction.py [--sources 400] [--number 2000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+def install_fake_catalog(n_sources: int):
+    """Serve synthetic sources, tags and languages from ``client.get``."""
+    from mpcfill.http.client import client
+
+    catalog = {
+        "/2/sources/": {
+            "results": {
+                str(i): {
+                    "pk": i,
+                    "key": f"source_{i}",
+                    "name": f"Source {i}",
+                    "identifier": f"s{i}",
+                    "sourceType": "Google Drive",
+                    "externalLink": None,
+                    "description": "",
+                }
+                for i in range(1, n_sources + 1)
+            }
+        },
+        "/2/tags/": {"tags": [{"name": "NSFW", "parent": None, "children": []}]},
+        "/2/languages/": {"languages": [{"code": "EN", "name": "English"}]},
+    }
+    client.get = lambda path, params=None: catalog[path]
+
+
+def _per_call_us(stmt, number: int) -> float:
+    """Return the best per-call time in microseconds over 5 repeats."""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def main(argv=None) -> int:
+    """Run the benchmark and print per-call timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, default=400)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    install_fake_catalog(args.sources)
+    from mpcfill.models.sources import SourceCollection
+    from mpcfill.search_settings import SearchSettings
+
+    SearchSettings()  # build the shared catalog outside the timings
+    preferred = ["Source 3", "Source 1", "Source 7"]
+
+    def request_profile():
+        settings = SearchSettings(minimum_dpi=600)
+        settings.set_source_priority_order(preferred)
+        return settings.to_dict()
+
+    shared_us = _per_call_us(SearchSettings, args.number)
+    rebuilt_us = _per_call_us(
+        lambda: SearchSettings(sources=SourceCollection()), max(1, args.number // 20)
+    )
+    profile_us = _per_call_us(request_profile, args.number)
+
+    print(f"{args.sources} sources")
+    print(f"SearchSettings() shared catalog   {shared_us:10.1f} µs")
+    print(f"SearchSettings() rebuilt catalog  {rebuilt_us:10.1f} µs")
+    print(f"construct + prefer 3 + to_dict()  {profile_us:10.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,100 @@
-from .commands import (
-    list_dfcs,
-    list_languages,
-    list_sources,
-    list_tags,
-    search_and_download_best,
-    search_best,
-)
-from .filters import CardType, Language, Tags
-from .models.card import Card
-from .search import get_card_metadata, search_cards
-from .search_settings import SearchSettings
-from .services.catalog import fetch_dfcs, fetch_languages, fetch_sources, fetch_tags
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Public names are resolved lazily (PEP 562) so that ``import mpcfill`` and
+# ``mpcfill --help`` do not pay for ``requests`` or for the catalog fetches
+# done when the tag and language namespaces are built. Names must not match a
+# submodule: importing the submodule would rebind the package attribute.
+_EXPORTS = {
+    "DownloadResult": ".commands",
+    "iter_search_and_download_best": ".commands",
+    "list_dfcs": ".commands",
+    "list_languages": ".commands",
+    "list_sources": ".commands",
+    "list_tags": ".commands",
+    "search_and_download_best": ".commands",
+    "search_best": ".commands",
+    "CardType": ".types",
+    "Language": ".filters",
+    "Tags": ".filters",
+    "Card": ".models.card",
+    "write_archive": ".archive",
+    "OutputLayout": ".layout",
+    "prefetch_cards": ".prefetch",
+    "Ranker": ".ranking",
+    "rerank": ".ranking",
+    "CardGroup": ".search",
+    "get_card_metadata": ".search",
+    "iter_card_metadata": ".search",
+    "iter_search_cards": ".search",
+    "search_cards": ".search",
+    "search_cards_multi": ".search",
+    "search_cards_per_query": ".search",
+    "SearchSettings": ".search_settings",
+    "fetch_dfcs": ".services.catalog",
+    "fetch_dfc_index": ".services.catalog",
+    "fetch_languages": ".services.catalog",
+    "fetch_sources": ".services.catalog",
+    "fetch_tags": ".services.catalog",
+    "iter_dfc_pairs": ".services.catalog",
+    "sync_folder": ".sync",
+    "DeckWatcher": ".watch",
+}
+
+if TYPE_CHECKING:
+    from .archive import write_archive
+    from .commands import (
+        DownloadResult,
+        iter_search_and_download_best,
+        list_dfcs,
+        list_languages,
+        list_sources,
+        list_tags,
+        search_and_download_best,
+        search_best,
+    )
+    from .filters import CardType, Language, Tags
+    from .layout import OutputLayout
+    from .models.card import Card
+    from .prefetch import prefetch_cards
+    from .ranking import Ranker, rerank
+    from .search import (
+        CardGroup,
+        get_card_metadata,
+        iter_card_metadata,
+        iter_search_cards,
+        search_cards,
+        search_cards_multi,
+        search_cards_per_query,
+    )
+    from .search_settings import SearchSettings
+    from .services.catalog import (
+        fetch_dfc_index,
+        fetch_dfcs,
+        fetch_languages,
+        fetch_sources,
+        fetch_tags,
+        iter_dfc_pairs,
+    )
+    from .sync import sync_folder
+    from .watch import DeckWatcher
 
 __all__ = [
     "search_cards",
+    "search_cards_multi",
+    "search_cards_per_query",
+    "iter_search_cards",
     "get_card_metadata",
+    "iter_card_metadata",
+    "CardGroup",
+    "rerank",
+    "Ranker",
     "fetch_sources",
     "fetch_languages",
     "fetch_tags",
     "fetch_dfcs",
+    "fetch_dfc_index",
+    "iter_dfc_pairs",
     "SearchSettings",
     "Card",
     "CardType",
@@ -30,4 +106,26 @@ __all__ = [
     "list_dfcs",
     "search_best",
     "search_and_download_best",
+    "iter_search_and_download_best",
+    "DownloadResult",
+    "sync_folder",
+    "DeckWatcher",
+    "OutputLayout",
+    "write_archive",
+    "prefetch_cards",
 ]
+
+
+def __getattr__(name: str):
+    """Import public names on first access."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Include lazily exported names in ``dir(mpcfill)``."""
+    return sorted(set(globals()) | set(__all__))
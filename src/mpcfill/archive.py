@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import gzip
+import io
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterable, List, Optional
+
+from .concurrency import (
+    AUTO,
+    DEFAULT_MAX_THREADS,
+    AdaptiveExecutor,
+    ConcurrencyStats,
+    make_executor,
+)
+from .layout import DEFAULT_FILENAME_FORMAT, FilenameFormat
+from .utils import format_bytes
+
+if TYPE_CHECKING:
+    from .imaging import ImageTransform
+    from .models.card import Card
+
+ARCHIVE_FORMATS = {".zip": "zip", ".tar": "tar", ".tgz": "tgz", ".tar.gz": "tgz"}
+# Fixed entry timestamps, so the same cards always give the same archive.
+_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+_ENTRY_MODE = 0o644
+
+
+def archive_format(path: str | Path) -> str:
+    """Return ``"zip"``, ``"tar"`` or ``"tgz"`` from the archive file name."""
+    name = Path(path).name.lower()
+    for suffix, fmt in sorted(ARCHIVE_FORMATS.items(), key=lambda i: -len(i[0])):
+        if name.endswith(suffix):
+            return fmt
+    raise ValueError(
+        f"Unsupported archive type for {path}; use one of {sorted(ARCHIVE_FORMATS)}"
+    )
+
+
+class ArchiveWriter:
+    """Append in-memory entries to a ZIP or tar file, in call order.
+
+    Images are already compressed, so ZIP entries are stored as-is; ``tgz``
+    gzips the whole tar stream. Entries get fixed timestamps and modes.
+    """
+
+    def __init__(self, path: str | Path, fmt: Optional[str] = None):
+        """Create the archive at ``path`` (format taken from its suffix)."""
+        self.path = Path(path)
+        self.format = fmt or archive_format(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._files: List[BinaryIO] = []
+        if self.format == "zip":
+            self._zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED)
+        else:
+            fileobj = None
+            if self.format == "tgz":
+                raw = open(self.path, "wb")
+                # No file name or time in the gzip header: output is reproducible.
+                fileobj = gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0)
+                self._files = [fileobj, raw]
+            self._tar = tarfile.open(
+                self.path if fileobj is None else None,
+                "w",
+                fileobj=fileobj,
+                format=tarfile.PAX_FORMAT,
+            )
+
+    def add(self, name: str, data: bytes):
+        """Append one entry."""
+        if self.format == "zip":
+            info = zipfile.ZipInfo(name, date_time=_ZIP_DATE)
+            info.external_attr = _ENTRY_MODE << 16
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = _ENTRY_MODE
+            self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        """Finish the archive."""
+        if self.format == "zip":
+            self._zip.close()
+        else:
+            self._tar.close()
+            for f in self._files:
+                f.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        """Return self for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the archive on exit."""
+        self.close()
+
+
+@dataclass
+class ArchiveReport:
+    """What :func:`write_archive` wrote."""
+
+    path: Path
+    entries: List[str] = field(default_factory=list)
+    bytes_written: int = 0
+    concurrency: Optional[ConcurrencyStats] = None
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        text = (
+            f"wrote {len(self.entries)} entries"
+            f" ({format_bytes(self.bytes_written)}) to {self.path}"
+        )
+        if self.concurrency is not None:
+            text += f"; {self.concurrency.summary()}"
+        return text
+
+
+def write_archive(
+    cards: Iterable[Card],
+    path: str | Path,
+    filename_format: str = DEFAULT_FILENAME_FORMAT,
+    threads: int | str = 1,
+    max_threads: int = DEFAULT_MAX_THREADS,
+    transform: Optional[ImageTransform] = None,
+    executor: Optional[Executor] = None,
+    window: Optional[int] = None,
+) -> ArchiveReport:
+    """Download card images straight into a ZIP or tar archive.
+
+    Images are fetched on ``threads`` threads (``"auto"`` adapts, see
+    :mod:`mpcfill.concurrency`), from a local copy when there is one, and
+    written in input order with no temporary files. At most ``window``
+    images (default: twice the thread count) are held in memory at once.
+    ``filename_format`` is a :class:`mpcfill.layout.FilenameFormat`
+    template; ``{index}`` is the position in ``cards``. The archive type
+    comes from the suffix of ``path``: ``.zip``, ``.tar``, ``.tar.gz`` or
+    ``.tgz``. A partial archive is removed if a download fails.
+    """
+    cards = list(cards)
+    fmt = archive_format(path)
+    name_for = FilenameFormat(filename_format)
+    names = []
+    for i, card in enumerate(cards):
+        ext = transform.extension(card.extension) if transform else card.extension
+        names.append(name_for(card, i, ext=ext))
+    if len(set(names)) != len(names):
+        raise ValueError(
+            f"Filename format {filename_format!r} gives duplicate entry names"
+        )
+    if window is None:
+        window = 2 * (max_threads if threads == AUTO else max(1, int(threads)))
+
+    report = ArchiveReport(Path(path))
+    jobs = iter(zip(names, cards))
+    pending: deque = deque()
+    with make_executor(threads, max_threads) as pool:
+
+        def _submit(job):
+            name, card = job
+            pending.append((name, pool.submit(card.read_image, transform, executor)))
+
+        try:
+            with ArchiveWriter(report.path, fmt) as writer:
+                for job in islice(jobs, window):
+                    _submit(job)
+                while pending:
+                    name, future = pending.popleft()
+                    data = future.result()
+                    writer.add(name, data)
+                    report.entries.append(name)
+                    report.bytes_written += len(data)
+                    job = next(jobs, None)
+                    if job is not None:
+                        _submit(job)
+        except BaseException:
+            for _, future in pending:
+                future.cancel()
+            report.path.unlink(missing_ok=True)
+            raise
+    if isinstance(pool, AdaptiveExecutor):
+        report.concurrency = pool.stats()
+    return report
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Optional, Tuple
+
+CACHE_DIR_ENV = "MPCFILL_CACHE_DIR"
+IMAGE_STORE_MAX_ENV = "MPCFILL_IMAGE_STORE_MAX_MB"
+DEFAULT_IMAGE_STORE_MAX_MB = 2048
+
+
+def cache_dir() -> Path:
+    """Return the root folder for persistent on-disk caches.
+
+    Honours ``MPCFILL_CACHE_DIR``, then ``XDG_CACHE_HOME``, and finally falls
+    back to ``~/.cache/mpcfill``.
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "mpcfill"
+
+
+def processed_image_path(identifier: str, transform_key: str, extension: str) -> Path:
+    """Return the cache path of a post-processed image.
+
+    Entries are keyed on ``(identifier, transform)`` so a repeated run with the
+    same transform can reuse the output instead of re-processing the image.
+    """
+    return cache_dir() / "processed" / transform_key / f"{identifier}.{extension}"
+
+
+def image_store_path(identifier: str, extension: str) -> Path:
+    """Return the path of an original image in the shared on-disk image store.
+
+    Output folders are materialized from these files (see
+    :mod:`mpcfill.layout`), so each image is downloaded and stored once.
+    """
+    return cache_dir() / "images" / identifier[:2] / f"{identifier}.{extension}"
+
+
+def touch_image(path: Path):
+    """Mark a stored image as recently used for :func:`prune_image_store`.
+
+    Only the access time is updated: the file may be hardlinked into an
+    output folder, whose modification time must not change.
+    """
+    try:
+        st = path.stat()
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def image_store_limit() -> Optional[int]:
+    """Return the image store size limit in bytes, or None for no limit.
+
+    Read from ``MPCFILL_IMAGE_STORE_MAX_MB`` (``0`` disables the limit),
+    defaulting to ``DEFAULT_IMAGE_STORE_MAX_MB``.
+    """
+    raw = os.environ.get(IMAGE_STORE_MAX_ENV)
+    megabytes = float(raw) if raw else DEFAULT_IMAGE_STORE_MAX_MB
+    return int(megabytes * 1024 * 1024) if megabytes > 0 else None
+
+
+def prune_image_store(
+    max_bytes: Optional[int] = None, keep: Iterable[Path] = ()
+) -> Tuple[int, int]:
+    """Delete the least recently used images until the store fits ``max_bytes``.
+
+    ``max_bytes`` defaults to :func:`image_store_limit`. Images that are
+    still hardlinked into an output folder free no space when deleted and
+    are neither counted nor removed; nor are the paths in ``keep``. Outputs
+    symlinked into the store break when their image is removed.
+
+    Returns the number of files removed and the bytes freed.
+    """
+    if max_bytes is None:
+        max_bytes = image_store_limit()
+        if max_bytes is None:
+            return 0, 0
+    root = cache_dir() / "images"
+    keep = {Path(p) for p in keep}
+    entries = []
+    total = 0
+    for path in root.glob("*/*"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        if st.st_nlink > 1 or path.name.startswith(".") or path in keep:
+            continue
+        entries.append((st.st_atime_ns, st.st_size, path))
+        total += st.st_size
+    removed = freed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def write_atomic(path: Path, content: bytes) -> Path:
+    """Write ``content`` to ``path`` via a temporary file and rename.
+
+    Concurrent writers (threads or processes) never observe a partial file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+    return path
+
+
+class LRUCache:
+    """Small thread-safe in-memory LRU cache with an optional TTL.
+
+    Used for long-lived processes (e.g. ``mpcfill serve``) that answer many
+    requests and should not repeat identical service calls.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """Initialize with a maximum entry count and optional TTL in seconds."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value, or ``default`` if missing or expired."""
+        with self._lock:
+            item = self._data.get(key, self._MISSING)
+            if item is self._MISSING:
+                return default
+            value, stored_at = item
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        """Return the number of stored entries (including expired ones)."""
+        return len(self._data)
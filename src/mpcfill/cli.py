@@ -1,31 +1,65 @@
+from __future__ import annotations
+
 import argparse
 import os
 import signal
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterable, List
 
-from . import (
-    CardType,
-    SearchSettings,
-    fetch_dfcs,
-    fetch_languages,
-    fetch_sources,
-    search_cards,
-)
+# Command handlers import what they need on first use, so ``--help``, argument
+# errors and daemon forwarding never load ``requests`` or the catalog.
+if TYPE_CHECKING:
+    from .search_settings import SearchSettings
 
 
 def _build_queries(raw_items: List[str]) -> List[Dict]:
     """Build search queries supporting token prefix 't:' per item."""
-    q: List[Dict] = []
-    for raw in raw_items:
-        is_token = raw.lower().startswith("t:")
-        name = raw[2:] if is_token else raw
-        q.append(
-            {"query": name, "cardType": CardType.TOKEN if is_token else CardType.CARD}
-        )
-    return q
+    from .deck import item_query
+
+    return [item_query(raw) for raw in raw_items]
+
+
+def _queries_from_args(args: argparse.Namespace) -> List[Dict]:
+    """Build queries from positional names plus an optional ``--deck`` file."""
+    raw_items = list(args.query or [])
+    if getattr(args, "deck", None):
+        from .deck import read_decklist
+
+        raw_items.extend(read_decklist(args.deck))
+    if not raw_items:
+        raise SystemExit("mpcfill: error: no queries given (pass names or --deck)")
+    queries = _build_queries(raw_items)
+    if getattr(args, "correct", False):
+        from .name_index import correct_queries, load_name_index
+
+        for original, fixed in correct_queries(queries, load_name_index()):
+            print(f"mpcfill: corrected {original!r} -> {fixed!r}", file=sys.stderr)
+    return queries
+
+
+def _remember_names(groups: List[List]):
+    """Record resolved card names in the local name index."""
+    from .name_index import record_names
+
+    record_names(card.name for g in groups for card in g[:1])
+
+
+def _build_settings(args: argparse.Namespace) -> SearchSettings:
+    """Build SearchSettings from the shared search/filter flags."""
+    from .search_settings import SearchSettings
+
+    settings = SearchSettings(
+        minimum_dpi=args.minimum_dpi,
+        maximum_dpi=args.maximum_dpi,
+        maximum_size=args.maximum_size,
+        fuzzy_search=args.fuzzy,
+        filter_cardbacks=args.filter_cardbacks,
+        languages=args.languages or [],
+        includes_tags=args.include_tags or [],
+        excludes_tags=args.exclude_tags or [],
+    )
+    _apply_source_preferences(args, settings)
+    return settings
 
 
 def _apply_source_preferences(args: argparse.Namespace, settings: SearchSettings):
@@ -37,209 +71,820 @@ def _apply_source_preferences(args: argparse.Namespace, settings: SearchSettings
         for key in args.disable_sources:
             settings.disable_source(key)
     if getattr(args, "prefer_sources", None):
-        for idx, key in enumerate(args.prefer_sources):
+        for key in args.prefer_sources:
             settings.enable_source(key)
-            settings.set_source_priority(key, idx)
+        settings.set_source_priority_order(args.prefer_sources)
 
 
-def _print_table(headers: List[str], rows: List[Dict[str, str]]):
-    if not rows:
-        return
-    col_widths = {
-        h: max(len(h), max(len(str(r.get(h, ""))) for r in rows)) for h in headers
-    }
+def _build_transform(args: argparse.Namespace):
+    """Return an ImageTransform from download flags, or None if none were set."""
+    if not (args.resize_dpi or args.format or args.quality):
+        return None
+    from .imaging import ImageTransform
+
+    return ImageTransform(
+        resize_dpi=args.resize_dpi, format=args.format, quality=args.quality
+    )
+
+
+def _print_table(headers: List[str], rows: Iterable[Dict[str, str]]):
+    from .output import write_rows
+
+    write_rows(headers, rows)
 
-    def fmt_row(r: Dict[str, str]):
-        return "  ".join(str(r.get(h, "")).ljust(col_widths[h]) for h in headers)
 
-    print(fmt_row({h: h for h in headers}))
-    print("  ".join("-" * col_widths[h] for h in headers))
-    for r in rows:
-        print(fmt_row(r))
+def _write(args: argparse.Namespace, headers: List[str], rows: Iterable[Dict]):
+    """Write rows in the ``--format`` chosen on the command line."""
+    from .output import write_rows
+
+    fmt = getattr(args, "format", None) or "table"
+    write_rows(headers, rows, fmt, flush=fmt != "table")
 
 
 def cmd_search(args: argparse.Namespace):
     """Search for cards and print best candidates."""
-    settings = SearchSettings(
-        minimum_dpi=args.minimum_dpi,
-        maximum_dpi=args.maximum_dpi,
-        maximum_size=args.maximum_size,
-        fuzzy_search=args.fuzzy,
-        filter_cardbacks=args.filter_cardbacks,
-        languages=args.languages or [],
-        includes_tags=args.include_tags or [],
-        excludes_tags=args.exclude_tags or [],
+    from .search import search_cards
+
+    if getattr(args, "ndjson", False):
+        args.format = "ndjson"
+    if getattr(args, "format", None) in ("csv", "tsv", "ndjson"):
+        _search_stream(args)
+        return
+
+    settings = _build_settings(args)
+    queries = _queries_from_args(args)
+    groups = search_cards(
+        queries, settings, fetch_backs=not args.no_backs, top_k=args.top_k
     )
-    _apply_source_preferences(args, settings)
-    queries = _build_queries(args.query)
-    groups = search_cards(queries, settings, fetch_backs=not args.no_backs)
-    rows = []
-    for g in groups:
-        best = g[0]
-        rows.append(
-            {
-                "Type": getattr(best, "cardType", ""),
-                "Name": getattr(best, "name", ""),
-                "ID": getattr(best, "identifier", ""),
-            }
-        )
+    _remember_names(groups)
+    _print_groups(args, groups)
+
+
+def cmd_local_search(args: argparse.Namespace):
+    """Answer a search from the local metadata store, without the service."""
+    from .search import search_cards
+
+    settings = _build_settings(args)
+    queries = _queries_from_args(args)
+    groups = search_cards(
+        queries,
+        settings,
+        fetch_backs=not args.no_backs,
+        offline=True,
+        store=args.store,
+    )
+    _print_groups(args, groups)
+
+
+def _print_groups(args: argparse.Namespace, groups: List[List]):
+    """Print the best card of each group as JSON or in ``--format``."""
+    rows = [
+        {
+            "Type": getattr(g[0], "cardType", ""),
+            "Name": getattr(g[0], "name", ""),
+            "ID": getattr(g[0], "identifier", ""),
+        }
+        for g in groups
+    ]
 
     if not rows:
         return
 
     if getattr(args, "json", False):
-        import json
+        from .json_backend import dumps_str
 
-        print(json.dumps(rows, ensure_ascii=False))
+        print(dumps_str(rows))
         return
 
-    _print_table(["Type", "Name", "ID"], rows)
+    _write(args, ["Type", "Name", "ID"], rows)
+
+
+def _search_stream(args: argparse.Namespace):
+    """Write one row per result group as soon as it is resolved."""
+    from .search import iter_search_cards
+
+    settings = _build_settings(args)
+    queries = _queries_from_args(args)
+    names = []
+
+    def rows():
+        for searchq, group in iter_search_cards(
+            queries, settings, fetch_backs=not args.no_backs, top_k=args.top_k
+        ):
+            best = group[0]
+            names.append([best])
+            yield {
+                "Query": searchq,
+                "Type": getattr(best, "cardType", ""),
+                "Name": getattr(best, "name", ""),
+                "ID": getattr(best, "identifier", ""),
+            }
+
+    _write(args, ["Query", "Type", "Name", "ID"], rows())
+    _remember_names(names)
 
 
 def cmd_download(args: argparse.Namespace):
     """Search and download best images to a folder."""
-    settings = SearchSettings(
-        minimum_dpi=args.minimum_dpi,
-        maximum_dpi=args.maximum_dpi,
-        maximum_size=args.maximum_size,
-        fuzzy_search=args.fuzzy,
-        filter_cardbacks=args.filter_cardbacks,
-        languages=args.languages or [],
-        includes_tags=args.include_tags or [],
-        excludes_tags=args.exclude_tags or [],
-    )
-    _apply_source_preferences(args, settings)
+    settings = _build_settings(args)
+
+    import os
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from contextlib import ExitStack
+    from pathlib import Path
 
+    from .concurrency import AdaptiveExecutor, make_executor
+    from .layout import DEFAULT_LINK_MODES, FilenameFormat, OutputLayout
     from .search import search_cards
-    from .utils import make_safe_path
 
-    queries = _build_queries(args.query)
+    queries = _queries_from_args(args)
+    transform = _build_transform(args)
 
-    dest = Path(args.dest)
-    groups = search_cards(queries, settings, fetch_backs=not args.no_backs)
-    dest.mkdir(parents=True, exist_ok=True)
+    try:
+        if args.archive:
+            from .archive import archive_format
+
+            archive_format(args.archive)
+            FilenameFormat(args.filename_format)
+        else:
+            modes = DEFAULT_LINK_MODES if args.link == "auto" else (args.link,)
+            layout = OutputLayout(args.dest, args.filename_format, modes=modes)
+    except ValueError as exc:
+        raise SystemExit(f"mpcfill: error: {exc}")
+    groups = search_cards(
+        queries,
+        settings,
+        fetch_backs=not args.no_backs,
+        top_k=args.top_k,
+        offline=args.offline,
+        store=args.store,
+    )
+    _remember_names(groups)
+
+    with ExitStack() as stack:
+        stack.enter_context(_hedging(args))
+        # Post-processing is CPU-bound, so it runs on processes, not threads.
+        pool = None
+        threads = args.threads
+        if transform is not None:
+            processes = args.processes or os.cpu_count() or 1
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=processes))
+            # Each download thread waits for its own transform, so fewer
+            # threads than processes would leave workers idle.
+            if threads != "auto" and threads < processes:
+                threads = processes
+
+        if args.archive:
+            from .archive import write_archive
+
+            try:
+                report = write_archive(
+                    [g[0] for g in groups if g],
+                    args.archive,
+                    args.filename_format,
+                    threads=threads,
+                    max_threads=args.max_threads,
+                    transform=transform,
+                    executor=pool,
+                )
+            except ValueError as exc:
+                raise SystemExit(f"mpcfill: error: {exc}")
+            print(report.summary(), file=sys.stderr)
+            return
 
-    def _download_one(idx: int, card):
-        fname = f"{idx}_{make_safe_path(card.name)}.{card.extension}"
-        return card.download_image(dest, filename=fname)
+        Path(args.dest).mkdir(parents=True, exist_ok=True)
+
+        def _download_one(idx: int, card):
+            return layout.place(card, idx, transform=transform, executor=pool)
+
+        if threads == "auto" or threads > 1:
+            with make_executor(threads, args.max_threads) as ex:
+                futures = {
+                    ex.submit(_download_one, i, g[0]): i
+                    for i, g in enumerate(groups)
+                    if g
+                }
+                for fut in as_completed(futures):
+                    print(fut.result())
+            if isinstance(ex, AdaptiveExecutor):
+                print(ex.stats().summary(), file=sys.stderr)
+        else:
+            for i, g in enumerate(groups):
+                if not g:
+                    continue
+                print(_download_one(i, g[0]))
+    print(layout.report.summary(), file=sys.stderr)
+    _prune_image_store(layout.modes)
+
+
+def cmd_prefetch(args: argparse.Namespace):
+    """Resolve and download queries into the local caches at low priority."""
+    from .prefetch import prefetch_cards
+
+    settings = _build_settings(args)
+    queries = _queries_from_args(args)
+    with _hedging(args):
+        report = prefetch_cards(
+            queries,
+            settings,
+            fetch_backs=not args.no_backs,
+            candidates=args.candidates,
+            threads=args.threads,
+            max_threads=args.max_threads,
+            top_k=args.top_k,
+            store=args.store,
+        )
+    for identifier, error in report.failed.items():
+        print(f"failed {identifier}: {error}", file=sys.stderr)
+    print(report.summary(), file=sys.stderr)
+    # Never evict what was just prefetched; warn if it does not fit instead.
+    _prune_image_store(keep=report.stored)
+    _warn_over_store_limit(report.stored)
+
+
+def cmd_sync(args: argparse.Namespace):
+    """Incrementally sync best images into a folder, skipping unchanged files."""
+    from .sync import sync_folder
+
+    settings = _build_settings(args)
+    queries = _queries_from_args(args)
+    with _hedging(args):
+        report = sync_folder(
+            queries,
+            args.dest,
+            settings,
+            fetch_backs=not args.no_backs,
+            top_k=args.top_k,
+            delete_stale=args.delete,
+            threads=args.threads,
+            max_threads=args.max_threads,
+        )
+    for path in report.downloaded:
+        print(path)
+    for path in report.kept:
+        print(f"kept modified: {path}", file=sys.stderr)
+    for fname, error in report.failed.items():
+        print(f"failed {fname}: {error}", file=sys.stderr)
+    print(report.summary(), file=sys.stderr)
+    if report.failed:
+        raise SystemExit(f"mpcfill: error: {len(report.failed)} downloads failed")
+
+
+def cmd_watch(args: argparse.Namespace):
+    """Keep a folder in line with a decklist file while it is edited."""
+    from .layout import DEFAULT_LINK_MODES
+    from .watch import DeckWatcher
+
+    settings = _build_settings(args)
+    modes = DEFAULT_LINK_MODES if args.link == "auto" else (args.link,)
+    try:
+        watcher = DeckWatcher(
+            args.deck,
+            args.dest,
+            settings,
+            fetch_backs=not args.no_backs,
+            filename_format=args.filename_format,
+            modes=modes,
+            threads=args.threads,
+            max_threads=args.max_threads,
+        )
+    except ValueError as exc:
+        raise SystemExit(f"mpcfill: error: {exc}")
+
+    def on_update(update):
+        for path in update.written:
+            print(path, flush=True)
+        for item in update.missing:
+            print(f"not found: {item}", file=sys.stderr)
+        for item, error in update.failed.items():
+            print(f"failed {item}: {error}", file=sys.stderr)
+        print(update.summary(), file=sys.stderr, flush=True)
+        if update.written:
+            _prune_image_store(modes)
+
+    def on_error(exc):
+        print(f"mpcfill: error: {exc}; will retry", file=sys.stderr)
+
+    print(f"watching {args.deck} (Ctrl-C to stop)", file=sys.stderr)
+    with _hedging(args):
+        try:
+            watcher.watch(args.interval, on_update=on_update, on_error=on_error)
+        except KeyboardInterrupt:
+            pass
 
-    if getattr(args, "threads", 1) and args.threads > 1:
-        with ThreadPoolExecutor(max_workers=args.threads) as ex:
-            futures = {
-                ex.submit(_download_one, i, g[0]): i for i, g in enumerate(groups) if g
-            }
-            for fut in as_completed(futures):
-                print(fut.result())
-    else:
-        for i, g in enumerate(groups):
-            if not g:
-                continue
-            print(_download_one(i, g[0]))
-
-
-def cmd_list_sources(_: argparse.Namespace):
-    """List available sources as a simple table."""
-    sources = list(fetch_sources().values())
-    if not sources:
-        return
-    rows = [{"ID": str(s.get("pk", "")), "Name": s.get("name", "")} for s in sources]
-    _print_table(["ID", "Name"], rows)
+
+def _open_queue(path: str):
+    """Open a work queue file, exiting with a message if it is missing."""
+    from .work_queue import WorkQueue
+
+    try:
+        return WorkQueue(path)
+    except (FileNotFoundError, ValueError) as exc:
+        raise SystemExit(f"mpcfill: error: {exc}")
+
+
+def cmd_queue_init(args: argparse.Namespace):
+    """Create a work queue file for a sharded download job."""
+    from .work_queue import WorkQueue
+
+    settings = _build_settings(args)
+    try:
+        queue = WorkQueue.create(
+            args.db, args.dest, settings, max_attempts=args.max_attempts
+        )
+    except FileExistsError as exc:
+        raise SystemExit(f"mpcfill: error: {exc}")
+    with queue:
+        if args.query or args.deck:
+            added = queue.add(_queries_from_args(args), fetch_backs=not args.no_backs)
+            print(f"queued {added}", file=sys.stderr)
+
+
+def cmd_queue_add(args: argparse.Namespace):
+    """Add queries to a work queue."""
+    with _open_queue(args.db) as queue:
+        added = queue.add(_queries_from_args(args), fetch_backs=not args.no_backs)
+    print(f"queued {added}", file=sys.stderr)
+
+
+def cmd_queue_work(args: argparse.Namespace):
+    """Process queued tasks until none are left to claim."""
+    from .work_queue import work
+
+    with _open_queue(args.db) as queue, _hedging(args):
+        report = work(
+            queue,
+            worker=args.worker_id,
+            threads=args.threads,
+            batch_size=args.batch_size,
+            lease=args.lease,
+            on_done=print,
+            max_threads=args.max_threads,
+        )
+    print(report.summary(), file=sys.stderr)
 
 
-def cmd_list_languages(_: argparse.Namespace):
-    """List available languages as a simple table."""
-    langs = fetch_languages()
-    if not langs:
+def cmd_queue_status(args: argparse.Namespace):
+    """Print task counts per state and permanently failed tasks."""
+    with _open_queue(args.db) as queue:
+        counts = queue.status()
+        failures = queue.failures()
+    if args.json:
+        from .json_backend import dumps_str
+
+        print(dumps_str({"counts": counts, "failed": failures}))
         return
-    rows = [
-        {"Code": lang.get("code", ""), "Name": lang.get("name", "")} for lang in langs
-    ]
-    _print_table(["Code", "Name"], rows)
+    print(", ".join(f"{state} {n}" for state, n in counts.items()))
+    for f in failures:
+        print(f"failed {f['position']} {f['query']} ({f['attempts']}x): {f['error']}")
+
+
+def cmd_complete(args: argparse.Namespace):
+    """Complete a card name prefix from the local name index (no network)."""
+    from .name_index import load_name_index
+
+    index = load_name_index()
+    names = index.complete(args.prefix, limit=args.limit)
+    if not names:
+        names = [name for name, _ in index.suggest(args.prefix, limit=args.limit)]
+    for name in names:
+        print(name)
 
 
-def cmd_list_tags(_: argparse.Namespace):
-    """Render the tag hierarchy as an ASCII tree."""
-    from .filters.tags import TagHierarchy
+def cmd_serve(args: argparse.Namespace):
+    """Run the local daemon that serves search/download with warm caches."""
+    from .daemon import serve
 
-    th = TagHierarchy()
+    address = args.socket
+    if args.port:
+        address = f"{args.host}:{args.port}"
+    serve(address)
+
+
+def cmd_list_sources(args: argparse.Namespace):
+    """List available sources."""
+    from .services.catalog import fetch_sources
+
+    rows = (
+        {"ID": str(s.get("pk", "")), "Name": s.get("name", "")}
+        for s in fetch_sources().values()
+    )
+    _write(args, ["ID", "Name"], rows)
+
+
+def cmd_list_languages(args: argparse.Namespace):
+    """List available languages."""
+    from .services.catalog import fetch_languages
+
+    rows = (
+        {"Code": lang.get("code", ""), "Name": lang.get("name", "")}
+        for lang in fetch_languages()
+    )
+    _write(args, ["Code", "Name"], rows)
+
+
+def cmd_list_tags(args: argparse.Namespace):
+    """Render the tag hierarchy as an ASCII tree, or one row per tag.
+
+    Walks the raw tag definitions directly, without building a
+    :class:`~mpcfill.filters.tags.TagHierarchy` first.
+    """
+    from .services.catalog import fetch_tags
+
+    fmt = getattr(args, "format", None) or "table"
+    if fmt != "table":
+
+        def rows(nodes, parent="", depth=0):
+            for node in nodes:
+                yield {"Name": node["name"], "Parent": parent, "Depth": depth}
+                yield from rows(node.get("children") or (), node["name"], depth + 1)
+
+        _write(args, ["Name", "Parent", "Depth"], rows(fetch_tags()))
+        return
 
     def print_tree(nodes, prefix=""):
         for idx, node in enumerate(nodes):
             is_last = idx == len(nodes) - 1
             connector = "└── " if is_last else "├── "
-            print(f"{prefix}{connector}{node.name}")
-            if node.children:
+            print(f"{prefix}{connector}{node['name']}")
+            if node.get("children"):
                 extension = "    " if is_last else "│   "
-                print_tree(node.children, prefix + extension)
+                print_tree(node["children"], prefix + extension)
+
+    print_tree(fetch_tags())
+
+
+def cmd_list_dfcs(args: argparse.Namespace):
+    """List Dual-Faced Card pairs (front ↔ back) as they are parsed."""
+    from .services.catalog import iter_dfc_pairs
+
+    rows = ({"Front": f or "", "Back": b or ""} for f, b in iter_dfc_pairs())
+    _write(args, ["Front", "Back"], rows)
+
+
+def _add_format_argument(p):
+    """Register ``--format`` for commands that print rows."""
+    p.add_argument(
+        "--format",
+        choices=["table", "csv", "tsv", "ndjson"],
+        help="Output format (default: table). csv, tsv and ndjson print each"
+        " row as soon as it is ready; search then streams results per query",
+    )
+
+
+def _add_search_arguments(p: argparse.ArgumentParser):
+    """Register the query, filter and source flags shared by search commands."""
+    _add_query_arguments(p)
+    _add_settings_arguments(p)
+    p.add_argument(
+        "--top-k",
+        type=int,
+        help="Only fetch metadata for the first K candidates per query",
+    )
+
+
+def _add_query_arguments(p: argparse.ArgumentParser):
+    """Register the flags that say what to search for."""
+    p.add_argument("query", nargs="*", help="Card name(s) to search")
+    p.add_argument("--deck", help="Decklist file, one card per line")
+    p.add_argument("--no-backs", action="store_true")
+    p.add_argument(
+        "--correct",
+        action="store_true",
+        help="Fix likely misspellings from the local name index before searching",
+    )
+
+
+def _add_settings_arguments(p: argparse.ArgumentParser):
+    """Register the filter and source flags that make up SearchSettings."""
+    p.add_argument("--languages", nargs="*", help="Language codes (e.g., ENGLISH)")
+    p.add_argument("--include-tags", nargs="*")
+    p.add_argument("--exclude-tags", nargs="*")
+    p.add_argument("--minimum-dpi", type=int, default=600)
+    p.add_argument("--maximum-dpi", type=int, default=1500)
+    p.add_argument("--maximum-size", type=int, default=30)
+    p.add_argument("--fuzzy", action="store_true")
+    p.add_argument("--filter-cardbacks", action="store_true")
+    p.add_argument(
+        "--prefer-sources",
+        nargs="*",
+        help="Source names to prefer. Priority inferred from order (left to right).",
+    )
+    p.add_argument("--disable-sources", nargs="*", help="Source names to disable")
+
+
+def _threads_arg(value: str) -> int | str:
+    """Argparse type for ``--threads``: a positive integer or ``auto``."""
+    from .concurrency import parse_threads
+
+    try:
+        return parse_threads(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive integer or 'auto', got {value!r}"
+        )
+
+
+def _add_threads_arguments(p: argparse.ArgumentParser):
+    """Register the download concurrency flags."""
+    p.add_argument(
+        "--threads",
+        type=_threads_arg,
+        default=1,
+        help="Parallel downloads, or 'auto' to adapt to the server (default: 1)",
+    )
+    p.add_argument(
+        "--max-threads",
+        type=int,
+        default=16,
+        help="Upper bound for --threads auto (default: 16)",
+    )
+    p.add_argument(
+        "--hedge",
+        type=float,
+        nargs="?",
+        const=95.0,
+        metavar="PERCENTILE",
+        help="Duplicate downloads slower than this percentile of recent ones;"
+        " the first response wins (default percentile: 95)",
+    )
+    p.add_argument(
+        "--hedge-max-rate",
+        type=float,
+        default=0.05,
+        help="Largest share of downloads that may be hedged (default: 0.05)",
+    )
+
+
+def _hedging(args: argparse.Namespace):
+    """Return a context that hedges image downloads when ``--hedge`` is given."""
+    from contextlib import contextmanager, nullcontext
+
+    if getattr(args, "hedge", None) is None:
+        return nullcontext()
+    from .http.client import client
+
+    @contextmanager
+    def hedged():
+        with client.hedged(args.hedge, args.hedge_max_rate) as hedging:
+            try:
+                yield hedging
+            finally:
+                print(hedging.stats().summary(), file=sys.stderr)
+
+    return hedged()
+
+
+def _prune_image_store(modes=(), keep=()):
+    """Trim the image store to its size limit after images were added."""
+    if "symlink" in modes:
+        # The outputs just written point into the store.
+        return
+    from .cache import prune_image_store
+    from .utils import format_bytes
+
+    removed, freed = prune_image_store(keep=keep)
+    if removed:
+        print(
+            f"pruned {removed} images ({format_bytes(freed)}) from the image store",
+            file=sys.stderr,
+        )
 
-    print_tree(th.roots)
 
+def _warn_over_store_limit(paths):
+    """Warn when ``paths`` alone exceed the image store limit."""
+    from .cache import IMAGE_STORE_MAX_ENV, image_store_limit
+    from .utils import format_bytes
 
-def cmd_list_dfcs(_: argparse.Namespace):
-    """List Dual-Faced Card pairs (front ↔ back)."""
-    dfcs = fetch_dfcs()
-    if not dfcs:
+    limit = image_store_limit()
+    size = sum(path.stat().st_size for path in paths if path.exists())
+    if limit is None or size <= limit:
         return
-    rows = [{"Front": f or "", "Back": b or ""} for f, b in dfcs.items()]
-    _print_table(["Front", "Back"], rows)
+    print(
+        f"mpcfill: warning: prefetched images take {format_bytes(size)}, more than "
+        f"the image store limit of {format_bytes(limit)}; later downloads may "
+        f"evict them. Set {IMAGE_STORE_MAX_ENV}={-(-size // 2**20)} or more "
+        "to keep them.",
+        file=sys.stderr,
+    )
 
 
 def build_parser() -> argparse.ArgumentParser:
     """Construct the top-level argparse parser for the CLI."""
     p = argparse.ArgumentParser(prog="mpcfill", description="MPCFill helper CLI")
+    p.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run locally even if an 'mpcfill serve' daemon is running",
+    )
     sub = p.add_subparsers(dest="command")
 
     sp = sub.add_parser("search", help="Search for cards and print best candidates")
-    sp.add_argument("query", nargs="+", help="Card name(s) to search")
-    sp.add_argument("--languages", nargs="*", help="Language codes (e.g., ENGLISH)")
-    sp.add_argument("--include-tags", nargs="*")
-    sp.add_argument("--exclude-tags", nargs="*")
-    sp.add_argument("--minimum-dpi", type=int, default=600)
-    sp.add_argument("--maximum-dpi", type=int, default=1500)
-    sp.add_argument("--maximum-size", type=int, default=30)
-    sp.add_argument("--fuzzy", action="store_true")
-    sp.add_argument("--filter-cardbacks", action="store_true")
-    sp.add_argument("--no-backs", action="store_true")
-    sp.add_argument(
-        "--prefer-sources",
-        nargs="*",
-        help="Source names to prefer. Priority inferred from order (left to right).",
-    )
-    sp.add_argument("--disable-sources", nargs="*", help="Source names to disable")
-    sp.add_argument(
+    _add_search_arguments(sp)
+    spf = sp.add_mutually_exclusive_group()
+    spf.add_argument(
         "--json", action="store_true", help="Output results as JSON (Type, Name, ID)"
     )
+    spf.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Stream one JSON object per result (same as --format ndjson)",
+    )
+    _add_format_argument(spf)
     sp.set_defaults(func=cmd_search)
 
     dp = sub.add_parser(
         "download", help="Search and download best images to a folder"
     )
-    dp.add_argument("query", nargs="+", help="Card name(s) to search")
-    dp.add_argument("--dest", required=True, help="Destination folder")
-    dp.add_argument("--languages", nargs="*")
-    dp.add_argument("--include-tags", nargs="*")
-    dp.add_argument("--exclude-tags", nargs="*")
-    dp.add_argument("--minimum-dpi", type=int, default=600)
-    dp.add_argument("--maximum-dpi", type=int, default=1500)
-    dp.add_argument("--maximum-size", type=int, default=30)
-    dp.add_argument("--fuzzy", action="store_true")
-    dp.add_argument("--filter-cardbacks", action="store_true")
-    dp.add_argument("--no-backs", action="store_true")
+    _add_search_arguments(dp)
+    out = dp.add_mutually_exclusive_group(required=True)
+    out.add_argument("--dest", help="Destination folder")
+    out.add_argument(
+        "--archive",
+        help="Write images straight into this .zip, .tar or .tar.gz instead",
+    )
+    _add_threads_arguments(dp)
     dp.add_argument(
-        "--prefer-sources",
-        nargs="*",
-        help="Source names to prefer. Priority inferred from order (left to right).",
+        "--filename-format",
+        default="{index}_{name}.{ext}",
+        help="Output path template with {index}, {name}, {ext}, {id}, {source},"
+        " {face}; may contain '/' (default: {index}_{name}.{ext})",
     )
-    dp.add_argument("--disable-sources", nargs="*", help="Source names to disable")
     dp.add_argument(
-        "--threads", type=int, default=1, help="Parallel download threads (default: 1)"
+        "--link",
+        choices=["auto", "reflink", "hardlink", "symlink", "copy"],
+        default="auto",
+        help="How to place files from the image store; auto tries reflink,"
+        " hardlink, then copy. symlink links into the cache and breaks when it"
+        " is pruned or cleared (default: auto)",
+    )
+    dp.add_argument(
+        "--resize-dpi",
+        type=int,
+        help="Downscale images above this DPI (requires Pillow)",
+    )
+    dp.add_argument(
+        "--format",
+        choices=["jpeg", "jpg", "png", "webp"],
+        help="Re-encode images to this format, stripping metadata (requires Pillow)",
+    )
+    dp.add_argument(
+        "--quality", type=int, help="Encoder quality 1-100 for jpeg/webp output"
+    )
+    dp.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Worker processes for post-processing (default: CPU count); a"
+        " fixed --threads below this is raised to match so they stay busy",
+    )
+    dp.add_argument(
+        "--offline",
+        action="store_true",
+        help="Resolve cards from the local metadata store (see 'mpcfill prefetch')",
+    )
+    dp.add_argument(
+        "--store", help="Store file for --offline (default: $MPCFILL_STORE or cache)"
     )
     dp.set_defaults(func=cmd_download)
 
+    fp = sub.add_parser(
+        "prefetch",
+        help="Warm the metadata store and image cache for later downloads",
+    )
+    _add_search_arguments(fp)
+    _add_threads_arguments(fp)
+    fp.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Images to fetch per query, best first (default: 1)",
+    )
+    fp.add_argument(
+        "--store", help="Store file (default: $MPCFILL_STORE or the cache dir)"
+    )
+    fp.set_defaults(func=cmd_prefetch)
+
+    yp = sub.add_parser("sync", help="Download only new or changed cards into a folder")
+    _add_search_arguments(yp)
+    yp.add_argument("--dest", required=True, help="Destination folder")
+    _add_threads_arguments(yp)
+    yp.add_argument(
+        "--delete",
+        action="store_true",
+        help=(
+            "Delete previously synced files that are no longer in the list, "
+            "unless they were modified since"
+        ),
+    )
+    yp.set_defaults(func=cmd_sync)
+
+    wp = sub.add_parser(
+        "watch", help="Re-download only the changed lines of a decklist on save"
+    )
+    _add_settings_arguments(wp)
+    wp.add_argument("--deck", required=True, help="Decklist file to watch")
+    wp.add_argument("--dest", required=True, help="Destination folder")
+    wp.add_argument("--no-backs", action="store_true")
+    wp.add_argument(
+        "--filename-format",
+        default="{name}.{ext}",
+        help="Output path template as for download; {index} is the line's"
+        " position when it was added (default: {name}.{ext})",
+    )
+    wp.add_argument(
+        "--link",
+        choices=["auto", "reflink", "hardlink", "symlink", "copy"],
+        default="auto",
+        help="How to place files from the image store, as for download (default: auto)",
+    )
+    wp.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks of the decklist (default: 1)",
+    )
+    _add_threads_arguments(wp)
+    wp.set_defaults(func=cmd_watch)
+
+    qp = sub.add_parser(
+        "queue", help="Split large download jobs across processes or hosts"
+    )
+    qsub = qp.add_subparsers(dest="queue_command", required=True)
+
+    qi = qsub.add_parser("init", help="Create a queue file for a download job")
+    qi.add_argument("db", help="Queue file (SQLite)")
+    qi.add_argument("--dest", required=True, help="Destination folder")
+    qi.add_argument(
+        "--max-attempts", type=int, default=3, help="Tries per card (default: 3)"
+    )
+    _add_query_arguments(qi)
+    _add_settings_arguments(qi)
+    qi.set_defaults(func=cmd_queue_init)
+
+    qa = qsub.add_parser("add", help="Queue card names")
+    qa.add_argument("db", help="Queue file (SQLite)")
+    _add_query_arguments(qa)
+    qa.set_defaults(func=cmd_queue_add)
+
+    qw = qsub.add_parser("work", help="Claim and download queued cards")
+    qw.add_argument("db", help="Queue file (SQLite)")
+    _add_threads_arguments(qw)
+    qw.add_argument(
+        "--batch-size", type=int, default=20, help="Cards claimed per search"
+    )
+    qw.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        help="Seconds before an unfinished batch may be claimed by another worker",
+    )
+    qw.add_argument("--worker-id", help="Worker name (default: host:pid)")
+    qw.set_defaults(func=cmd_queue_work)
+
+    qs = qsub.add_parser("status", help="Show queue progress")
+    qs.add_argument("db", help="Queue file (SQLite)")
+    qs.add_argument("--json", action="store_true", help="Output as JSON")
+    qs.set_defaults(func=cmd_queue_status)
+
+    op = sub.add_parser(
+        "local-search",
+        help="Search cards recorded in the local metadata store (no service calls)",
+    )
+    _add_query_arguments(op)
+    _add_settings_arguments(op)
+    op.add_argument(
+        "--store", help="Store file (default: $MPCFILL_STORE or the cache dir)"
+    )
+    opf = op.add_mutually_exclusive_group()
+    opf.add_argument("--json", action="store_true", help="Output results as JSON")
+    _add_format_argument(opf)
+    op.set_defaults(func=cmd_local_search)
+
+    cp = sub.add_parser(
+        "complete", help="Complete card names offline from the local name index"
+    )
+    cp.add_argument("prefix", help="Name prefix (falls back to fuzzy matches)")
+    cp.add_argument("--limit", type=int, default=10)
+    cp.set_defaults(func=cmd_complete)
+
+    vp = sub.add_parser(
+        "serve", help="Run a local daemon that keeps catalogs and caches warm"
+    )
+    vp.add_argument("--socket", help="Unix socket path (default: in cache dir)")
+    vp.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Loopback TCP host for --port; other hosts are refused",
+    )
+    vp.add_argument("--port", type=int, help="Listen on localhost TCP instead")
+    vp.set_defaults(func=cmd_serve)
+
     lp = sub.add_parser("list", help="List catalog data")
     lp.add_argument(
         "what", choices=["sources", "languages", "tags", "dfcs"], help="What to list"
     )
+    _add_format_argument(lp)
 
     def _dispatch_list(args: argparse.Namespace):
         if args.what == "sources":
@@ -256,6 +901,17 @@ def build_parser() -> argparse.ArgumentParser:
     return p
 
 
+def _forward_to_daemon(args: argparse.Namespace, argv: List[str] | None):
+    """Run the command on a live daemon; return None if it must run locally."""
+    if args.no_daemon:
+        return None
+    from .daemon import FORWARDED_COMMANDS, try_forward
+
+    if args.command not in FORWARDED_COMMANDS:
+        return None
+    return try_forward(sys.argv[1:] if argv is None else argv)
+
+
 def main(argv: List[str] | None = None):
     """CLI entrypoint: parse arguments and dispatch commands."""
     parser = build_parser()
@@ -268,6 +924,11 @@ def main(argv: List[str] | None = None):
 
     try:
         if getattr(args, "command", None):
+            code = _forward_to_daemon(args, argv)
+            if code is not None:
+                if code:
+                    sys.exit(code)
+                return
             args.func(args)
             return
         parser.print_help()
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from concurrent.futures import Executor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
+from .concurrency import DEFAULT_MAX_THREADS, make_executor
+from .models.card import Card
 from .search import search_cards
 from .search_settings import SearchSettings
 from .services.catalog import fetch_dfcs, fetch_languages, fetch_sources, fetch_tags
@@ -34,20 +39,41 @@ def search_best(
     settings: SearchSettings,
     include_tokens: bool = False,
     include_backs: bool = True,
+    top_k: Optional[int] = None,
 ):
     """Return the best candidate per query string.
 
     Queries are matched against cards (and tokens if requested). When enabled,
-    dual-faced card backs are fetched and included in grouping.
+    dual-faced card backs are fetched and included in grouping. ``top_k``
+    limits metadata fetching to the first candidates per query.
     """
     q: List[Dict] = [{"query": name, "cardType": CardType.CARD} for name in queries]
     if include_tokens:
         q.extend({"query": name, "cardType": CardType.TOKEN} for name in queries)
 
-    groups = search_cards(q, settings, fetch_backs=include_backs)
+    groups = search_cards(q, settings, fetch_backs=include_backs, top_k=top_k)
     return [g[0] for g in groups if g]
 
 
+@dataclass
+class DownloadResult:
+    """Outcome of one download in :func:`iter_search_and_download_best`.
+
+    ``index`` is the card's position in the results; exactly one of
+    ``path`` and ``error`` is set.
+    """
+
+    index: int
+    card: Card
+    path: Optional[Path] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the image was placed."""
+        return self.error is None
+
+
 def search_and_download_best(
     queries: Iterable[str],
     dest: str | Path,
@@ -55,28 +81,89 @@ def search_and_download_best(
     filename_format: str = "{index}_{name}.{ext}",
     include_tokens: bool = False,
     include_backs: bool = True,
+    top_k: Optional[int] = None,
+    threads: int | str = 1,
+    max_threads: int = DEFAULT_MAX_THREADS,
+    download_executor: Optional[Executor] = None,
 ) -> List[Path]:
     """Search queries and download the best image per query to ``dest``.
 
     Supports placeholders in ``filename_format``:
-    ``{index}``, ``{name}``, ``{ext}``, ``{id}``.
-    Returns a list of downloaded paths.
+    ``{index}``, ``{name}``, ``{ext}``, ``{id}``, ``{source}``, ``{face}``.
+    Images are kept in the shared image store and linked into ``dest``
+    (see :class:`mpcfill.layout.OutputLayout`).
+    Downloads run as in :func:`iter_search_and_download_best`; the first
+    failure cancels the downloads not yet started and is raised.
+    Returns a list of downloaded paths, in result order.
+    """
+    paths: Dict[int, Path] = {}
+    results = iter_search_and_download_best(
+        queries,
+        dest,
+        settings,
+        filename_format=filename_format,
+        include_tokens=include_tokens,
+        include_backs=include_backs,
+        top_k=top_k,
+        threads=threads,
+        max_threads=max_threads,
+        download_executor=download_executor,
+    )
+    try:
+        for result in results:
+            if result.error is not None:
+                raise result.error
+            paths[result.index] = result.path
+    finally:
+        results.close()
+    return [paths[i] for i in sorted(paths)]
+
+
+def iter_search_and_download_best(
+    queries: Iterable[str],
+    dest: str | Path,
+    settings: SearchSettings,
+    filename_format: str = "{index}_{name}.{ext}",
+    include_tokens: bool = False,
+    include_backs: bool = True,
+    top_k: Optional[int] = None,
+    threads: int | str = 1,
+    max_threads: int = DEFAULT_MAX_THREADS,
+    download_executor: Optional[Executor] = None,
+) -> Iterator[DownloadResult]:
+    """Like :func:`search_and_download_best`, yielding each download as it ends.
+
+    Results come in completion order, one :class:`DownloadResult` per
+    card; a failed download is reported in its result and does not stop
+    the others. Downloads run on ``threads`` threads (``"auto"`` adapts,
+    see :mod:`mpcfill.concurrency`) or on ``download_executor`` if given,
+    which is left running. Nothing is searched until iteration starts;
+    closing the iterator early cancels the downloads not yet started.
     """
-    from .utils import make_safe_path
+    from .layout import OutputLayout
 
     best = search_best(
-        queries, settings, include_tokens=include_tokens, include_backs=include_backs
+        queries,
+        settings,
+        include_tokens=include_tokens,
+        include_backs=include_backs,
+        top_k=top_k,
     )
-    dest_path = Path(dest)
-    dest_path.mkdir(parents=True, exist_ok=True)
-
-    results: List[Path] = []
-    for i, card in enumerate(best):
-        fname = filename_format.format(
-            index=i,
-            name=make_safe_path(card.name),
-            ext=card.extension,
-            id=card.identifier,
-        )
-        results.append(card.download_image(dest_path, filename=fname))
-    return results
+    layout = OutputLayout(dest, filename_format)
+    layout.dest.mkdir(parents=True, exist_ok=True)
+    with ExitStack() as stack:
+        pool = download_executor
+        if pool is None:
+            pool = stack.enter_context(make_executor(threads, max_threads))
+        futures = {
+            pool.submit(layout.place, card, i): (i, card) for i, card in enumerate(best)
+        }
+        try:
+            for future in as_completed(futures):
+                index, card = futures[future]
+                error = future.exception()
+                path = None if error is not None else future.result()
+                yield DownloadResult(index, card, path, error)
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from .exceptions import RateLimitError, ServerError
+
+AUTO = "auto"
+DEFAULT_MIN_THREADS = 1
+DEFAULT_MAX_THREADS = 16
+DEFAULT_MAX_RETRIES = 5
+# Longest single wait before retrying a throttled or failed request.
+MAX_RETRY_DELAY = 60.0
+
+
+@dataclass
+class ConcurrencyStats:
+    """What an adaptive run did."""
+
+    settled: int
+    peak: int
+    completed: int
+    throttled: int
+    retried: int
+    elapsed: float
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        rate = self.completed / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"concurrency settled at {self.settled} (peak {self.peak}),"
+            f" {self.completed} done at {rate:.1f}/s,"
+            f" throttled {self.throttled}, retried {self.retried}"
+        )
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    Every success raises the limit by ``1 / limit`` (about one slot per
+    round of requests) while latency stays within ``latency_tolerance``
+    times the best smoothed latency seen. A 429 or 5xx response cuts the
+    limit by ``backoff``; a latency rise past the tolerance cuts it gently,
+    since at saturated throughput extra requests only queue up and add
+    latency. Throughput is not measured directly: by Little's law it is
+    the in-flight count over latency, so latency growing faster than the
+    limit means throughput has stopped improving. Only one cut is made per
+    round: failures of requests started before the last cut describe the
+    same congestion.
+    """
+
+    def __init__(
+        self,
+        minimum: int = DEFAULT_MIN_THREADS,
+        maximum: int = DEFAULT_MAX_THREADS,
+        initial: Optional[int] = None,
+        backoff: float = 0.5,
+        latency_backoff: float = 0.8,
+        latency_tolerance: float = 2.0,
+    ):
+        """Initialize the bounds, starting limit and reaction factors."""
+        if not 1 <= minimum <= maximum:
+            raise ValueError("Concurrency bounds must satisfy 1 <= minimum <= maximum")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial or minimum, minimum), maximum))
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.latency_tolerance = latency_tolerance
+        self.peak = int(self.limit)
+        self.completed = 0
+        self.throttled = 0
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._latency: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._last_cut = float("-inf")
+
+    def acquire(self) -> float:
+        """Wait for a free slot; return the start time to pass to release."""
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, congested: bool = False):
+        """Free a slot and adjust the limit from the request's outcome."""
+        now = time.monotonic()
+        with self._cond:
+            self._in_flight -= 1
+            if congested:
+                self.throttled += 1
+                self._cut(started, self.backoff)
+            else:
+                self.completed += 1
+                self._observe(started, now - started)
+            self._cond.notify_all()
+
+    def _observe(self, started: float, latency: float):
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += (latency - self._latency) * 0.3
+        if self._baseline is None or self._latency < self._baseline:
+            self._baseline = self._latency
+        if self._latency > self._baseline * self.latency_tolerance:
+            if self._cut(started, self.latency_backoff):
+                # Re-learn the baseline at the lower concurrency.
+                self._latency = self._baseline = None
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.peak = max(self.peak, int(self.limit))
+
+    def _cut(self, started: float, factor: float) -> bool:
+        if started < self._last_cut:
+            return False
+        self.limit = max(self.minimum, self.limit * factor)
+        self._last_cut = time.monotonic()
+        return True
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool that runs each task in a copy of the submitter's context.
+
+    Context variables set around the ``submit`` call, such as the hedging
+    policy of :meth:`mpcfill.http.client.Client.hedged`, apply to the task.
+    """
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """Schedule ``fn(*args, **kwargs)`` in the current context."""
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
+
+
+class AdaptiveExecutor(Executor):
+    """Thread pool whose effective size follows an :class:`AIMDController`.
+
+    Drop-in for ``ThreadPoolExecutor`` in download loops. Tasks that fail
+    with :class:`~mpcfill.exceptions.RateLimitError` or
+    :class:`~mpcfill.exceptions.ServerError` shrink the limit and are
+    retried after the server's ``Retry-After`` delay or an exponential
+    backoff, up to ``max_retries`` times; other errors propagate as usual.
+    """
+
+    def __init__(
+        self,
+        minimum: int = DEFAULT_MIN_THREADS,
+        maximum: int = DEFAULT_MAX_THREADS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        controller: Optional[AIMDController] = None,
+    ):
+        """Initialize with concurrency bounds (or a ready controller)."""
+        self.controller = controller or AIMDController(minimum, maximum)
+        self.max_retries = max_retries
+        self.retried = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._pool = ContextThreadPoolExecutor(max_workers=self.controller.maximum)
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """Schedule ``fn(*args, **kwargs)`` under the adaptive limit."""
+        return self._pool.submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        attempt = 0
+        while True:
+            started = self.controller.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except (RateLimitError, ServerError) as exc:
+                self.controller.release(started, congested=True)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.retried += 1
+                time.sleep(_retry_delay(exc, attempt))
+                continue
+            except BaseException:
+                self.controller.release(started)
+                raise
+            self.controller.release(started)
+            return result
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Shut down the underlying thread pool."""
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def stats(self) -> ConcurrencyStats:
+        """Return the settled and peak concurrency and retry counts so far."""
+        ctl = self.controller
+        return ConcurrencyStats(
+            settled=int(ctl.limit),
+            peak=ctl.peak,
+            completed=ctl.completed,
+            throttled=ctl.throttled,
+            retried=self.retried,
+            elapsed=time.monotonic() - self._started,
+        )
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float:
+    """Return the wait before a retry: ``Retry-After`` or jittered backoff."""
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return min(retry_after, MAX_RETRY_DELAY)
+    return min(0.5 * 2**attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.0)
+
+
+def parse_threads(value: str) -> int | str:
+    """Parse a thread count: a positive integer or ``"auto"``."""
+    if value.strip().lower() == AUTO:
+        return AUTO
+    threads = int(value)
+    if threads < 1:
+        raise ValueError("Thread count must be at least 1")
+    return threads
+
+
+def make_executor(
+    threads: int | str, max_threads: int = DEFAULT_MAX_THREADS
+) -> Executor:
+    """Return a download executor: adaptive for ``"auto"``, else fixed-size.
+
+    Tasks run in the context they were submitted from (see
+    :class:`ContextThreadPoolExecutor`).
+    """
+    if threads == AUTO:
+        return AdaptiveExecutor(maximum=max_threads)
+    return ContextThreadPoolExecutor(max_workers=max(1, int(threads)))
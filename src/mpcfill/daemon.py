@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import hmac
+import io
+import ipaddress
+import json
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Only the standard library is imported at module level so that probing for a
+# running daemon stays cheap for every CLI invocation.
+
+DAEMON_ENV = "MPCFILL_DAEMON"
+NO_DAEMON_ENV = "MPCFILL_NO_DAEMON"
+FORWARDED_COMMANDS = ("search", "download", "prefetch")
+# Path-valued CLI options resolved against the caller's working directory
+_PATH_OPTIONS = ("dest", "deck", "archive", "store")
+# Besides MPCFILL_*, variables that change how requests are made
+_NETWORK_ENV = (
+    "HTTP_PROXY",
+    "HTTPS_PROXY",
+    "ALL_PROXY",
+    "NO_PROXY",
+    "REQUESTS_CA_BUNDLE",
+    "CURL_CA_BUNDLE",
+    "SSL_CERT_FILE",
+)
+# Only read by the client when deciding whether to forward
+_CLIENT_ENV = (DAEMON_ENV, NO_DAEMON_ENV)
+
+
+def default_socket_path() -> str:
+    """Return the default Unix socket path inside the cache directory."""
+    from .cache import cache_dir
+
+    return str(cache_dir() / "mpcfilld.sock")
+
+
+def default_token_path() -> str:
+    """Return the file holding the shared secret of a TCP daemon."""
+    from .cache import cache_dir
+
+    return str(cache_dir() / "mpcfilld.token")
+
+
+def _read_token() -> Optional[str]:
+    try:
+        with open(default_token_path()) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_token() -> str:
+    """Create a fresh token readable by the current user only."""
+    token = secrets.token_hex(32)
+    path = default_token_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    os.replace(tmp, path)
+    return token
+
+
+def _is_loopback(host: str) -> bool:
+    """Return True if every address ``host`` resolves to is a loopback one."""
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except OSError:
+        return False
+    return bool(infos) and all(
+        ipaddress.ip_address(info[4][0].split("%", 1)[0]).is_loopback for info in infos
+    )
+
+
+def command_env(environ: Mapping[str, str] = os.environ) -> Dict[str, str]:
+    """Return the environment variables that affect how a command runs."""
+    return {
+        name: value
+        for name, value in environ.items()
+        if (name.startswith("MPCFILL_") and name not in _CLIENT_ENV)
+        or name.upper() in _NETWORK_ENV
+    }
+
+
+def _env_mismatch(client: Mapping[str, str], daemon: Mapping[str, str]) -> List[str]:
+    """Return the names of variables set differently in client and daemon."""
+    return sorted(n for n in {*client, *daemon} if client.get(n) != daemon.get(n))
+
+
+def _parse_address(address: Optional[str]) -> Tuple[str, object]:
+    """Return ``("unix", path)`` or ``("tcp", (host, port))`` for an address."""
+    address = address or os.environ.get(DAEMON_ENV) or default_socket_path()
+    if "/" not in address and ":" in address:
+        host, port = address.rsplit(":", 1)
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", address
+
+
+def _connect(address: Optional[str], timeout: float) -> Optional[socket.socket]:
+    """Connect to a running daemon, or return None when none is listening."""
+    kind, target = _parse_address(address)
+    if kind == "unix":
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(target):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def try_forward(argv: List[str], address: Optional[str] = None) -> Optional[int]:
+    """Run ``argv`` on a running daemon and relay its output.
+
+    Returns the command's exit code, or None if no daemon is reachable or
+    the daemon runs with a different environment (see :func:`command_env`);
+    the caller should then run the command locally.
+    """
+    if os.environ.get(NO_DAEMON_ENV):
+        return None
+    sock = _connect(address, timeout=0.2)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        request = {"argv": list(argv), "cwd": os.getcwd(), "env": command_env()}
+        token = _read_token()
+        if token is not None:
+            request["token"] = token
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        for line in stream:
+            frame = json.loads(line)
+            if "out" in frame:
+                sys.stdout.write(frame["out"])
+                sys.stdout.flush()
+            elif "err" in frame:
+                sys.stderr.write(frame["err"])
+                sys.stderr.flush()
+            elif "local" in frame:
+                print(f"mpcfill: running locally: {frame['local']}", file=sys.stderr)
+                return None
+            elif "exit" in frame:
+                return frame["exit"]
+    # The daemon went away mid-request; report failure rather than re-running.
+    print("mpcfill: daemon connection closed unexpectedly", file=sys.stderr)
+    return 1
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """Text stream that writes to a per-thread target, or a default stream.
+
+    Installed as ``sys.stdout``/``sys.stderr`` in the daemon so concurrent
+    requests can use plain ``print`` without mixing their output.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def _target(self):
+        return getattr(self._local, "target", None) or self._default
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self):
+        self._target().flush()
+
+    @contextmanager
+    def redirect(self, target):
+        previous = getattr(self._local, "target", None)
+        self._local.target = target
+        try:
+            yield
+        finally:
+            self._local.target = previous
+
+
+class _FrameWriter(io.TextIOBase):
+    """Text stream that forwards writes to the client as JSON frames."""
+
+    def __init__(self, wfile, key: str, lock: threading.Lock):
+        self._wfile = wfile
+        self._key = key
+        self._lock = lock
+        self.closed_by_peer = False
+
+    def write(self, s: str) -> int:
+        if s and not self.closed_by_peer:
+            _send(self._wfile, {self._key: s}, self._lock, self)
+        return len(s)
+
+
+def _send(wfile, frame: dict, lock: threading.Lock, writer=None):
+    data = json.dumps(frame, ensure_ascii=False).encode() + b"\n"
+    with lock:
+        try:
+            wfile.write(data)
+            wfile.flush()
+        except OSError:
+            if writer is not None:
+                writer.closed_by_peer = True
+
+
+def run_forwarded(argv: List[str], cwd: str) -> int:
+    """Parse and run a forwarded CLI command in this process.
+
+    Requests run concurrently, so commands must not change process-wide
+    state: hedging is scoped to the request's context and ``--store`` is
+    passed down rather than installed globally.
+    """
+    from .cli import build_parser
+
+    args = build_parser().parse_args(argv)
+    for name in _PATH_OPTIONS:
+        value = getattr(args, name, None)
+        if value and not os.path.isabs(value):
+            setattr(args, name, os.path.join(cwd, value))
+    args.func(args)
+    return 0
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        lock = threading.Lock()
+        try:
+            request = json.loads(line)
+            expected = getattr(self.server, "token", None)
+            if expected is not None and not hmac.compare_digest(
+                str(request.get("token", "")), expected
+            ):
+                _send(self.wfile, {"err": "mpcfill daemon: bad token\n"}, lock)
+                _send(self.wfile, {"exit": 2}, lock)
+                return
+            argv = request["argv"]
+            cwd = request.get("cwd") or os.getcwd()
+            if not argv or argv[0] not in FORWARDED_COMMANDS:
+                raise ValueError(f"Command not served by the daemon: {argv[:1]}")
+            # The daemon's environment is process-wide and cannot be switched
+            # per request, so a client that differs runs the command itself.
+            mismatch = _env_mismatch(dict(request.get("env", {})), command_env())
+            if mismatch:
+                reason = f"environment differs from the daemon ({', '.join(mismatch)})"
+                _send(self.wfile, {"local": reason}, lock)
+                return
+        except (ValueError, KeyError, TypeError) as exc:
+            _send(self.wfile, {"err": f"mpcfill daemon: bad request: {exc}\n"}, lock)
+            _send(self.wfile, {"exit": 2}, lock)
+            return
+
+        out = _FrameWriter(self.wfile, "out", lock)
+        err = _FrameWriter(self.wfile, "err", lock)
+        code = 0
+        with sys.stdout.redirect(out), sys.stderr.redirect(err):
+            try:
+                code = run_forwarded(argv, cwd)
+            except SystemExit as exc:
+                if isinstance(exc.code, str):
+                    print(exc.code, file=sys.stderr)
+                    code = 1
+                else:
+                    code = exc.code or 0
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+                code = 1
+        _send(self.wfile, {"exit": code}, lock)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    token: Optional[str] = None
+
+
+def warm_up():
+    """Load catalogs, tag hierarchy and source data, and enable search caches."""
+    from .search import enable_search_caches
+    from .search_settings import SearchSettings
+    from .services.catalog import fetch_dfc_index, fetch_languages, fetch_sources
+
+    fetch_sources()
+    fetch_languages()
+    fetch_dfc_index()
+    # Builds the tag hierarchy and source collection as a side effect.
+    SearchSettings()
+    enable_search_caches()
+
+
+def serve(address: Optional[str] = None):
+    """Run the daemon in the foreground until interrupted.
+
+    The daemon holds catalogs, the tag hierarchy, source data, search and
+    metadata caches and pooled connections for its whole lifetime. The CLI
+    forwards ``search`` and ``download`` to it when it is reachable.
+
+    ``address`` is a Unix socket path or ``host:port``; it defaults to
+    ``$MPCFILL_DAEMON`` and then to a socket in the cache directory. The
+    socket is only accessible to the current user. A TCP daemon only binds
+    to loopback addresses, since forwarded commands write to paths chosen
+    by the client, and requires every request to carry the token it writes
+    to :func:`default_token_path` (mode 0600), which the CLI sends along.
+
+    Commands run with the daemon's environment, so a client whose
+    :func:`command_env` differs (e.g. another ``MPCFILL_CACHE_DIR``, rate
+    limit or proxy) is told to run the command itself.
+
+    Wire protocol (newline-delimited JSON): the client sends
+    ``{"argv": [...], "cwd": "...", "env": {...}}``; the daemon streams
+    ``{"out": text}`` and ``{"err": text}`` frames, then a final
+    ``{"exit": code}`` frame, or answers ``{"local": reason}`` alone when
+    the client must run the command locally.
+    """
+    kind, target = _parse_address(address)
+    if kind == "tcp" and not _is_loopback(target[0]):
+        raise SystemExit(
+            f"mpcfill: error: refusing to serve on non-loopback host {target[0]}"
+        )
+    probe = _connect(address, timeout=0.2)
+    if probe is not None:
+        probe.close()
+        raise SystemExit(f"mpcfill: a daemon is already listening on {target}")
+
+    warm_up()
+    if not isinstance(sys.stdout, _ThreadLocalStream):
+        sys.stdout = _ThreadLocalStream(sys.stdout)
+        sys.stderr = _ThreadLocalStream(sys.stderr)
+
+    if kind == "unix":
+        if os.path.exists(target):
+            os.unlink(target)  # stale socket from a previous run
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        # Created without group/other access, so there is no window before
+        # the chmod in which another user could connect.
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(target, _Handler)
+        finally:
+            os.umask(umask)
+        os.chmod(target, 0o600)
+    else:
+        server = _TCPServer(target, _Handler)
+        server.token = _write_token()
+    server.daemon_threads = True
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    print(f"mpcfill daemon listening on {target}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+        if kind == "tcp" and _read_token() == server.token:
+            os.unlink(default_token_path())
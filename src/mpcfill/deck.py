@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, List
+
+from .types import CardType
+
+_QUANTITY = re.compile(r"^\d+\s*x?\s+", re.IGNORECASE)
+_COMMENT_PREFIXES = ("#", "//")
+
+
+def parse_decklist(text: str) -> List[str]:
+    """Parse a plain-text decklist into unique query items.
+
+    - One card per line; blank lines and ``#``/``//`` comments are skipped
+    - Leading quantities (``4 Opt``, ``4x Opt``) are dropped
+    - Tokens keep the ``t:`` prefix understood by the CLI
+    - Duplicate lines (case-insensitive) are kept only once, in first-seen order
+    """
+    items: List[str] = []
+    seen = set()
+    for line in text.splitlines():
+        item = parse_deck_line(line)
+        if item is None or item.lower() in seen:
+            continue
+        seen.add(item.lower())
+        items.append(item)
+    return items
+
+
+def parse_deck_line(line: str) -> str | None:
+    """Return the query item for one decklist line, or None if it has none."""
+    item = line.strip()
+    if not item or item.startswith(_COMMENT_PREFIXES):
+        return None
+    item = _QUANTITY.sub("", item).strip()
+    return item or None
+
+
+def item_query(item: str) -> Dict:
+    """Return the search query for one item; a ``t:`` prefix marks a token."""
+    is_token = item.lower().startswith("t:")
+    return {
+        "query": item[2:] if is_token else item,
+        "cardType": CardType.TOKEN if is_token else CardType.CARD,
+    }
+
+
+def read_decklist(path: str | Path) -> List[str]:
+    """Read and parse a decklist file (UTF-8)."""
+    return parse_decklist(Path(path).read_text(encoding="utf-8"))
@@ -1,5 +1,9 @@
-class MPCFillError(Exception):
-    """Base exception for all MPCFill-related errors."""
+class MPCFillError(RuntimeError):
+    """Base exception for all MPCFill-related errors.
+
+    A ``RuntimeError`` subclass, since HTTP failures were plain
+    ``RuntimeError`` before the specific types below were raised.
+    """
 
     pass
 
@@ -26,3 +30,16 @@ class ClientError(MPCFillError):
     """Raised when the MPCFill service returns a non-404 4xx error."""
 
     pass
+
+
+class RateLimitError(ClientError):
+    """Raised when the MPCFill service throttles requests (HTTP 429).
+
+    ``retry_after`` holds the delay in seconds requested by the server's
+    ``Retry-After`` header, if it sent one.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        """Initialize with a message and the optional server-requested delay."""
+        super().__init__(message)
+        self.retry_after = retry_after
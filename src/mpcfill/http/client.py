@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from .rate_limiter import RateLimiter
+from .. import json_backend
+from ..exceptions import RateLimitError, ServerError
+from .hedging import DEFAULT_MAX_RATE, DEFAULT_PERCENTILE, Cancelled, HedgedRequests
+from .json_stream import iter_object_items
+from .rate_limiter import rate_limiter_from_env
 
 BASE_URL = "https://mpcfill.com/"
+JSON_HEADERS = {"Content-Type": "application/json"}
 TIMEOUT = 10
+POOL_SIZE = 32
+STREAM_CHUNK_SIZE = 64 * 1024
 
-rate_limit = RateLimiter(max_calls_per_second=10)
+# Shared by every request method; see rate_limiter_from_env for the
+# MPCFILL_RATE_LIMIT* settings.
+rate_limit = rate_limiter_from_env()
 
 
 class Client:
@@ -18,12 +32,25 @@ class Client:
     - Global base URL and timeout
     - Consistent error handling
     - Rate limiting via decorator
+    - Pooled keep-alive connections shared across threads
+    - Streaming mode that parses large JSON bodies incrementally
+    - Payloads encoded and decoded with the fastest installed JSON backend
+    - Opt-in hedging of slow image downloads (see :meth:`hedged`)
     """
 
     def __init__(self, base_url: str | None = None, timeout: float | None = None):
-        """Initialize the client with base URL and timeout."""
+        """Initialize the client with base URL, timeout and a pooled session."""
         self.base_url = base_url or BASE_URL
         self.timeout = timeout or TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Per context, so concurrent callers (e.g. daemon requests) each keep
+        # their own policy; see ``hedged``.
+        self._hedging: ContextVar[Optional[HedgedRequests]] = ContextVar(
+            "mpcfill_hedging", default=None
+        )
 
     def _make_url(self, path: str) -> str:
         return f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
@@ -32,38 +59,164 @@ class Client:
     def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         """Perform a GET request to a service path and return JSON."""
         url = self._make_url(path)
-        resp = requests.get(url, params=params, timeout=self.timeout)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as exc:
-            raise RuntimeError(
-                f"HTTP GET failed: {exc}, url={url}, params={params}"
-            ) from exc
-        return resp.json()
+        resp = self.session.get(url, params=params, timeout=self.timeout)
+        _raise_for_status(resp, "GET", f"url={url}, params={params}")
+        return json_backend.loads(resp.content)
 
     @rate_limit
     def post(self, path: str, data: Optional[Dict[str, Any]] = None) -> Any:
         """Perform a POST request to a service path and return JSON."""
         url = self._make_url(path)
-        resp = requests.post(url, json=data, timeout=self.timeout)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as exc:
-            raise RuntimeError(
-                f"HTTP POST failed: {exc}, url={url}, data={data}"
-            ) from exc
-        return resp.json()
+        resp = self.session.post(
+            url,
+            data=json_backend.dumps(data),
+            headers=JSON_HEADERS,
+            timeout=self.timeout,
+        )
+        _raise_for_status(resp, "POST", f"url={url}, data={data}")
+        return json_backend.loads(resp.content)
 
     @rate_limit
+    def _open_stream(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        url = self._make_url(path)
+        resp = self.session.request(
+            method, url, stream=True, timeout=self.timeout, **kwargs
+        )
+        try:
+            _raise_for_status(resp, method, f"url={url}, {kwargs}")
+        except Exception:
+            resp.close()
+            raise
+        return resp
+
+    def stream_get(
+        self,
+        path: str,
+        item_path: Sequence[str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Tuple[str, Any]]:
+        """Perform a GET and stream the members of the object at ``item_path``.
+
+        The request is sent immediately; the body is read and parsed
+        incrementally while the returned iterator is consumed.
+        """
+        resp = self._open_stream("GET", path, params=params)
+        return _iter_response_items(resp, item_path)
+
+    def stream_post(
+        self,
+        path: str,
+        item_path: Sequence[str],
+        data: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Tuple[str, Any]]:
+        """Perform a POST and stream the members of the object at ``item_path``.
+
+        See :meth:`stream_get`.
+        """
+        resp = self._open_stream(
+            "POST", path, data=json_backend.dumps(data), headers=JSON_HEADERS
+        )
+        return _iter_response_items(resp, item_path)
+
+    @contextmanager
+    def hedged(
+        self,
+        percentile: float = DEFAULT_PERCENTILE,
+        max_rate: float = DEFAULT_MAX_RATE,
+    ) -> Iterator[HedgedRequests]:
+        """Hedge :meth:`raw_get` calls made inside the ``with`` block.
+
+        A download slower than the ``percentile`` latency of recent ones is
+        duplicated, the first response wins and the other is dropped; at
+        most ``max_rate`` of downloads are hedged. See
+        :class:`~mpcfill.http.hedging.HedgedRequests`.
+
+        The policy is held in a context variable: it applies to this thread
+        and to tasks submitted to the executors of :mod:`mpcfill.concurrency`
+        from inside the block, not to other threads using the client.
+        """
+        hedging = HedgedRequests(percentile=percentile, max_rate=max_rate)
+        token = self._hedging.set(hedging)
+        try:
+            yield hedging
+        finally:
+            self._hedging.reset(token)
+            hedging.close()
+
+    @property
+    def hedging(self) -> Optional[HedgedRequests]:
+        """The hedging policy active in the current context, if any."""
+        return self._hedging.get()
+
     def raw_get(self, url: str) -> bytes:
         """Perform a GET to a fully-qualified URL and return bytes."""
-        resp = requests.get(url, timeout=self.timeout)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError as exc:
-            raise RuntimeError(f"HTTP GET failed: {exc}, url={url}") from exc
+        hedging = self._hedging.get()
+        if hedging is None:
+            return self._raw_get(url)
+        return self._raw_get_hedged(url, hedging)
+
+    @rate_limit
+    def _raw_get(self, url: str) -> bytes:
+        resp = self.session.get(url, timeout=self.timeout)
+        _raise_for_status(resp, "GET", f"url={url}")
         return resp.content
 
+    @rate_limit
+    def _raw_get_hedged(self, url: str, hedging: HedgedRequests) -> bytes:
+        # The primary's rate-limit slot is taken before the hedging clock
+        # starts, so waiting for it does not count as latency; a duplicate
+        # takes a slot of its own.
+        attempt = partial(self._raw_get_cancellable, url)
+        return hedging.call(attempt, hedge=rate_limit(attempt))
+
+    def _raw_get_cancellable(self, url: str, cancel: threading.Event) -> bytes:
+        """Stream the body of ``url``, giving up as soon as ``cancel`` is set."""
+        if cancel.is_set():
+            raise Cancelled(url)
+        with self.session.get(url, timeout=self.timeout, stream=True) as resp:
+            _raise_for_status(resp, "GET", f"url={url}")
+            chunks = []
+            for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if cancel.is_set():
+                    # Closing an unread response drops its connection.
+                    raise Cancelled(url)
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+
+def _raise_for_status(resp: requests.Response, method: str, context: str):
+    """Raise for HTTP errors: 429 and 5xx get their own types, others RuntimeError.
+
+    Throttling (:class:`RateLimitError`) and server errors
+    (:class:`ServerError`) are transient and worth retrying.
+    """
+    try:
+        resp.raise_for_status()
+    except requests.HTTPError as exc:
+        message = f"HTTP {method} failed: {exc}, {context}"
+        if resp.status_code == 429:
+            retry_after = _retry_after(resp.headers.get("Retry-After"))
+            raise RateLimitError(message, retry_after=retry_after) from exc
+        if resp.status_code >= 500:
+            raise ServerError(message) from exc
+        raise RuntimeError(message) from exc
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header given in seconds (dates are ignored)."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def _iter_response_items(
+    resp: requests.Response, item_path: Sequence[str]
+) -> Iterator[Tuple[str, Any]]:
+    with resp:
+        chunks = resp.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+        yield from iter_object_items(chunks, item_path)
+
 
 __all__ = ["Client", "client"]
 
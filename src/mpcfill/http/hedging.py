@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+from .rate_limiter import is_low_priority, low_priority
+
+T = TypeVar("T")
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MAX_RATE = 0.05
+
+
+class Cancelled(Exception):
+    """Raised inside an attempt that lost the race and was cancelled."""
+
+
+@dataclass
+class HedgeStats:
+    """Counters of a :class:`HedgedRequests` policy."""
+
+    requests: int
+    hedged: int
+    hedge_wins: int
+    threshold: Optional[float]
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        threshold = "n/a" if self.threshold is None else f"{self.threshold:.2f}s"
+        return (
+            f"hedged {self.hedged}/{self.requests} requests"
+            f" ({self.hedge_wins} won), threshold {threshold}"
+        )
+
+
+class HedgedRequests:
+    """Duplicate requests that are slower than most recent ones.
+
+    An attempt that has not finished after the ``percentile`` latency of
+    the last ``window`` requests gets a second, identical attempt; the first
+    to succeed wins and the other is cancelled. Until ``min_samples``
+    latencies are known nothing is hedged. At most ``max_rate`` of all
+    requests are hedged, which bounds the extra load on the host.
+
+    Attempts are callables taking a :class:`threading.Event`; they should
+    check it while reading the response and raise :class:`Cancelled` once
+    it is set.
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_PERCENTILE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        window: int = 256,
+        min_samples: int = 20,
+        max_workers: int = 64,
+    ):
+        """Initialize the policy; attempts run on up to ``max_workers`` threads."""
+        if not 0 < percentile < 100:
+            raise ValueError(f"percentile must be in (0, 100), got {percentile}")
+        if not 0 <= max_rate <= 1:
+            raise ValueError(f"max_rate must be in [0, 1], got {max_rate}")
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="mpcfill-hedge")
+
+    def threshold(self) -> Optional[float]:
+        """Return the current hedging delay in seconds, or None if unknown."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    def stats(self) -> HedgeStats:
+        """Return the request and hedge counters so far."""
+        return HedgeStats(
+            self._requests, self._hedged, self._hedge_wins, self.threshold()
+        )
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if self._hedged + 1 > self.max_rate * self._requests:
+                return False
+            self._hedged += 1
+            return True
+
+    def _submit(self, attempt: Callable[[threading.Event], T], cancel):
+        if is_low_priority():
+            # Keep background work in the background on the pool threads.
+            def run():
+                with low_priority():
+                    return attempt(cancel)
+
+            return self._pool.submit(run)
+        return self._pool.submit(attempt, cancel)
+
+    def call(
+        self,
+        attempt: Callable[[threading.Event], T],
+        hedge: Optional[Callable[[threading.Event], T]] = None,
+    ) -> T:
+        """Run ``attempt``, hedging it if it is slow; return the first result.
+
+        The duplicate runs ``hedge`` if given (e.g. ``attempt`` behind a
+        rate limiter), else ``attempt``. Latency is measured from the call,
+        so the caller should have waited for any rate limit before it. If
+        every attempt fails, the last error is raised.
+        """
+        with self._lock:
+            self._requests += 1
+        started = time.monotonic()
+        delay = self.threshold()
+        primary_cancel = threading.Event()
+        primary = self._submit(attempt, primary_cancel)
+        if delay is None or wait([primary], timeout=delay).done:
+            result = primary.result()
+            self._record(time.monotonic() - started)
+            return result
+        if not self._allow_hedge():
+            result = primary.result()
+            self._record(time.monotonic() - started)
+            return result
+
+        hedge_cancel = threading.Event()
+        cancels = {primary: primary_cancel}
+        cancels[self._submit(hedge or attempt, hedge_cancel)] = hedge_cancel
+        pending = set(cancels)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for other in pending:
+                    cancels[other].set()
+                    other.cancel()
+                self._record(time.monotonic() - started)
+                if future is not primary:
+                    with self._lock:
+                        self._hedge_wins += 1
+                return future.result()
+        raise error
+
+    def _record(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def close(self):
+        """Stop the attempt threads once running attempts finish."""
+        self._pool.shutdown(wait=False)
+
+
+__all__ = ["Cancelled", "HedgeStats", "HedgedRequests"]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Sequence, Tuple, Union
+
+_WHITESPACE = " \t\n\r"
+# Consumed text is dropped from the buffer once this much has piled up.
+_COMPACT_AT = 64 * 1024
+
+
+class _Scanner:
+    """Pull-based scanner over a stream of JSON text chunks.
+
+    Only the structure leading to the requested object is walked by hand;
+    each member value is decoded with :meth:`json.JSONDecoder.raw_decode`
+    once its text is complete, so at most one member (plus one chunk) is
+    buffered at a time.
+    """
+
+    def __init__(self, chunks: Iterable[Union[str, bytes]]):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; return False at end of input."""
+        if self._eof:
+            return False
+        if self._pos >= _COMPACT_AT:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._utf8.decode(chunk)
+            if chunk:
+                self._buf += chunk
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise json.JSONDecodeError(
+                    "Unexpected end of data", self._buf, self._pos
+                )
+
+    def expect(self, char: str):
+        """Consume ``char`` (after whitespace) or raise JSONDecodeError."""
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self._buf, self._pos)
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number running to the end of the buffer may continue in the
+            # next chunk; only trust it once more data (or EOF) has been seen.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def members(self) -> Iterator[str]:
+        """Walk the keys of the object at the cursor.
+
+        After each yielded key the caller must consume its value (with
+        :meth:`value` or by descending into it) before resuming.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError(
+                    "Expecting property name", self._buf, self._pos
+                )
+            self.expect(":")
+            yield key
+            if self.peek() == "}":
+                self._pos += 1
+                return
+            self.expect(",")
+
+
+def iter_object_items(
+    chunks: Iterable[Union[str, bytes]], path: Sequence[str]
+) -> Iterator[Tuple[str, Any]]:
+    """Incrementally yield ``(key, value)`` members of a nested JSON object.
+
+    ``chunks`` is the raw body (``str`` or UTF-8 ``bytes`` pieces, split
+    anywhere). ``path`` names the keys leading from the top-level object to
+    the object whose members are wanted, e.g. ``("results",)``. Members are
+    yielded as soon as they are complete, so memory stays bounded by the
+    largest member rather than the whole body. Nothing is yielded when the
+    path does not exist.
+    """
+    scanner = _Scanner(chunks)
+    depth = 0
+    walkers = [scanner.members()]
+    while walkers:
+        try:
+            key = next(walkers[-1])
+        except StopIteration:
+            if depth == len(path):
+                return
+            walkers.pop()
+            depth -= 1
+            continue
+        if depth == len(path):
+            yield key, scanner.value()
+        elif key == path[depth] and scanner.peek() == "{":
+            walkers.append(scanner.members())
+            depth += 1
+        else:
+            scanner.value()
@@ -1,38 +1,197 @@
+import os
+import struct
 import threading
 import time
+from contextlib import contextmanager
 from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+RATE_LIMIT_ENV = "MPCFILL_RATE_LIMIT"
+RATE_LIMITER_ENV = "MPCFILL_RATE_LIMITER"
+RATE_LIMIT_FILE_ENV = "MPCFILL_RATE_LIMIT_FILE"
+RATE_LIMITERS = ("process", "file")
+DEFAULT_MAX_CALLS_PER_SECOND = 10.0
+
+_priority = threading.local()
+# Time of the last reserved call slot, as a little-endian double.
+_SLOT = struct.Struct("<d")
+# A stored slot further ahead than this is left over from a clock change.
+_MAX_AHEAD = 60.0
+
+
+@contextmanager
+def low_priority():
+    """Mark rate-limited calls made by this thread as background work.
+
+    Background calls wait while any normal (interactive) call is queued or
+    in flight, or finished within the limiter's ``yield_seconds``, and use
+    at most ``background_share`` of the call budget. Threads do not inherit
+    the mark: enter it inside each worker.
+    """
+    previous = getattr(_priority, "low", False)
+    _priority.low = True
+    try:
+        yield
+    finally:
+        _priority.low = previous
+
+
+def is_low_priority() -> bool:
+    """Return True inside :func:`low_priority` on this thread."""
+    return getattr(_priority, "low", False)
 
 
 class RateLimiter:
     """Simple thread-safe rate limiter.
 
-    Allows up to ``max_calls_per_second``.
+    Allows up to ``max_calls_per_second`` in this process. Calls made under
+    :func:`low_priority` yield to all other calls.
     """
 
-    def __init__(self, max_calls_per_second: float):
-        """Initialize with the maximum allowed calls per second."""
+    def __init__(
+        self,
+        max_calls_per_second: float,
+        background_share: float = 0.5,
+        yield_seconds: float = 1.0,
+    ):
+        """Initialize with the maximum allowed calls per second.
+
+        Background calls are spaced to use at most ``background_share`` of
+        that rate, and only start once no normal call has been made for
+        ``yield_seconds``.
+        """
         self.max_calls_per_second = max_calls_per_second
+        self.background_share = background_share
+        self.yield_seconds = yield_seconds
         self.lock = threading.Lock()
-        self.calls = []
+        self._last_slot = float("-inf")
+        # Normal calls queued or in flight
+        self._state = threading.Lock()
+        self._interactive = 0
+        self._last_interactive = float("-inf")
+
+    def _interactive_busy(self) -> bool:
+        return (
+            self._interactive > 0
+            or time.monotonic() - self._last_interactive < self.yield_seconds
+        )
+
+    def _reserve(self, interval: float, wait: bool = True) -> Optional[float]:
+        """Claim the next call slot, ``interval`` after the previous one.
+
+        Returns the seconds to sleep before making the call. With
+        ``wait=False`` a slot is only claimed if it is due now; otherwise
+        nothing is claimed and None is returned.
+        """
+        with self.lock:
+            now = time.time()
+            slot = max(now, self._last_slot + interval)
+            if not wait and slot > now:
+                return None
+            self._last_slot = slot
+            return slot - now
 
     def __call__(self, func):
         """Decorate a function to enforce rate limits."""
         min_interval = 1.0 / self.max_calls_per_second
 
+        def background_turn():
+            # Only claims slots that are free right now, so an interactive
+            # call never queues behind a background one.
+            interval = min_interval / self.background_share
+            while True:
+                while self._interactive_busy():
+                    time.sleep(min_interval)
+                if self._reserve(interval, wait=False) is not None:
+                    return
+                time.sleep(min_interval)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
+            if is_low_priority():
+                background_turn()
+                return func(*args, **kwargs)
+
+            with self._state:
+                self._interactive += 1
+            try:
+                time.sleep(self._reserve(min_interval))
+                return func(*args, **kwargs)
+            finally:
+                with self._state:
+                    self._interactive -= 1
+                    self._last_interactive = time.monotonic()
+
+        return wrapper
+
+
+class FileRateLimiter(RateLimiter):
+    """Rate limiter shared by every process on the host that uses ``path``.
+
+    The time of the last call slot is kept in a small file guarded by an
+    exclusive ``flock``; each call claims the next free slot, so the calls
+    of all processes together stay within ``max_calls_per_second``. Sleeping
+    happens outside the lock. Low-priority calls yield to normal calls made
+    in the same process only. POSIX only.
+    """
+
+    def __init__(self, max_calls_per_second: float, path: str | Path, **kwargs):
+        """Initialize with the shared rate and the state file path."""
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError("File-based rate limiting requires fcntl (POSIX)")
+        super().__init__(max_calls_per_second, **kwargs)
+        self._flock = fcntl.flock
+        self._exclusive = fcntl.LOCK_EX
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _reserve(self, interval: float, wait: bool = True) -> Optional[float]:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
             with self.lock:
+                # Released when the descriptor is closed.
+                self._flock(fd, self._exclusive)
+                raw = os.pread(fd, _SLOT.size, 0)
+                last = _SLOT.unpack(raw)[0] if len(raw) == _SLOT.size else 0.0
                 now = time.time()
-                self.calls = [t for t in self.calls if now - t < 1.0]
+                if last - now > _MAX_AHEAD:
+                    last = 0.0
+                slot = max(now, last + interval)
+                if not wait and slot > now:
+                    return None
+                os.pwrite(fd, _SLOT.pack(slot), 0)
+                return slot - now
+        finally:
+            os.close(fd)
 
-                if self.calls:
-                    elapsed = now - self.calls[-1]
-                    sleep_time = min_interval - elapsed
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
 
-                self.calls.append(time.time())
+def rate_limiter_from_env(
+    max_calls_per_second: float = DEFAULT_MAX_CALLS_PER_SECOND,
+) -> RateLimiter:
+    """Build the rate limiter selected by the environment.
 
-            return func(*args, **kwargs)
+    ``MPCFILL_RATE_LIMIT`` overrides the calls per second.
+    ``MPCFILL_RATE_LIMITER`` is ``process`` (default: each process has its
+    own budget) or ``file`` (one budget for all processes on the host, see
+    :class:`FileRateLimiter`, kept in ``MPCFILL_RATE_LIMIT_FILE`` or
+    ``ratelimit`` in the cache directory).
+    """
+    rate = os.environ.get(RATE_LIMIT_ENV)
+    if rate:
+        max_calls_per_second = float(rate)
+    kind = os.environ.get(RATE_LIMITER_ENV) or "process"
+    if kind == "process":
+        return RateLimiter(max_calls_per_second)
+    if kind == "file":
+        path = os.environ.get(RATE_LIMIT_FILE_ENV)
+        if not path:
+            from ..cache import cache_dir
 
-        return wrapper
+            path = cache_dir() / "ratelimit"
+        return FileRateLimiter(max_calls_per_second, path)
+    raise ValueError(
+        f"Unknown {RATE_LIMITER_ENV} {kind!r}; expected one of {RATE_LIMITERS}"
+    )
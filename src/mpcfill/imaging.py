@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+
+# Pillow format name → file extension written to disk
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+_FORMAT_ALIASES = {"JPG": "JPEG"}
+
+
+@dataclass(frozen=True)
+class ImageTransform:
+    """CPU-bound post-processing applied to a downloaded card image.
+
+    - ``resize_dpi``: downscale to this DPI when the source is sharper
+    - ``format``: re-encode as ``jpeg``, ``png`` or ``webp``
+    - ``quality``: encoder quality (1-100) for lossy formats
+
+    Metadata (EXIF, ICC, text chunks) is always stripped. Instances are
+    hashable and picklable, so they can be used as cache keys and shipped to
+    worker processes.
+    """
+
+    resize_dpi: int | None = None
+    format: str | None = None
+    quality: int | None = None
+
+    def __post_init__(self):
+        """Normalize the format name and validate numeric options."""
+        if self.format is not None:
+            fmt = self.format.upper()
+            fmt = _FORMAT_ALIASES.get(fmt, fmt)
+            if fmt not in FORMAT_EXTENSIONS:
+                raise ValueError(f"Unsupported image format: {self.format!r}")
+            object.__setattr__(self, "format", fmt)
+        if self.resize_dpi is not None and self.resize_dpi <= 0:
+            raise ValueError("resize_dpi must be positive")
+        if self.quality is not None and not 1 <= self.quality <= 100:
+            raise ValueError("quality must be between 1 and 100")
+
+    @property
+    def key(self) -> str:
+        """Stable, filesystem-safe identifier used for cache entries."""
+        parts = [
+            f"dpi{self.resize_dpi}" if self.resize_dpi else "dpi-orig",
+            self.format.lower() if self.format else "fmt-orig",
+            f"q{self.quality}" if self.quality else "q-default",
+        ]
+        return "_".join(parts)
+
+    def extension(self, original: str) -> str:
+        """Return the file extension produced for an image of ``original`` type."""
+        if self.format is None:
+            return original
+        return FORMAT_EXTENSIONS[self.format]
+
+
+def apply_transform(
+    content: bytes, transform: ImageTransform, source_dpi: int | None = None
+) -> bytes:
+    """Apply ``transform`` to encoded image bytes and return the new encoding.
+
+    Runs entirely on the calling process, so it is safe to submit to a
+    ``ProcessPoolExecutor``. Images at or below the target DPI are never
+    upscaled.
+
+    Raises:
+        ImportError: If Pillow is not installed.
+
+    """
+    try:
+        from PIL import Image
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise ImportError(
+            "Image post-processing requires Pillow: "
+            "pip install 'mpcfill-python[images]'"
+        ) from exc
+
+    with Image.open(io.BytesIO(content)) as src:
+        fmt = transform.format or src.format or "PNG"
+        img = src.copy()
+
+    dpi = source_dpi
+    if transform.resize_dpi and source_dpi and source_dpi > transform.resize_dpi:
+        scale = transform.resize_dpi / source_dpi
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        img = img.resize(size, Image.Resampling.LANCZOS)
+        dpi = transform.resize_dpi
+
+    if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    # A fresh image carries no EXIF/ICC/text info; only the print DPI is kept.
+    img.info = {}
+    save_kwargs = {}
+    if dpi:
+        save_kwargs["dpi"] = (dpi, dpi)
+    if transform.quality is not None and fmt in ("JPEG", "WEBP"):
+        save_kwargs["quality"] = transform.quality
+
+    out = io.BytesIO()
+    img.save(out, format=fmt, **save_kwargs)
+    return out.getvalue()
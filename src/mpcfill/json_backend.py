@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+JSON_BACKEND_ENV = "MPCFILL_JSON_BACKEND"
+# Preferred order when no backend is requested explicitly
+BACKEND_ORDER = ("orjson", "msgspec", "json")
+
+
+@dataclass(frozen=True)
+class JSONBackend:
+    """Encoder/decoder pair behind a common interface.
+
+    ``dumps`` always returns UTF-8 ``bytes`` with compact separators and
+    non-ASCII characters kept as-is, whatever the backend, so output is
+    interchangeable between them.
+    """
+
+    name: str
+    dumps: Callable[..., bytes]
+    loads: Callable[[bytes | str], Any]
+    decode_errors: Tuple[Type[Exception], ...]
+
+
+def _stdlib() -> JSONBackend:
+    def dumps(
+        obj: Any,
+        sort_keys: bool = False,
+        indent: bool = False,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> bytes:
+        return json.dumps(
+            obj,
+            ensure_ascii=False,
+            sort_keys=sort_keys,
+            indent=2 if indent else None,
+            separators=(",", ": ") if indent else (",", ":"),
+            default=default,
+        ).encode()
+
+    return JSONBackend("json", dumps, json.loads, (ValueError,))
+
+
+def _orjson() -> JSONBackend:
+    import orjson
+
+    def dumps(
+        obj: Any,
+        sort_keys: bool = False,
+        indent: bool = False,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> bytes:
+        option = 0
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return JSONBackend("orjson", dumps, orjson.loads, (ValueError,))
+
+
+def _msgspec() -> JSONBackend:
+    import msgspec
+
+    encoders: Dict[Tuple[bool, Any], Any] = {}
+
+    def dumps(
+        obj: Any,
+        sort_keys: bool = False,
+        indent: bool = False,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> bytes:
+        encoder = encoders.get((sort_keys, default))
+        if encoder is None:
+            encoder = msgspec.json.Encoder(
+                enc_hook=default, order="sorted" if sort_keys else None
+            )
+            encoders[(sort_keys, default)] = encoder
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    decoder = msgspec.json.Decoder()
+    return JSONBackend(
+        "msgspec", dumps, decoder.decode, (ValueError, msgspec.DecodeError)
+    )
+
+
+_FACTORIES: Dict[str, Callable[[], JSONBackend]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _stdlib,
+}
+
+
+def get_backend(name: str) -> JSONBackend:
+    """Return the named backend; raises ImportError if it is not installed."""
+    try:
+        factory = _FACTORIES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown JSON backend {name!r}; choose from {', '.join(BACKEND_ORDER)}"
+        ) from None
+    return factory()
+
+
+def available_backends() -> Dict[str, JSONBackend]:
+    """Return every installed backend, in preference order."""
+    found = {}
+    for name in BACKEND_ORDER:
+        try:
+            found[name] = get_backend(name)
+        except ImportError:
+            continue
+    return found
+
+
+def _select() -> JSONBackend:
+    requested = os.environ.get(JSON_BACKEND_ENV)
+    if requested:
+        return get_backend(requested)
+    for name in BACKEND_ORDER:
+        try:
+            return get_backend(name)
+        except ImportError:
+            continue
+    raise AssertionError("the stdlib backend is always available")
+
+
+backend = _select()
+
+dumps = backend.dumps
+loads = backend.loads
+# Exception types raised by ``loads`` on malformed input
+DecodeError = backend.decode_errors
+
+
+def dumps_str(obj: Any, **kwargs: Any) -> str:
+    """Encode like :func:`dumps` but return ``str`` (for printing)."""
+    return dumps(obj, **kwargs).decode()
+
+
+__all__ = [
+    "JSONBackend",
+    "DecodeError",
+    "available_backends",
+    "backend",
+    "dumps",
+    "dumps_str",
+    "get_backend",
+    "loads",
+]
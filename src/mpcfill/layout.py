@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import errno
+import shutil
+import string
+import threading
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple
+
+from .cache import cache_dir, image_store_path, write_atomic
+from .utils import format_bytes, make_safe_path
+
+if TYPE_CHECKING:
+    from .imaging import ImageTransform
+    from .models.card import Card
+    from .models.dfc import DFCIndex
+
+LINK_MODES = ("reflink", "hardlink", "symlink", "copy")
+# Reported by OutputLayout for images written straight to the output folder
+DIRECT_MODE = "download"
+# Symlinks point into the cache and break when it is moved, pruned or
+# cleared, so they are only used when asked for.
+DEFAULT_LINK_MODES = ("reflink", "hardlink", "copy")
+DEFAULT_FILENAME_FORMAT = "{index}_{name}.{ext}"
+FILENAME_FIELDS = ("index", "name", "ext", "id", "source", "face")
+
+# Linux ``FICLONE`` ioctl: share the extents of one file with another
+# (copy-on-write) on Btrfs, XFS, bcachefs and similar filesystems.
+_FICLONE = 0x40049409
+# Errors that mean "this filesystem pair cannot do this", as opposed to a
+# problem with one particular file.
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.ENOSYS,
+    errno.EPERM,
+}
+# (source device, destination device) -> modes known not to work there.
+_unsupported: Dict[Tuple[int, int], Set[str]] = {}
+
+
+def _reflink(src: Path, dest: Path):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOTSUP, "reflink is not supported on this platform")
+    with open(src, "rb") as s, open(dest, "xb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            dest.unlink()
+            raise
+
+
+def _hardlink(src: Path, dest: Path):
+    dest.hardlink_to(src)
+
+
+def _symlink(src: Path, dest: Path):
+    dest.symlink_to(src.resolve())
+
+
+def _copy(src: Path, dest: Path):
+    shutil.copy2(src, dest)
+
+
+def _same_device(a: Path, b: Path) -> bool:
+    return a.stat().st_dev == b.stat().st_dev
+
+
+_MATERIALIZERS = {
+    "reflink": _reflink,
+    "hardlink": _hardlink,
+    "symlink": _symlink,
+    "copy": _copy,
+}
+
+
+def materialize(
+    src: Path, dest: Path, modes: Sequence[str] = DEFAULT_LINK_MODES
+) -> str:
+    """Create ``dest`` from ``src`` with the first mode that works; return it.
+
+    Modes are tried in order, by default ``reflink`` (copy-on-write clone,
+    independent file), ``hardlink`` (same inode) and ``copy``; ``symlink``
+    (absolute link into the store) is only tried when listed. A mode that
+    fails because the filesystems cannot support it is not tried again for
+    the same pair of devices. ``dest`` must not exist.
+    """
+    key = (src.stat().st_dev, dest.parent.stat().st_dev)
+    skip = _unsupported.get(key, ())
+    error: Optional[OSError] = None
+    for mode in modes:
+        if mode not in _MATERIALIZERS:
+            raise ValueError(f"Unknown link mode {mode!r}; expected {LINK_MODES}")
+        if mode in skip:
+            continue
+        try:
+            _MATERIALIZERS[mode](src, dest)
+        except OSError as exc:
+            if exc.errno in _UNSUPPORTED_ERRNOS:
+                _unsupported.setdefault(key, set()).add(mode)
+            error = exc
+            continue
+        return mode
+    if error is None:
+        error = OSError(errno.ENOTSUP, f"No usable link mode among {list(modes)}")
+    raise error
+
+
+@dataclass
+class LayoutReport:
+    """Files placed by an :class:`OutputLayout` and how."""
+
+    files: List[Path] = field(default_factory=list)
+    methods: Counter = field(default_factory=Counter)
+    bytes_total: int = 0
+    bytes_saved: int = 0
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        methods = ", ".join(f"{m} {n}" for m, n in sorted(self.methods.items()))
+        return (
+            f"placed {len(self.files)} files ({methods or 'none'}),"
+            f" {format_bytes(self.bytes_total)} total,"
+            f" {format_bytes(self.bytes_saved)} saved by linking"
+        )
+
+
+class FilenameFormat:
+    """Relative output path template for cards.
+
+    Supports placeholders: ``{index}``, ``{name}``, ``{ext}``, ``{id}``,
+    ``{source}`` (source name) and ``{face}`` (``front`` or ``back``). The
+    format may contain ``/`` to create subfolders, e.g.
+    ``"{face}/{index}_{name}.{ext}"``, but may not leave the output root.
+    """
+
+    def __init__(
+        self,
+        filename_format: str = DEFAULT_FILENAME_FORMAT,
+        dfc_index: Optional[DFCIndex] = None,
+    ):
+        """Validate the format; ``dfc_index`` is fetched on demand for ``{face}``."""
+        fields = {f for _, f, _, _ in string.Formatter().parse(filename_format) if f}
+        unknown = fields - set(FILENAME_FIELDS)
+        if unknown:
+            raise ValueError(
+                f"Unknown filename fields {sorted(unknown)};"
+                f" expected {list(FILENAME_FIELDS)}"
+            )
+        self.filename_format = filename_format
+        self._needs_face = "face" in fields
+        self._dfc_index = dfc_index
+
+    def face_of(self, card: Card) -> str:
+        """Return ``"back"`` for a Dual-Faced Card back face, else ``"front"``."""
+        if self._dfc_index is None:
+            from .services.catalog import fetch_dfc_index
+
+            self._dfc_index = fetch_dfc_index()
+        return "back" if self._dfc_index.is_back(card.name) else "front"
+
+    def __call__(self, card: Card, index: int, ext: Optional[str] = None) -> str:
+        """Return the relative output path of ``card`` at position ``index``."""
+        source = getattr(card, "sourceName", None) or getattr(card, "source", "")
+        name = self.filename_format.format(
+            index=index,
+            name=make_safe_path(card.name),
+            ext=ext or card.extension,
+            id=card.identifier,
+            source=make_safe_path(str(source)),
+            face=self.face_of(card) if self._needs_face else "",
+        )
+        rel = Path(name)
+        if rel.is_absolute() or ".." in rel.parts:
+            raise ValueError(f"Filename {name!r} escapes the output folder")
+        return name
+
+
+class OutputLayout:
+    """Build an output folder from the shared image store.
+
+    Each card's image is fetched into the store once (see
+    :meth:`Card.fetch_image`) and then materialized under ``dest`` with the
+    first of ``modes`` that works, so several output trees (per deck, per
+    print batch, fronts and backs apart) cost no extra downloads and, with
+    linking, almost no extra disk space.
+
+    ``filename_format`` is a :class:`FilenameFormat` template.
+
+    When the store is on another filesystem than ``dest``, linking cannot
+    work and copying would write every image twice, so images not in the
+    store yet are downloaded straight into ``dest`` instead (reported as
+    ``"download"``) and not added to the store.
+
+    Files are shared with the store when hardlinked or symlinked; do not
+    edit them in place. Symlinks (only used when ``modes`` lists
+    ``"symlink"``) break if the cache is cleared or pruned, see
+    :func:`mpcfill.cache.prune_image_store`.
+    """
+
+    def __init__(
+        self,
+        dest: str | Path,
+        filename_format: str = DEFAULT_FILENAME_FORMAT,
+        modes: Sequence[str] = DEFAULT_LINK_MODES,
+        dfc_index: Optional[DFCIndex] = None,
+    ):
+        """Initialize with the output folder, filename format and link modes."""
+        self.filename = FilenameFormat(filename_format, dfc_index)
+        for mode in modes:
+            if mode not in _MATERIALIZERS:
+                raise ValueError(f"Unknown link mode {mode!r}; expected {LINK_MODES}")
+        self.dest = Path(dest)
+        self.modes = tuple(modes)
+        self.report = LayoutReport()
+        self._lock = threading.Lock()
+        self._direct: Optional[bool] = None
+
+    def _writes_direct(self) -> bool:
+        """Return True if new images skip the store (it is on another device)."""
+        if self._direct is None:
+            store = cache_dir() / "images"
+            store.mkdir(parents=True, exist_ok=True)
+            self.dest.mkdir(parents=True, exist_ok=True)
+            # Symlinks need the store; they are cheap across devices anyway.
+            self._direct = "symlink" not in self.modes and not _same_device(
+                store, self.dest
+            )
+        return self._direct
+
+    def place(
+        self,
+        card: Card,
+        index: int,
+        transform: Optional[ImageTransform] = None,
+        executor: Optional[Executor] = None,
+    ) -> Path:
+        """Fetch ``card`` into the store if needed, materialize it, return the path.
+
+        An existing file at the target path is replaced. Safe to call from
+        several threads.
+        """
+        if transform is None and self._writes_direct():
+            stored = image_store_path(card.identifier, card.extension)
+            if not stored.exists():
+                return self._place_direct(card, index)
+        src = card.fetch_image(transform=transform, executor=executor)
+        target = self.dest / self.filename(card, index, ext=src.suffix[1:])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.is_symlink() or target.exists():
+            # Never write through an existing name: it may share an inode
+            # with the store.
+            target.unlink()
+        mode = materialize(src, target, self.modes)
+        self._record(target, mode, src.stat().st_size)
+        return target
+
+    def _place_direct(self, card: Card, index: int) -> Path:
+        target = self.dest / self.filename(card, index)
+        # Replaces the name, never writes through an inode shared with the store.
+        write_atomic(target, card.read_image())
+        self._record(target, DIRECT_MODE, target.stat().st_size)
+        return target
+
+    def _record(self, target: Path, mode: str, size: int):
+        with self._lock:
+            self.report.files.append(target)
+            self.report.methods[mode] += 1
+            self.report.bytes_total += size
+            if mode not in ("copy", DIRECT_MODE):
+                self.report.bytes_saved += size
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-import shutil
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Any, Dict, Optional
-
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..cache import (
+    image_store_path,
+    processed_image_path,
+    touch_image,
+    write_atomic,
+)
 from ..http.client import client
 from ..utils import dict_to_namespace, namespace_to_dict
 
+if TYPE_CHECKING:
+    from ..imaging import ImageTransform
+
 _PATH_CACHE: Dict[str, Path] = {}
 
 
@@ -74,22 +83,35 @@ class Card:
         self,
         dest_folder: str | Path,
         filename: Optional[str] = None,
+        transform: Optional[ImageTransform] = None,
+        executor: Optional[Executor] = None,
     ) -> Path:
         """Download the card image to a specified folder.
 
-        If the card has been downloaded previously in this session, the method
-        will attempt to create a hardlink from the cached path to the destination
-        path. If hardlinking fails (e.g., on different filesystems), it will
+        If the card has been downloaded previously in this session, or is in
+        the on-disk image store (see :meth:`fetch_image`), the method will
+        attempt to reflink or hardlink the existing file to the destination
+        path. If linking fails (e.g., on different filesystems), it will
         fallback to copying the file.
 
-        The cache is in-memory only and stores the path of the previously
-        downloaded file. There is no persistent cache on disk outside the
-        destination folder.
+        The session cache is in-memory only and stores the path of the
+        previously downloaded file. This method does not add originals to the
+        image store; post-processed images are cached on disk (see below).
+
+        When ``transform`` is given, the downloaded bytes are handed straight to
+        :func:`mpcfill.imaging.apply_transform` (on ``executor`` if provided,
+        typically a ``ProcessPoolExecutor``) and the result is stored in the
+        on-disk cache keyed on ``(identifier, transform)``. Repeated runs with
+        the same transform reuse that entry without downloading or processing.
 
         Args:
             dest_folder (str | Path): Destination folder to save the card image.
             filename (Optional[str]): Optional filename. Defaults to
                 "<card_id>.<extension>" if not provided.
+            transform (Optional[ImageTransform]): Optional post-processing to
+                apply before writing the image.
+            executor (Optional[Executor]): Executor running the transform.
+                Defaults to processing on the calling thread.
 
         Returns:
             Path: Path to the downloaded image file.
@@ -105,17 +127,21 @@ class Card:
         dest_folder.mkdir(parents=True, exist_ok=True)
 
         ext = getattr(self, "extension")
+        if transform is not None:
+            ext = transform.extension(ext)
         file_name = filename or f"{self.identifier}.{ext}"
         dest_path = dest_folder / file_name
 
-        cached_path = _PATH_CACHE.get(self.identifier)
-        if cached_path and cached_path.exists():
-            if not dest_path.exists():
-                try:
-                    dest_path.hardlink_to(cached_path)
-                except OSError:
-                    shutil.copy2(cached_path, dest_path)
-            return dest_path
+        if transform is not None:
+            return self._download_transformed(dest_path, ext, transform, executor)
+
+        for cached_path in (
+            _PATH_CACHE.get(self.identifier),
+            image_store_path(self.identifier, ext),
+        ):
+            if cached_path and cached_path.exists():
+                _link_or_copy(cached_path, dest_path)
+                return dest_path
 
         content = client.raw_get(self.downloadLink)
         dest_path.write_bytes(content)
@@ -123,3 +149,114 @@ class Card:
         _PATH_CACHE[self.identifier] = dest_path
 
         return dest_path
+
+    def fetch_image(
+        self,
+        transform: Optional[ImageTransform] = None,
+        executor: Optional[Executor] = None,
+    ) -> Path:
+        """Make sure the image is in the on-disk store and return its path.
+
+        Originals are kept in the shared image store
+        (:func:`mpcfill.cache.image_store_path`) and post-processed images in
+        the processed cache, so each is downloaded or processed only once.
+        Output folders are then built from the returned file, see
+        :class:`mpcfill.layout.OutputLayout`. The stored file must not be
+        modified.
+
+        Raises:
+            ValueError: If the card has no download link.
+
+        """
+        if not hasattr(self, "downloadLink") or not self.downloadLink:
+            raise ValueError(f"Card {self.identifier} has no download link")
+        if transform is not None:
+            ext = transform.extension(self.extension)
+            return self._fetch_transformed(ext, transform, executor)
+
+        stored = image_store_path(self.identifier, self.extension)
+        if stored.exists():
+            touch_image(stored)
+        else:
+            write_atomic(stored, self._original_bytes())
+        return stored
+
+    def read_image(
+        self,
+        transform: Optional[ImageTransform] = None,
+        executor: Optional[Executor] = None,
+    ) -> bytes:
+        """Return the image bytes without writing the original to disk.
+
+        Uses a local copy (this session's downloads or the image store) when
+        there is one and the network otherwise. With ``transform``, the
+        processed image comes from (and is added to) the processed cache.
+
+        Raises:
+            ValueError: If the card has no download link.
+
+        """
+        if not hasattr(self, "downloadLink") or not self.downloadLink:
+            raise ValueError(f"Card {self.identifier} has no download link")
+        if transform is not None:
+            ext = transform.extension(self.extension)
+            return self._fetch_transformed(ext, transform, executor).read_bytes()
+        return self._original_bytes()
+
+    def _original_bytes(self) -> bytes:
+        """Return the original image from a local copy or the network."""
+        for local in (
+            _PATH_CACHE.get(self.identifier),
+            image_store_path(self.identifier, self.extension),
+        ):
+            if local and local.exists():
+                return local.read_bytes()
+        return client.raw_get(self.downloadLink)
+
+    def _download_transformed(
+        self,
+        dest_path: Path,
+        ext: str,
+        transform: ImageTransform,
+        executor: Optional[Executor],
+    ) -> Path:
+        """Fetch, post-process and cache the image, then place it at dest_path."""
+        processed = self._fetch_transformed(ext, transform, executor)
+        if dest_path.exists() and not dest_path.samefile(processed):
+            # Output of an earlier run (possibly another transform); replace it.
+            dest_path.unlink()
+        _link_or_copy(processed, dest_path)
+        return dest_path
+
+    def _fetch_transformed(
+        self, ext: str, transform: ImageTransform, executor: Optional[Executor]
+    ) -> Path:
+        """Return the processed-cache path, downloading and processing on a miss.
+
+        Waits for the transform, also when it runs on ``executor``; run
+        enough calling threads to keep a process pool busy.
+        """
+        from ..imaging import apply_transform
+
+        processed = processed_image_path(self.identifier, transform.key, ext)
+        if not processed.exists():
+            content = self._original_bytes()
+
+            dpi = getattr(self._data, "dpi", None)
+            if executor is not None:
+                content = executor.submit(
+                    apply_transform, content, transform, dpi
+                ).result()
+            else:
+                content = apply_transform(content, transform, dpi)
+            write_atomic(processed, content)
+        return processed
+
+
+def _link_or_copy(src: Path, dest: Path):
+    """Reflink or hardlink ``src`` to ``dest``, copying when neither works."""
+    if dest.exists():
+        return
+    from ..layout import materialize
+
+    materialize(src, dest, modes=("reflink", "hardlink", "copy"))
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from ..utils import normalize_query
+
+
+class DFCIndex:
+    """Bidirectional lookup of Dual-Faced Card names.
+
+    Built once from the ``front → back`` catalog mapping. Both directions are
+    keyed by :func:`mpcfill.utils.normalize_query`, so lookups are O(1) and
+    insensitive to case, punctuation and spacing differences in user input.
+    Values are the names as published by the service.
+    """
+
+    def __init__(self, pairs: Dict[str, str]):
+        """Index ``front → back`` pairs in both directions."""
+        self._back_by_front: Dict[str, str] = {}
+        self._front_by_back: Dict[str, str] = {}
+        for front, back in pairs.items():
+            if not front or not back:
+                continue
+            self._back_by_front[normalize_query(front)] = back
+            self._front_by_back.setdefault(normalize_query(back), front)
+
+    def __len__(self) -> int:
+        """Return the number of indexed pairs."""
+        return len(self._back_by_front)
+
+    def back_of(self, name: str) -> Optional[str]:
+        """Return the back face name for a front face, or None."""
+        return self._back_by_front.get(normalize_query(name))
+
+    def front_of(self, name: str) -> Optional[str]:
+        """Return the front face name for a back face, or None."""
+        return self._front_by_back.get(normalize_query(name))
+
+    def is_back(self, name: str) -> bool:
+        """Return True if ``name`` is the back face of a known DFC."""
+        return normalize_query(name) in self._front_by_back
+
+    def expand(self, names: Iterable[str]) -> List[str]:
+        """Return the back faces to add for a batch of names.
+
+        Backs are returned in input order, each at most once, and backs
+        already present in ``names`` are skipped.
+        """
+        ordered = [normalize_query(n) for n in names]
+        keys = set(ordered)
+        backs: List[str] = []
+        for key in ordered:
+            back = self._back_by_front.get(key)
+            if back is None:
+                continue
+            back_key = normalize_query(back)
+            if back_key not in keys:
+                keys.add(back_key)
+                backs.append(back)
+        return backs
@@ -1,3 +1,5 @@
+from typing import Dict, Iterable, List
+
 from .sources import SourceCollection
 
 
@@ -6,38 +8,85 @@ class SourceFilter:
 
     Allows enabling/disabling by ID or by name (case-insensitive),
     and supports reordering/prioritizing sources.
+
+    Construction is O(1): lookups come from the (shared) ``SourceCollection``
+    and the enabled map and priority order are borrowed from it, or from the
+    filter this one was copied from, until the first change (copy-on-write).
     """
 
     def __init__(self, sources: SourceCollection | None = None):
-        """Initialize with a `SourceCollection`, building lookup maps."""
+        """Initialize from a `SourceCollection` (the shared one by default)."""
         if sources is None:
-            sources = SourceCollection()
-        self._id_map = {s.id: s for s in sources._sources}
-        self._name_map = {s.name.lower(): s for s in sources._sources}
-        self.enabled = {s.id: True for s in sources._sources}
-        self._priority_order = [s.id for s in sources._sources]
+            sources = SourceCollection.shared()
+        self._id_map = sources._id_map
+        self._name_map = sources._name_map
+        self._enabled: Dict[int, bool] = sources._default_enabled
+        self._priority_order: List[int] = sources._default_order
+        self._owns_enabled = False
+        self._owns_order = False
+
+    def copy(self) -> "SourceFilter":
+        """Return an independent filter that shares state until either changes."""
+        clone = SourceFilter.__new__(SourceFilter)
+        clone.__dict__.update(self.__dict__)
+        self._owns_enabled = self._owns_order = False
+        clone._owns_enabled = clone._owns_order = False
+        return clone
+
+    @property
+    def enabled(self) -> Dict[int, bool]:
+        """Mapping of source ID to enabled flag (owned by this filter)."""
+        return self._writable_enabled()
+
+    @enabled.setter
+    def enabled(self, flags: Dict[int | str, bool]):
+        """Replace the flags of the given sources (by ID or name).
+
+        The mapping is copied, never shared with the caller or with other
+        filters. Sources missing from ``flags`` keep their current flag;
+        IDs that are not in the catalog are ignored.
+        """
+        enabled = dict(self._enabled)
+        for key, on in flags.items():
+            sid = self._resolve_key(key)
+            if sid in self._id_map:
+                enabled[sid] = bool(on)
+        self._enabled = enabled
+        self._owns_enabled = True
+
+    def _writable_enabled(self) -> Dict[int, bool]:
+        if not self._owns_enabled:
+            self._enabled = dict(self._enabled)
+            self._owns_enabled = True
+        return self._enabled
+
+    def _writable_order(self) -> List[int]:
+        if not self._owns_order:
+            self._priority_order = list(self._priority_order)
+            self._owns_order = True
+        return self._priority_order
 
     def disable(self, key: int | str):
         """Disable a source by numeric ID or name."""
         sid = self._resolve_key(key)
-        if sid in self.enabled:
-            self.enabled[sid] = False
+        if self._enabled.get(sid) is True:
+            self._writable_enabled()[sid] = False
 
     def enable(self, key: int | str):
         """Enable a source by numeric ID or name."""
         sid = self._resolve_key(key)
-        if sid in self.enabled:
-            self.enabled[sid] = True
+        if self._enabled.get(sid) is False:
+            self._writable_enabled()[sid] = True
 
     def disable_all(self):
         """Disable all sources."""
-        for key in self.enabled:
-            self.enabled[key] = False
+        self._enabled = dict.fromkeys(self._enabled, False)
+        self._owns_enabled = True
 
     def enable_all(self):
         """Enable all sources."""
-        for key in self.enabled:
-            self.enabled[key] = True
+        self._enabled = dict.fromkeys(self._enabled, True)
+        self._owns_enabled = True
 
     def _resolve_key(self, key: int | str) -> int:
         """Return numeric ID given a key (int or name)."""
@@ -51,11 +100,26 @@ class SourceFilter:
     def set_priority(self, key: int | str, position: int):
         """Move a source to a specific position (0 = first, -1 = last)."""
         sid = self._resolve_key(key)
-        if sid in self._priority_order:
-            self._priority_order.remove(sid)
+        order = self._writable_order()
+        if sid in order:
+            order.remove(sid)
         if position < 0:
-            position = len(self._priority_order) + 1 + position
-        self._priority_order.insert(position, sid)
+            position = len(order) + 1 + position
+        order.insert(position, sid)
+
+    def set_priority_order(self, keys: Iterable[int | str]):
+        """Put the given sources first, in this order, in one O(n) pass.
+
+        Sources not listed keep their relative order after them. For distinct
+        keys this matches calling :meth:`set_priority` with positions 0, 1,
+        2, ... one by one.
+        """
+        front = list(dict.fromkeys(self._resolve_key(key) for key in keys))
+        chosen = set(front)
+        self._priority_order = front + [
+            sid for sid in self._priority_order if sid not in chosen
+        ]
+        self._owns_order = True
 
     def set_priority_lowest(self, key: int | str):
         """Move a source to the last position."""
@@ -70,13 +134,21 @@ class SourceFilter:
 
         Negative indices are supported (Python style).
         """
-        sid = self._resolve_key(key)
-        if sid in self._priority_order:
-            self._priority_order.remove(sid)
-        if index < 0:
-            index = len(self._priority_order) + 1 + index
-        self._priority_order.insert(index, sid)
+        self.set_priority(key, index)
+
+    def apply_api_format(self, entries: Iterable[Iterable]):
+        """Restore order and enabled flags from :meth:`to_api_format` output.
+
+        IDs that are no longer in the catalog are ignored; sources missing
+        from ``entries`` keep their current flag and go last.
+        """
+        known = [(sid, bool(on)) for sid, on in entries if sid in self._id_map]
+        self.set_priority_order(sid for sid, _ in known)
+        enabled = self._writable_enabled()
+        for sid, on in known:
+            enabled[sid] = on
 
     def to_api_format(self) -> list[list[int, bool]]:
         """Return [[id, enabled], ...] for MPCFill, preserving priority order."""
-        return [[sid, self.enabled[sid]] for sid in self._priority_order]
+        enabled = self._enabled
+        return [[sid, enabled[sid]] for sid in self._priority_order]
@@ -1,10 +1,11 @@
 import csv
-import json
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Any, Dict, List
 
+from .. import json_backend
 from ..services.catalog import fetch_sources
 from ..utils import dict_to_namespace
 
@@ -54,13 +55,25 @@ class Source:
 
 
 class SourceCollection:
-    """Hold all sources and provide ID/name lookups."""
+    """Hold all sources and provide ID/name lookups.
+
+    A collection is treated as immutable once built. :meth:`shared` returns a
+    process-wide instance so that settings objects do not rebuild it.
+    """
 
     def __init__(self):
         """Load sources from the catalog and build lookup indices."""
-        self._sources = [Source(data) for data in fetch_sources().values()]
+        self._sources = tuple(Source(data) for data in fetch_sources().values())
         self._id_map = {s.id: s for s in self._sources}
         self._name_map = {s.name.lower(): s for s in self._sources}
+        # Default filter state, shared read-only by every SourceFilter
+        self._default_enabled = dict.fromkeys(self._id_map, True)
+        self._default_order = list(self._id_map)
+
+    @classmethod
+    def shared(cls) -> "SourceCollection":
+        """Return the process-wide collection built from the cached catalog."""
+        return _shared_collection()
 
     def get_by_id(self, sid: int) -> Source | None:
         """Return a source by numeric ID, or None if missing."""
@@ -86,8 +99,7 @@ class SourceCollection:
             raise FileNotFoundError(f"Sources file not found: {path}")
 
         if path.suffix.lower() == ".json":
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = json_backend.loads(path.read_bytes())
         elif path.suffix.lower() in [".csv", ".tsv"]:
             data = []
             with open(path, newline="", encoding="utf-8") as f:
@@ -105,3 +117,8 @@ class SourceCollection:
 
         sources = [Source(**item) for item in data]
         return sources
+
+
+@lru_cache(maxsize=1)
+def _shared_collection() -> SourceCollection:
+    return SourceCollection()
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import json_backend
+from .cache import cache_dir, write_atomic
+from .utils import normalize_query
+
+INDEX_VERSION = 1
+
+# path -> ((mtime_ns, size), index) of the last load, for record_names.
+_loaded: Dict[Path, Tuple[Tuple[int, int], "NameIndex"]] = {}
+_loaded_lock = threading.Lock()
+
+
+def default_index_path() -> Path:
+    """Return the on-disk location of the persistent name index."""
+    return cache_dir() / "names.json"
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Return the padded character trigrams of a normalized name."""
+    padded = f"  {normalized} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Local index of known card names for autocomplete and typo correction.
+
+    Names are keyed by :func:`mpcfill.utils.normalize_query`, so lookups
+    ignore case, punctuation and the other differences the search service
+    ignores. Prefix completion uses a sorted key list (binary search); fuzzy
+    suggestions use a trigram inverted index built on first use.
+    ``seeded`` records whether the DFC catalog names were merged in.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """Initialize with optional display names."""
+        self._names: Dict[str, str] = {}
+        self._sorted: Optional[List[str]] = None
+        self._grams: Optional[Dict[str, Set[str]]] = None
+        self.seeded = False
+        self.add(names)
+
+    def __len__(self) -> int:
+        """Return the number of distinct normalized names."""
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        """Return True if ``name`` normalizes to a known name."""
+        return normalize_query(name) in self._names
+
+    def add(self, names: Iterable[str]) -> int:
+        """Add display names; return how many were new."""
+        added = 0
+        for name in names:
+            if not name:
+                continue
+            key = normalize_query(name)
+            if key and key not in self._names:
+                self._names[key] = name
+                added += 1
+                if self._grams is not None:
+                    for gram in trigrams(key):
+                        self._grams[gram].add(key)
+        if added:
+            self._sorted = None
+        return added
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to ``limit`` display names starting with ``prefix``."""
+        if self._sorted is None:
+            self._sorted = sorted(self._names)
+        key = normalize_query(prefix)
+        out: List[str] = []
+        for i in range(bisect_left(self._sorted, key), len(self._sorted)):
+            candidate = self._sorted[i]
+            if not candidate.startswith(key) or len(out) >= limit:
+                break
+            out.append(self._names[candidate])
+        return out
+
+    def suggest(
+        self, query: str, limit: int = 5, threshold: float = 0.3
+    ) -> List[Tuple[str, float]]:
+        """Return ``(display name, similarity)`` pairs for a possibly misspelled query.
+
+        Similarity is the Jaccard index of the trigram sets, in ``[0, 1]``.
+        """
+        if self._grams is None:
+            self._grams = defaultdict(set)
+            for key in self._names:
+                for gram in trigrams(key):
+                    self._grams[gram].add(key)
+
+        query_grams = trigrams(normalize_query(query))
+        shared: Counter = Counter()
+        for gram in query_grams:
+            shared.update(self._grams.get(gram, ()))
+
+        scored = []
+        for key, common in shared.items():
+            union = len(query_grams) + len(trigrams(key)) - common
+            score = common / union
+            if score >= threshold:
+                scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self._names[key], round(score, 3)) for score, key in scored[:limit]]
+
+    def correct(self, query: str, threshold: float = 0.6) -> Optional[str]:
+        """Return a confident correction for ``query``, or None.
+
+        Known names are never corrected.
+        """
+        if query in self:
+            return None
+        best = self.suggest(query, limit=1, threshold=threshold)
+        return best[0][0] if best else None
+
+    def save(self, path: Optional[Path] = None):
+        """Persist the index (normalized keys are stored, so loading is cheap)."""
+        path = Path(path) if path else default_index_path()
+        payload = {
+            "version": INDEX_VERSION,
+            "seeded": self.seeded,
+            "names": dict(sorted(self._names.items())),
+        }
+        write_atomic(path, json_backend.dumps(payload))
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "NameIndex":
+        """Load a saved index; a missing or outdated file yields an empty one."""
+        path = Path(path) if path else default_index_path()
+        index = cls()
+        try:
+            payload = json_backend.loads(path.read_bytes())
+        except (FileNotFoundError, *json_backend.DecodeError):
+            return index
+        if payload.get("version") == INDEX_VERSION:
+            index._names = dict(payload.get("names", {}))
+            index.seeded = bool(payload.get("seeded", False))
+            # Saved in key order, so the prefix list needs no sort.
+            index._sorted = list(index._names)
+        return index
+
+
+def load_name_index(path: Optional[Path] = None) -> NameIndex:
+    """Load the persistent index, merging in the DFC catalog names once.
+
+    The merge happens whenever the file is not marked as seeded, also if
+    names were already recorded by :func:`record_names`, and is written
+    under the same lock.
+    """
+    path = Path(path) if path else default_index_path()
+    index = NameIndex.load(path)
+    if index.seeded:
+        return index
+    from .services.catalog import fetch_dfcs
+
+    dfcs = fetch_dfcs()
+    with _locked(path):
+        index = NameIndex.load(path)
+        if not index.seeded:
+            index.add(dfcs.keys())
+            index.add(dfcs.values())
+            index.seeded = True
+            index.save(path)
+        with _loaded_lock:
+            _loaded[path] = (_signature(path), index)
+    return index
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _known_index(path: Path) -> NameIndex:
+    """Return the index at ``path``, reloading only when the file changed."""
+    signature = _signature(path)
+    with _loaded_lock:
+        cached = _loaded.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    index = NameIndex.load(path)
+    with _loaded_lock:
+        _loaded[path] = (signature, index)
+    return index
+
+
+@contextmanager
+def _locked(path: Path):
+    """Hold an exclusive lock on ``path``'s lock file (no-op without fcntl)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def record_names(names: Iterable[str], path: Optional[Path] = None) -> int:
+    """Merge resolved card names into the persistent index.
+
+    Names already known are skipped without touching the file (the last
+    loaded index is reused while the file is unchanged). New names are
+    merged under a file lock into a fresh read of the index and written
+    atomically, so concurrent processes do not lose each other's names.
+    """
+    path = Path(path) if path else default_index_path()
+    known = _known_index(path)
+    new = [name for name in names if normalize_query(name or "") not in known._names]
+    if not new:
+        return 0
+    with _locked(path):
+        index = NameIndex.load(path)
+        added = index.add(new)
+        if added:
+            index.save(path)
+        with _loaded_lock:
+            _loaded[path] = (_signature(path), index)
+    return added
+
+
+def correct_queries(
+    queries: List[Dict], index: NameIndex, threshold: float = 0.6
+) -> List[Tuple[str, str]]:
+    """Rewrite unknown query names in place with confident corrections.
+
+    Returns the ``(original, corrected)`` pairs that were applied.
+    """
+    applied = []
+    for query in queries:
+        fixed = index.correct(query["query"], threshold=threshold)
+        if fixed is not None:
+            applied.append((query["query"], fixed))
+            query["query"] = fixed
+    return applied
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import csv
+import sys
+from itertools import chain, islice
+from typing import IO, Dict, Iterable, List, Optional
+
+FORMATS = ("table", "csv", "tsv", "ndjson")
+# Rows read ahead to size table columns; later rows stream with those widths.
+TABLE_SAMPLE = 1000
+
+
+def write_rows(
+    headers: List[str],
+    rows: Iterable[Dict],
+    fmt: str = "table",
+    out: Optional[IO[str]] = None,
+    sample: Optional[int] = TABLE_SAMPLE,
+    flush: bool = False,
+) -> int:
+    """Write ``rows`` (dicts keyed by ``headers``) as they are produced.
+
+    ``csv``, ``tsv`` and ``ndjson`` write each row as soon as it arrives.
+    ``table`` sizes its columns from the first ``sample`` rows (all rows
+    when ``sample`` is None), prints those, then streams the rest with the
+    same widths; longer values in later rows are printed in full and push
+    their line out of alignment. Nothing is printed when there are no rows.
+    With ``flush``, output is flushed after every row.
+
+    Returns the number of rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format {fmt!r}; expected {FORMATS}")
+    out = out or sys.stdout
+    rows = iter(rows)
+    if fmt == "table":
+        return _write_table(headers, rows, out, sample, flush)
+
+    first = next(rows, None)
+    if first is None:
+        return 0
+    if fmt == "ndjson":
+        from .json_backend import dumps_str
+
+        def write(row: Dict):
+            out.write(dumps_str({h: row.get(h, "") for h in headers}) + "\n")
+
+    else:
+        writer = csv.DictWriter(
+            out,
+            headers,
+            extrasaction="ignore",
+            dialect="excel-tab" if fmt == "tsv" else "excel",
+            lineterminator="\n",
+        )
+        writer.writeheader()
+        write = writer.writerow
+
+    count = 0
+    for row in chain((first,), rows):
+        write(row)
+        count += 1
+        if flush:
+            out.flush()
+    return count
+
+
+def _write_table(
+    headers: List[str],
+    rows: Iterable[Dict],
+    out: IO[str],
+    sample: Optional[int],
+    flush: bool,
+) -> int:
+    head = list(rows if sample is None else islice(rows, sample))
+    if not head:
+        return 0
+    widths = {
+        h: max(len(h), max(len(str(r.get(h, ""))) for r in head)) for h in headers
+    }
+
+    def line(r: Dict) -> str:
+        return "  ".join(str(r.get(h, "")).ljust(widths[h]) for h in headers)
+
+    out.write(line({h: h for h in headers}) + "\n")
+    out.write("  ".join("-" * widths[h] for h in headers) + "\n")
+    count = 0
+    for row in chain(head, rows):
+        out.write(line(row) + "\n")
+        count += 1
+        if flush:
+            out.flush()
+    return count
+
+
+__all__ = ["FORMATS", "TABLE_SAMPLE", "write_rows"]
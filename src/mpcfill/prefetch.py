@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .cache import image_store_path
+from .concurrency import (
+    DEFAULT_MAX_THREADS,
+    AdaptiveExecutor,
+    ConcurrencyStats,
+    make_executor,
+)
+from .http.rate_limiter import low_priority
+from .models.card import Card
+from .search import _offline_store, iter_search_cards
+from .search_settings import SearchSettings
+from .services.catalog import fetch_dfcs
+
+
+@dataclass
+class PrefetchReport:
+    """What :func:`prefetch_cards` resolved and stored."""
+
+    resolved: int = 0
+    recorded: int = 0
+    fetched: List[Path] = field(default_factory=list)
+    cached: int = 0
+    # Every image of this prefetch in the image store, fetched or cached
+    stored: List[Path] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    concurrency: Optional[ConcurrencyStats] = None
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        text = (
+            f"resolved {self.resolved} queries, recorded {self.recorded} cards, "
+            f"fetched {len(self.fetched)} images, {self.cached} already cached, "
+            f"{len(self.failed)} failed"
+        )
+        if self.concurrency is not None:
+            text += f"; {self.concurrency.summary()}"
+        return text
+
+
+def _fetch(card: Card) -> Path:
+    with low_priority():
+        return card.fetch_image()
+
+
+def prefetch_cards(
+    queries: List[Dict],
+    search_settings: SearchSettings,
+    fetch_backs: bool = True,
+    candidates: int = 1,
+    threads: int | str = 1,
+    max_threads: int = DEFAULT_MAX_THREADS,
+    top_k: Optional[int] = None,
+    store: Optional[str | Path] = None,
+) -> PrefetchReport:
+    """Warm the local caches for ``queries`` ahead of a download.
+
+    Every request is made at low priority (see
+    :func:`mpcfill.http.rate_limiter.low_priority`): it stays within the
+    rate limit and waits for interactive requests made in the same process,
+    e.g. by other clients of ``mpcfill serve``.
+
+    The metadata of every candidate and the DFC pairs are recorded in the
+    metadata store (``store``, or the enabled/default one), so that
+    ``search_cards(..., offline=True)`` and ``mpcfill download --offline``
+    can answer without the service. The images of the best ``candidates``
+    cards per query are downloaded into the shared image store. Images are
+    fetched on ``threads`` threads while later queries are still being
+    resolved. Failed downloads are reported, not raised.
+    """
+    metadata = _offline_store(store)
+    report = PrefetchReport()
+    futures = {}
+    with make_executor(threads, max_threads) as pool:
+        with low_priority():
+            if fetch_backs:
+                metadata.add_dfc_pairs(fetch_dfcs())
+            for _, group in iter_search_cards(
+                queries, search_settings, fetch_backs=fetch_backs, top_k=top_k
+            ):
+                report.resolved += 1
+                report.recorded += metadata.add_cards(c.to_dict() for c in group)
+                for card in group[:candidates]:
+                    if card.identifier in futures:
+                        continue
+                    path = image_store_path(card.identifier, card.extension)
+                    if path.exists():
+                        report.cached += 1
+                        report.stored.append(path)
+                        futures[card.identifier] = None
+                        continue
+                    futures[card.identifier] = pool.submit(_fetch, card)
+
+        for identifier, future in futures.items():
+            if future is None:
+                continue
+            try:
+                path = future.result()
+            except Exception as exc:
+                report.failed[identifier] = str(exc)
+                continue
+            report.fetched.append(path)
+            report.stored.append(path)
+    if isinstance(pool, AdaptiveExecutor):
+        report.concurrency = pool.stats()
+    return report
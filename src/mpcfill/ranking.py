@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .models.card import Card
+
+if TYPE_CHECKING:
+    from .search_settings import SearchSettings
+
+# The service filters ``maximumSize`` in megabytes against sizes in bytes.
+BYTES_PER_MB = 1_000_000
+
+
+def expand_tags(names: Iterable[str]) -> List[str]:
+    """Return tag names plus all their descendants in the tag hierarchy."""
+    names = [str(name) for name in names]
+    if not names:
+        return []
+    from .filters.tags import tag_hierarchy
+
+    expanded: Set[str] = set()
+    for name in names:
+        node = tag_hierarchy.find(name)
+        if node is None:
+            expanded.add(name)
+        else:
+            expanded.update(n.name for n in node.walk())
+    return sorted(expanded)
+
+
+class Ranker:
+    """Apply a search settings payload to cards locally.
+
+    Mirrors what the service does with ``searchSettings``: cards from
+    disabled sources, outside the DPI range, over the size limit, in other
+    languages, missing every included tag or carrying an excluded tag are
+    dropped, and the rest are ordered by the position of their source in the
+    priority list, then by card priority.
+
+    Built from the :meth:`SearchSettings.to_dict` payload, so a ranker can
+    also be made for a stored or received payload.
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        """Precompute lookups from a ``SearchSettings.to_dict()`` payload."""
+        data = payload["searchSettings"]
+        filters = data["filterSettings"]
+        sources = data["sourceSettings"]["sources"]
+        self._rank = {sid: i for i, (sid, on) in enumerate(sources) if on}
+        self._disabled = {sid for sid, on in sources if not on}
+        self._unranked = len(sources)
+        self.fuzzy_search = data["searchTypeSettings"]["fuzzySearch"]
+        self.minimum_dpi = filters["minimumDPI"]
+        self.maximum_dpi = filters["maximumDPI"]
+        self.maximum_bytes = filters["maximumSize"] * BYTES_PER_MB
+        self.languages = {str(code).upper() for code in filters["languages"]}
+        self._include_names = list(filters["includesTags"])
+        self._exclude_names = list(filters["excludesTags"])
+        self._tags: Optional[Tuple[Set[str], Set[str]]] = None
+
+    @classmethod
+    def for_settings(cls, settings: SearchSettings) -> "Ranker":
+        """Return a ranker for a ``SearchSettings`` instance."""
+        return cls(settings.to_dict())
+
+    @property
+    def enabled_sources(self) -> List[int]:
+        """Enabled source IDs, in priority order."""
+        return list(self._rank)
+
+    @property
+    def disabled_sources(self) -> Set[int]:
+        """Disabled source IDs."""
+        return set(self._disabled)
+
+    def tag_filters(self) -> Tuple[Set[str], Set[str]]:
+        """Return the (included, excluded) tag names, expanded to descendants."""
+        if self._tags is None:
+            self._tags = (
+                set(expand_tags(self._include_names)),
+                set(expand_tags(self._exclude_names)),
+            )
+        return self._tags
+
+    def accepts(self, card: Card) -> bool:
+        """Return True if the service would return ``card`` for these settings."""
+        if getattr(card, "sourceId", None) in self._disabled:
+            return False
+        dpi = getattr(card, "dpi", None)
+        if dpi is not None and not self.minimum_dpi <= dpi <= self.maximum_dpi:
+            return False
+        size = getattr(card, "size", None)
+        if size is not None and size > self.maximum_bytes:
+            return False
+        if self.languages and getattr(card, "language", None) not in self.languages:
+            return False
+        include, exclude = self.tag_filters()
+        if include or exclude:
+            tags = set(getattr(card, "tags", None) or ())
+            if include and not tags & include:
+                return False
+            if tags & exclude:
+                return False
+        return True
+
+    def sort_key(self, card: Card) -> Tuple[int, Any]:
+        """Return the ordering key: source priority position, then card priority."""
+        rank = self._rank.get(getattr(card, "sourceId", None), self._unranked)
+        return rank, getattr(card, "priority", 0)
+
+    def rank(self, cards: Iterable[Card]) -> List[Card]:
+        """Return the accepted cards, best first."""
+        return sorted((c for c in cards if self.accepts(c)), key=self.sort_key)
+
+
+def rerank(groups: Iterable[List[Card]], settings: SearchSettings) -> List[List[Card]]:
+    """Re-apply ``settings`` to existing search results without any requests.
+
+    Use after changing source preferences or filters to get new best picks
+    instantly. Groups stay aligned with the input (a group may become empty).
+    Only cards already in the results can be returned, so loosening a filter
+    does not bring back candidates the original search excluded.
+    """
+    from .search import CardGroup
+
+    ranker = Ranker.for_settings(settings)
+    reranked = []
+    for group in groups:
+        remaining = getattr(group, "remaining_ids", ())
+        reranked.append(CardGroup(ranker.rank(group), remaining, ranker=ranker))
+    return reranked
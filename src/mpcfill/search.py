@@ -1,39 +1,383 @@
 from __future__ import annotations
 
+import os
 from collections import defaultdict
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from . import json_backend
+from .cache import LRUCache
 from .http.client import client
 from .models.card import Card
+from .ranking import Ranker
 from .search_settings import SearchSettings
-from .services.catalog import fetch_dfcs
+from .services.catalog import fetch_dfc_index, fetch_dfcs
 from .types import CardType
 from .utils import normalize_query
 
+if TYPE_CHECKING:
+    from .models.dfc import DFCIndex
+    from .store import MetadataStore
+
+# Queries per editorSearch request in iter_search_cards
+SEARCH_CHUNK_SIZE = 20
+
+# In-memory response caches; disabled unless enable_search_caches() is called.
+_search_cache: Optional[LRUCache] = None
+_metadata_cache: Optional[LRUCache] = None
+# Persistent metadata store; disabled unless enable_metadata_store() is called.
+_store: Optional[MetadataStore] = None
+_store_has_dfcs = False
+_STORE_BATCH = 500
+
+
+def enable_search_caches(
+    search_size: int = 1024,
+    search_ttl: float = 600.0,
+    metadata_size: int = 50_000,
+):
+    """Keep editorSearch responses and card metadata in memory.
+
+    Meant for long-running processes such as ``mpcfill serve``. Search
+    responses expire after ``search_ttl`` seconds so newly uploaded images
+    show up; card metadata is cached by identifier until evicted.
+    """
+    global _search_cache, _metadata_cache
+    _search_cache = LRUCache(maxsize=search_size, ttl=search_ttl)
+    _metadata_cache = LRUCache(maxsize=metadata_size)
+
+
+def enable_metadata_store(path: Optional[str] = None) -> MetadataStore:
+    """Record the metadata of every fetched card in a local SQLite store.
+
+    The store (``$MPCFILL_STORE`` or the cache directory by default) can
+    then answer ``search_cards(..., offline=True)`` without the service.
+    """
+    global _store, _store_has_dfcs
+    from .store import MetadataStore
+
+    _store = MetadataStore(path)
+    _store_has_dfcs = False
+    return _store
+
+
+if os.environ.get("MPCFILL_STORE"):
+    enable_metadata_store()
+
+
+def _offline_store(
+    store: Optional[str | os.PathLike | MetadataStore] = None,
+) -> MetadataStore:
+    from .store import MetadataStore
+
+    if isinstance(store, MetadataStore):
+        return store
+    if store is not None:
+        return MetadataStore(store)
+    if _store is not None:
+        return _store
+    return MetadataStore()
+
+
+def _dfc_index(
+    offline: bool = False,
+    store: Optional[str | os.PathLike | MetadataStore] = None,
+) -> DFCIndex:
+    """Return the DFC index, from the store when offline."""
+    if offline:
+        from .models.dfc import DFCIndex
+
+        return DFCIndex(_offline_store(store).dfc_pairs())
+    global _store_has_dfcs
+    index = fetch_dfc_index()
+    if _store is not None and not _store_has_dfcs:
+        _store.add_dfc_pairs(fetch_dfcs())
+        _store_has_dfcs = True
+    return index
+
+
+def _editor_search(payload: Dict) -> Dict:
+    """POST an editorSearch payload, going through the search cache if enabled."""
+    if _search_cache is None:
+        return client.post("/2/editorSearch/", data=payload)
+    key = json_backend.dumps(payload, sort_keys=True, default=str)
+    response = _search_cache.get(key)
+    if response is None:
+        response = client.post("/2/editorSearch/", data=payload)
+        _search_cache.set(key, response)
+    return response
+
+
+class CardGroup(list):
+    """Candidates for one query, sorted by priority (or by ``ranker``).
+
+    A plain ``list`` of :class:`Card` objects. When a search was limited with
+    ``top_k``, the identifiers that were returned by the search but not
+    fetched yet are kept in ``remaining_ids`` and can be loaded on demand
+    with :meth:`fetch_more`.
+    """
+
+    def __init__(
+        self,
+        cards: Iterable[Card] = (),
+        remaining_ids: Iterable[str] = (),
+        ranker: Optional[Ranker] = None,
+    ):
+        """Initialize with fetched cards, unfetched identifiers and the ranking."""
+        super().__init__(cards)
+        self.remaining_ids: List[str] = list(remaining_ids)
+        self.ranker = ranker
+
+    @property
+    def exhausted(self) -> bool:
+        """True when every candidate returned by the search has been fetched."""
+        return not self.remaining_ids
+
+    def fetch_more(self, n: Optional[int] = None) -> List[Card]:
+        """Fetch metadata for the next ``n`` candidates (all if None).
+
+        New cards are merged into the group, which is re-sorted by its
+        ranking. Returns the newly fetched cards.
+        """
+        take = self.remaining_ids if n is None else self.remaining_ids[:n]
+        self.remaining_ids = self.remaining_ids[len(take) :]
+        cards = get_card_metadata(take)
+        if self.ranker is not None:
+            cards = [card for card in cards if self.ranker.accepts(card)]
+            self.extend(cards)
+            self.sort(key=self.ranker.sort_key)
+        else:
+            self.extend(cards)
+            self.sort(key=_priority)
+        return cards
+
 
 def search_cards(
-    queries: List[Dict], search_settings: SearchSettings, fetch_backs: bool = True
+    queries: List[Dict],
+    search_settings: SearchSettings,
+    fetch_backs: bool = True,
+    top_k: Optional[int] = None,
+    offline: bool = False,
+    store: Optional[str | os.PathLike | MetadataStore] = None,
+    local_ranking: bool = False,
 ) -> List[List[Card]]:
     """Search for cards by query.
 
     Returns a list of Card objects.
+
+    With ``top_k``, metadata is only fetched for the first ``top_k``
+    candidates of each query in search order; the rest stay available
+    through :meth:`CardGroup.fetch_more`.
+
+    With ``offline``, results come from the local metadata store filtered by
+    ``search_settings``, and no search or metadata requests are made. The
+    store is ``store`` (a path or :class:`~mpcfill.store.MetadataStore`) if
+    given, else the one from :func:`enable_metadata_store` or the default.
+
+    Each group is sorted by card priority. With ``local_ranking``, groups
+    are ordered by :class:`~mpcfill.ranking.Ranker` instead: position of the
+    card's source in the settings' priority list, then card priority, as
+    the service orders its results.
     """
     if fetch_backs:
-        queries.extend(_get_card_backs(queries))
+        queries.extend(_get_card_backs(queries, offline=offline, store=store))
 
     for query in queries:
         query["query"] = normalize_query(query["query"])
 
-    payload = {**search_settings.to_dict(), "queries": queries}
-    response = client.post("/2/editorSearch/", data=payload)
-    ids = [
-        card_id
+    if offline:
+        ranker = Ranker.for_settings(search_settings)
+        cards = _offline_store(store).search(queries, ranker)
+        groups = _group_cards(cards, {}, ranker if local_ranking else None)
+        return [card_group for _, card_group in groups]
+
+    groups = _search_chunk(queries, search_settings.to_dict(), top_k, local_ranking)
+    return [card_group for _, card_group in groups]
+
+
+def iter_search_cards(
+    queries: List[Dict],
+    search_settings: SearchSettings,
+    fetch_backs: bool = True,
+    chunk_size: int = SEARCH_CHUNK_SIZE,
+    top_k: Optional[int] = None,
+    local_ranking: bool = False,
+) -> Iterator[Tuple[str, List[Card]]]:
+    """Search for cards, yielding ``(searchq, cards)`` groups as they are ready.
+
+    Queries are sent in chunks of ``chunk_size``; the groups of a chunk are
+    yielded as soon as its search and metadata requests complete, so callers
+    can start processing before the whole list is resolved. A DFC back face
+    is queued right after its front. ``queries`` is not modified.
+
+    Within a chunk, groups are ordered by ``searchq`` and cards by priority,
+    as in :func:`search_cards`. With fuzzy search, one ``searchq`` may be
+    yielded by more than one chunk. ``top_k`` and ``local_ranking`` behave
+    as in :func:`search_cards`.
+    """
+    expanded = _expand_queries(queries, fetch_backs)
+    settings_payload = search_settings.to_dict()
+    for start in range(0, len(expanded), chunk_size):
+        chunk = expanded[start : start + chunk_size]
+        yield from _search_chunk(chunk, settings_payload, top_k, local_ranking)
+
+
+def search_cards_multi(
+    queries: List[Dict],
+    profiles: List[SearchSettings],
+    fetch_backs: bool = True,
+    top_k: Optional[int] = None,
+    local_ranking: bool = False,
+) -> List[List[CardGroup]]:
+    """Search the same queries under several settings profiles at once.
+
+    One editorSearch is made per profile, but card metadata is fetched once
+    for the union of identifiers across all profiles. Returns one list of
+    groups per profile, in the order of ``profiles``; each is what
+    :func:`search_cards` would return for that profile. ``queries`` is not
+    modified.
+    """
+    expanded = _expand_queries(queries, fetch_backs)
+    searches = []
+    for settings in profiles:
+        settings_payload = settings.to_dict()
+        payload = {**settings_payload, "queries": expanded}
+        ids, tails = _result_ids(_editor_search(payload), top_k)
+        ranker = Ranker(settings_payload) if local_ranking else None
+        searches.append((ids, tails, ranker))
+
+    all_ids = dict.fromkeys(i for ids, _, _ in searches for i in ids)
+    cards = {card.identifier: card for card in iter_card_metadata(list(all_ids))}
+    return [
+        [
+            card_group
+            for _, card_group in _group_cards(
+                (cards[i] for i in dict.fromkeys(ids) if i in cards), tails, ranker
+            )
+        ]
+        for ids, tails, ranker in searches
+    ]
+
+
+def search_cards_per_query(
+    queries: List[Dict],
+    search_settings: SearchSettings,
+    chunk_size: int = SEARCH_CHUNK_SIZE,
+    top_k: Optional[int] = None,
+    local_ranking: bool = False,
+) -> List[CardGroup]:
+    """Search for cards, returning one group per query in the order of ``queries``.
+
+    Results are paired with their query through the keys of the editorSearch
+    response rather than the ``searchq`` of the returned cards, which can
+    differ from the query (e.g. with fuzzy search). A query without results
+    gets an empty group. DFC backs are not added and ``queries`` is not
+    modified. ``top_k`` and ``local_ranking`` behave as in
+    :func:`search_cards`.
+    """
+    settings_payload = search_settings.to_dict()
+    keys = [(normalize_query(q["query"]), CardType(q["cardType"])) for q in queries]
+    unique = list(dict.fromkeys(keys))
+    found: Dict[Tuple[str, CardType], List[str]] = {}
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start : start + chunk_size]
+        payload = {
+            **settings_payload,
+            "queries": [{"query": q, "cardType": t} for q, t in chunk],
+        }
+        results = _editor_search(payload).get("results", {})
+        for query, card_type in chunk:
+            card_ids = results.get(query, {}).get(card_type.value, [])
+            found[query, card_type] = list(dict.fromkeys(card_ids))
+
+    heads = {
+        key: card_ids if top_k is None else card_ids[:top_k]
+        for key, card_ids in found.items()
+    }
+    wanted = dict.fromkeys(i for ids in heads.values() for i in ids)
+    cards = {card.identifier: card for card in iter_card_metadata(list(wanted))}
+    ranker = Ranker(settings_payload) if local_ranking else None
+    sort_key = ranker.sort_key if ranker is not None else _priority
+    groups = {}
+    for key, ids in heads.items():
+        card_group = CardGroup(
+            (cards[i] for i in ids if i in cards), found[key][len(ids) :], ranker
+        )
+        card_group.sort(key=sort_key)
+        groups[key] = card_group
+    return [groups[key] for key in keys]
+
+
+def _expand_queries(queries: List[Dict], fetch_backs: bool) -> List[Dict]:
+    """Return normalized, deduplicated queries with DFC backs after fronts."""
+    expanded: List[Dict] = []
+    seen = set()
+    dfc_index = _dfc_index() if fetch_backs else None
+    for query in queries:
+        names = [query["query"]]
+        if dfc_index is not None:
+            back = dfc_index.back_of(query["query"])
+            if back is not None:
+                names.append(back)
+        for i, name in enumerate(names):
+            card_type = query["cardType"] if i == 0 else CardType.CARD
+            key = (normalize_query(name), card_type)
+            if key not in seen:
+                seen.add(key)
+                expanded.append({"query": key[0], "cardType": card_type})
+    return expanded
+
+
+def _search_chunk(
+    queries: List[Dict],
+    settings_payload: Dict,
+    top_k: Optional[int] = None,
+    local_ranking: bool = False,
+) -> List[Tuple[str, CardGroup]]:
+    """Run one editorSearch + metadata round trip and group the results.
+
+    With ``top_k``, only the head of each result list (in search order) is
+    fetched; each group remembers the tails of the result lists it came from.
+    """
+    payload = {**settings_payload, "queries": queries}
+    ids, tails = _result_ids(_editor_search(payload), top_k)
+    ranker = Ranker(settings_payload) if local_ranking else None
+    return _group_cards(iter_card_metadata(ids), tails, ranker)
+
+
+def _result_ids(
+    response: Dict, top_k: Optional[int]
+) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Return the identifiers to fetch from an editorSearch response.
+
+    Also returns, per fetched identifier, the unfetched tail of its result
+    list (empty unless ``top_k`` is set).
+    """
+    # The service may list an identifier twice; keep the first occurrence.
+    id_lists = [
+        list(dict.fromkeys(card_ids))
         for types in response.get("results", {}).values()
         for card_ids in types.values()
-        for card_id in card_ids
     ]
-    cards = get_card_metadata(ids)
+    tails: Dict[str, List[str]] = {}
+    if top_k is not None:
+        for card_ids in id_lists:
+            for card_id in card_ids[:top_k]:
+                tails.setdefault(card_id, []).extend(card_ids[top_k:])
+        ids = list(tails)
+    else:
+        ids = [card_id for card_ids in id_lists for card_id in card_ids]
+    return ids, tails
+
+
+def _group_cards(
+    cards: Iterable[Card],
+    tails: Dict[str, List[str]],
+    ranker: Optional[Ranker] = None,
+) -> List[Tuple[str, CardGroup]]:
+    """Group cards by (type, searchq); groups by searchq, cards by priority.
 
+    With ``ranker``, cards within a group are ordered by its sort key instead.
+    """
     cards_by_type = {
         CardType.CARD: defaultdict(list),
         CardType.TOKEN: defaultdict(list),
@@ -42,42 +386,97 @@ def search_cards(
         cards_by_type[card.cardType][card.searchq].append(card)
 
     card_groups = [
-        card_list
+        CardGroup(card_list, _remaining_ids(card_list, tails), ranker)
         for searchqs in cards_by_type.values()
         for searchq, card_list in searchqs.items()
     ]
+    sort_key = ranker.sort_key if ranker is not None else _priority
     for card_group in card_groups:
-        card_group.sort(key=lambda card: card.priority)
+        card_group.sort(key=sort_key)
 
     card_groups.sort(key=lambda card_group: card_group[0].searchq)
-    return card_groups
+    return [(card_group[0].searchq, card_group) for card_group in card_groups]
+
+
+def _priority(card: Card):
+    return card.priority
+
+
+def _remaining_ids(cards: List[Card], tails: Dict[str, List[str]]) -> List[str]:
+    """Return unfetched identifiers from the result lists behind ``cards``."""
+    if not tails:
+        return []
+    fetched = {card.identifier for card in cards}
+    remaining: Dict[str, None] = {}
+    for card in cards:
+        for card_id in tails.get(card.identifier, ()):
+            if card_id not in fetched:
+                remaining[card_id] = None
+    return list(remaining)
 
 
 def _get_card_backs(
-    queries: List[Dict], fetch_backs: bool = True
+    queries: List[Dict],
+    fetch_backs: bool = True,
+    offline: bool = False,
+    store: Optional[str | os.PathLike | MetadataStore] = None,
 ) -> List[Dict[str, str]]:
-    """Generate additional queries for dual-faced card backs."""
-    names = set(q["query"] for q in queries)
-    dfc_name_map = fetch_dfcs()
-    new_queries = []
-    for front_name in names:
-        back_name = dfc_name_map.get(front_name)
-        if back_name is None:
-            continue
-        new_queries.append({"query": back_name, "cardType": CardType.CARD})
-    return new_queries
+    """Generate additional queries for dual-faced card backs.
+
+    Names are matched on their normalized form, so input casing and
+    punctuation do not affect which backs are found.
+    """
+    backs = _dfc_index(offline, store).expand(q["query"] for q in queries)
+    return [{"query": back, "cardType": CardType.CARD} for back in backs]
 
 
 def get_card_metadata(card_ids: List[str]) -> List[Card]:
     """Fetch full metadata for a list of card identifiers."""
+    return list(iter_card_metadata(card_ids))
+
+
+def iter_card_metadata(card_ids: List[str]) -> Iterator[Card]:
+    """Yield a :class:`Card` per identifier as the metadata response streams in.
+
+    The ``/2/cards/`` body is parsed incrementally, so only one card's raw
+    data is held at a time regardless of how many identifiers are requested.
+    """
     if not card_ids:
-        return []
+        return
+
+    if _metadata_cache is not None:
+        yield from _iter_card_metadata_cached(card_ids)
+        return
+
+    for _, data in _fetch_metadata(card_ids):
+        yield Card(data)
+
 
+def _fetch_metadata(card_ids: List[str]) -> Iterator[Tuple[str, Dict]]:
+    """Stream ``(identifier, raw data)`` from ``/2/cards/``, feeding the store."""
     payload = {"cardIdentifiers": card_ids}
-    response = client.post("/2/cards/", data=payload)
+    items = client.stream_post("/2/cards/", ("results",), data=payload)
+    if _store is None:
+        yield from items
+        return
+    batch = []
+    for card_id, data in items:
+        batch.append(data)
+        if len(batch) >= _STORE_BATCH:
+            _store.add_cards(batch)
+            batch = []
+        yield card_id, data
+    _store.add_cards(batch)
 
-    cards: List[Card] = []
-    for card_id, data in response.get("results", {}).items():
-        cards.append(Card(data))
 
-    return cards
+def _iter_card_metadata_cached(card_ids: List[str]) -> Iterator[Card]:
+    """Serve metadata from the in-memory cache, fetching only the misses."""
+    found = {cid: _metadata_cache.get(cid) for cid in card_ids}
+    missing = [cid for cid, data in found.items() if data is None]
+    if missing:
+        for card_id, data in _fetch_metadata(missing):
+            _metadata_cache.set(card_id, data)
+            found[card_id] = data
+    for data in found.values():
+        if data is not None:
+            yield Card(data)
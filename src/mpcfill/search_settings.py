@@ -17,6 +17,9 @@ class SearchSettings:
     - search type settings (fuzzy search, filter cardbacks)
     - source settings (enabled/disabled, priority)
     - filter settings (DPI, size, languages, tags)
+
+    Source data comes from a process-wide shared ``SourceCollection``, so
+    constructing settings per request is cheap.
     """
 
     def __init__(
@@ -89,6 +92,39 @@ class SearchSettings:
         """Move a source to a specific index priority."""
         self.source_filter.set_priority(key, index)
 
+    def set_source_priority_order(self, keys: List[int | str]):
+        """Put the given sources first, in order; the rest keep their order."""
+        self.source_filter.set_priority_order(keys)
+
+    def copy(self) -> "SearchSettings":
+        """Return an independent copy; source state is shared until changed."""
+        clone = SearchSettings.__new__(SearchSettings)
+        clone.__dict__.update(self.__dict__)
+        clone.source_filter = self.source_filter.copy()
+        clone.languages = list(self.languages)
+        clone.includes_tags = list(self.includes_tags)
+        clone.excludes_tags = list(self.excludes_tags)
+        return clone
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "SearchSettings":
+        """Rebuild settings from a :meth:`to_dict` payload (e.g. a stored one)."""
+        data = payload["searchSettings"]
+        search_type = data["searchTypeSettings"]
+        filters = data["filterSettings"]
+        settings = cls(
+            fuzzy_search=search_type["fuzzySearch"],
+            filter_cardbacks=search_type["filterCardbacks"],
+            minimum_dpi=filters["minimumDPI"],
+            maximum_dpi=filters["maximumDPI"],
+            maximum_size=filters["maximumSize"],
+            languages=list(filters["languages"]),
+            includes_tags=list(filters["includesTags"]),
+            excludes_tags=list(filters["excludesTags"]),
+        )
+        settings.source_filter.apply_api_format(data["sourceSettings"]["sources"])
+        return settings
+
     def to_dict(self) -> Dict[str, Any]:
         """Build the ``searchSettings`` JSON payload for a search."""
         search_settings = {
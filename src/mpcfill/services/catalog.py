@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
 
 from ..http.client import client
 
+if TYPE_CHECKING:
+    from ..models.dfc import DFCIndex
+
 __all__ = [
     "fetch_sources",
     "fetch_languages",
     "fetch_tags",
     "fetch_dfcs",
+    "fetch_dfc_index",
+    "iter_dfc_pairs",
 ]
 
 
@@ -34,4 +39,20 @@ def fetch_tags() -> List[Dict]:
 @lru_cache(maxsize=1)
 def fetch_dfcs() -> Dict[str, str]:
     """Fetch and cache Dual-Faced Card pairs (front → back)."""
-    return client.get("/2/DFCPairs")["dfcPairs"]
+    return dict(iter_dfc_pairs())
+
+
+def iter_dfc_pairs() -> Iterator[Tuple[str, str]]:
+    """Stream ``(front, back)`` Dual-Faced Card pairs without caching.
+
+    The response is parsed incrementally instead of being loaded whole.
+    """
+    return client.stream_get("/2/DFCPairs", ("dfcPairs",))
+
+
+@lru_cache(maxsize=1)
+def fetch_dfc_index() -> DFCIndex:
+    """Build and cache the normalized, bidirectional DFC index."""
+    from ..models.dfc import DFCIndex
+
+    return DFCIndex(fetch_dfcs())
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from . import json_backend
+from .cache import cache_dir
+from .models.card import Card
+from .ranking import Ranker
+
+STORE_ENV = "MPCFILL_STORE"
+STORE_VERSION = 1
+# SQLite's host-parameter limit before 3.32; used when it cannot be queried.
+_DEFAULT_MAX_PARAMS = 999
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    identifier TEXT PRIMARY KEY,
+    card_type TEXT NOT NULL,
+    searchq TEXT NOT NULL,
+    name TEXT,
+    source_id INTEGER,
+    dpi INTEGER,
+    size INTEGER,
+    language TEXT,
+    priority INTEGER,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cards_searchq ON cards (searchq, card_type);
+CREATE INDEX IF NOT EXISTS cards_source ON cards (source_id);
+CREATE INDEX IF NOT EXISTS cards_dpi ON cards (dpi);
+CREATE INDEX IF NOT EXISTS cards_size ON cards (size);
+CREATE INDEX IF NOT EXISTS cards_language ON cards (language);
+CREATE TABLE IF NOT EXISTS card_tags (
+    identifier TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (identifier, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS card_tags_tag ON card_tags (tag, identifier);
+CREATE TABLE IF NOT EXISTS dfc_pairs (
+    front TEXT PRIMARY KEY,
+    back TEXT NOT NULL
+);
+"""
+
+
+def default_store_path() -> Path:
+    """Return the store location: ``$MPCFILL_STORE`` or the cache directory.
+
+    ``MPCFILL_STORE`` may be a file path, or ``1`` for the default location.
+    """
+    override = os.environ.get(STORE_ENV)
+    if override and override != "1":
+        return Path(override).expanduser()
+    return cache_dir() / "metadata.sqlite3"
+
+
+class MetadataStore:
+    """Persistent, indexed store of card metadata for offline queries.
+
+    Every card seen in a ``/2/cards/`` response can be recorded here (see
+    :func:`mpcfill.search.enable_metadata_store`). Columns used by search
+    filters (normalized name, source, DPI, size, language) are indexed, and
+    tags live in their own indexed table. The full raw record is kept so
+    that stored cards come back as ordinary :class:`Card` objects.
+
+    Safe to share between threads: each thread gets its own connection.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        """Open (creating if needed) the store at ``path``."""
+        self.path = Path(path) if path else default_store_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, STORE_VERSION):
+            raise ValueError(f"Unsupported store version {version} in {self.path}")
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_cards(self, records: Iterable[Dict]) -> int:
+        """Insert or refresh raw card records; return how many were written."""
+        now = time.time()
+        rows = []
+        tags = []
+        for data in records:
+            identifier = data["identifier"]
+            rows.append(
+                (
+                    identifier,
+                    data.get("cardType", "CARD"),
+                    data.get("searchq", ""),
+                    data.get("name"),
+                    data.get("sourceId"),
+                    data.get("dpi"),
+                    data.get("size"),
+                    data.get("language"),
+                    data.get("priority"),
+                    json_backend.dumps_str(data),
+                    now,
+                )
+            )
+            tags.extend((identifier, tag) for tag in data.get("tags") or ())
+        if not rows:
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "DELETE FROM card_tags WHERE identifier = ?", [(r[0],) for r in rows]
+            )
+            conn.executemany("INSERT OR IGNORE INTO card_tags VALUES (?, ?)", tags)
+        return len(rows)
+
+    def add_dfc_pairs(self, pairs: Dict[str, str]):
+        """Record the Dual-Faced Card catalog (front → back)."""
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dfc_pairs VALUES (?, ?)", pairs.items()
+            )
+
+    def dfc_pairs(self) -> Dict[str, str]:
+        """Return the stored Dual-Faced Card pairs (front → back)."""
+        return dict(self._conn().execute("SELECT front, back FROM dfc_pairs"))
+
+    def __len__(self) -> int:
+        """Return the number of stored cards."""
+        return self._conn().execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def search(self, queries: List[Dict], ranker: Ranker) -> List[Card]:
+        """Return stored cards matching ``queries`` under ``ranker``'s settings.
+
+        Applies the same filters as the service: enabled sources, DPI range,
+        maximum size, languages, and included/excluded tags (parent tags
+        cover their descendants). With fuzzy search, a query matches any
+        name containing it. Queries must already be normalized. Cards come
+        back in the ranker's order. As in :meth:`Ranker.accepts`, cards
+        without a recorded DPI or size are not filtered on it.
+
+        Queries are matched in batches that keep each statement under
+        SQLite's limit on bound parameters.
+        """
+        where = [
+            "(dpi IS NULL OR dpi BETWEEN ? AND ?)",
+            "(size IS NULL OR size <= ?)",
+        ]
+        params: list = [ranker.minimum_dpi, ranker.maximum_dpi, ranker.maximum_bytes]
+        disabled = list(ranker.disabled_sources)
+        if disabled:
+            # Cards from unknown sources pass, as in Ranker.accepts.
+            where.append(
+                f"(source_id IS NULL OR source_id NOT IN ({_marks(disabled)}))"
+            )
+            params.extend(disabled)
+        if ranker.languages:
+            where.append(f"language IN ({_marks(ranker.languages)})")
+            params.extend(ranker.languages)
+        for clause, tags in zip(("EXISTS", "NOT EXISTS"), ranker.tag_filters()):
+            if tags:
+                where.append(
+                    f"{clause} (SELECT 1 FROM card_tags t WHERE t.identifier ="
+                    f" cards.identifier AND t.tag IN ({_marks(tags)}))"
+                )
+                params.extend(tags)
+
+        if ranker.fuzzy_search:
+            match = "(card_type = ? AND searchq LIKE ? ESCAPE '\\')"
+        else:
+            match = "(card_type = ? AND searchq = ?)"
+        terms = []
+        for query in queries:
+            card_type = getattr(query["cardType"], "value", query["cardType"])
+            if ranker.fuzzy_search:
+                terms.append((card_type, f"%{_escape_like(query['query'])}%"))
+            else:
+                terms.append((card_type, query["query"]))
+
+        conn = self._conn()
+        batch = max(1, (_max_params(conn) - len(params)) // 2)
+        found: Dict[str, Card] = {}
+        for start in range(0, len(terms), batch):
+            chunk = terms[start : start + batch]
+            matches = " OR ".join([match] * len(chunk))
+            sql = (
+                f"SELECT identifier, data FROM cards"
+                f" WHERE {' AND '.join(where)} AND ({matches})"
+            )
+            chunk_params = params + [value for term in chunk for value in term]
+            for identifier, data in conn.execute(sql, chunk_params):
+                if identifier not in found:
+                    found[identifier] = Card(json_backend.loads(data))
+        return sorted(found.values(), key=ranker.sort_key)
+
+
+def _marks(values) -> str:
+    return ", ".join("?" * len(values))
+
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards so that ``text`` matches literally."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _max_params(conn: sqlite3.Connection) -> int:
+    """Return the maximum number of bound parameters per statement."""
+    getlimit = getattr(conn, "getlimit", None)  # Python 3.11+
+    if getlimit is None:
+        return _DEFAULT_MAX_PARAMS
+    return getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
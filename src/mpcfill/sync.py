@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import json_backend
+from .cache import write_atomic
+from .concurrency import (
+    DEFAULT_MAX_THREADS,
+    AdaptiveExecutor,
+    ConcurrencyStats,
+    make_executor,
+)
+from .layout import materialize
+from .models.card import Card
+from .search import search_cards
+from .search_settings import SearchSettings
+from .utils import make_safe_path
+
+INDEX_FILENAME = ".mpcfill-index.json"
+INDEX_VERSION = 1
+_HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class SyncReport:
+    """Outcome of a folder sync, grouped by what happened to each file."""
+
+    downloaded: List[Path] = field(default_factory=list)
+    reused: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    deleted: List[Path] = field(default_factory=list)
+    # Stale files left in place because they changed since they were synced
+    kept: List[Path] = field(default_factory=list)
+    # File name -> error of each download that failed
+    failed: Dict[str, str] = field(default_factory=dict)
+    concurrency: Optional[ConcurrencyStats] = None
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        text = (
+            f"downloaded {len(self.downloaded)}, reused {len(self.reused)}, "
+            f"unchanged {len(self.unchanged)}, deleted {len(self.deleted)}"
+        )
+        if self.kept:
+            text += f", kept {len(self.kept)} modified"
+        if self.failed:
+            text += f", {len(self.failed)} failed"
+        if self.concurrency is not None:
+            text += f"; {self.concurrency.summary()}"
+        return text
+
+
+def file_sha256(path: Path) -> str:
+    """Return the hex SHA-256 digest of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_index(dest: Path) -> Dict[str, Dict]:
+    """Load the sidecar index of ``dest`` (filename → identifier/size/sha256)."""
+    path = dest / INDEX_FILENAME
+    try:
+        data = json_backend.loads(path.read_bytes())
+    except (FileNotFoundError, *json_backend.DecodeError):
+        return {}
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_index(dest: Path, files: Dict[str, Dict]):
+    """Atomically write the sidecar index of ``dest``."""
+    payload = {"version": INDEX_VERSION, "files": files}
+    write_atomic(
+        dest / INDEX_FILENAME,
+        json_backend.dumps(payload, indent=True, sort_keys=True),
+    )
+
+
+def _verify_entries(
+    dest: Path, index: Dict[str, Dict], workers: Optional[int]
+) -> Dict[str, Dict]:
+    """Return the index entries whose files still match their size and hash.
+
+    The size check is a cheap ``stat``; only size matches are hashed, in
+    parallel (``hashlib`` releases the GIL on large buffers).
+    """
+    candidates = {}
+    for fname, entry in index.items():
+        try:
+            if (dest / fname).stat().st_size == entry.get("size"):
+                candidates[fname] = entry
+        except FileNotFoundError:
+            continue
+
+    names = list(candidates)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        digests = ex.map(file_sha256, [dest / n for n in names])
+        return {
+            n: candidates[n]
+            for n, digest in zip(names, digests)
+            if digest == candidates[n].get("sha256")
+        }
+
+
+def _entry_for(path: Path, card: Card) -> Dict:
+    return {
+        "identifier": card.identifier,
+        "size": path.stat().st_size,
+        "sha256": file_sha256(path),
+    }
+
+
+def sync_folder(
+    queries: List[Dict],
+    dest: str | Path,
+    settings: SearchSettings,
+    fetch_backs: bool = True,
+    filename_format: str = "{index}_{name}.{ext}",
+    delete_stale: bool = False,
+    threads: int | str = 1,
+    hash_workers: Optional[int] = None,
+    top_k: Optional[int] = None,
+    max_threads: int = DEFAULT_MAX_THREADS,
+) -> SyncReport:
+    """Bring ``dest`` in line with the best results for ``queries``.
+
+    A sidecar index (``.mpcfill-index.json``) records the identifier, size
+    and SHA-256 of every file written by a previous sync. Files whose
+    identifier is unchanged and whose content still verifies are left alone;
+    files whose card is present elsewhere in the folder are relinked instead
+    of downloaded; only new or changed cards hit the network.
+
+    Files that are no longer wanted are deleted when ``delete_stale`` is set.
+    Files not recorded in the index are never deleted, and neither are
+    files whose content no longer matches it (e.g. edited by hand); those
+    are listed in ``report.kept``.
+
+    A failed download is recorded in ``report.failed`` and does not stop
+    the others; the index is written either way, so the next sync only
+    retries what failed.
+
+    ``threads="auto"`` adapts the number of parallel downloads (up to
+    ``max_threads``) to the server's responses; the settled value is
+    recorded in ``report.concurrency``.
+
+    Supports placeholders in ``filename_format``:
+    ``{index}``, ``{name}``, ``{ext}``, ``{id}``.
+    """
+    dest_path = Path(dest)
+    dest_path.mkdir(parents=True, exist_ok=True)
+
+    groups = search_cards(queries, settings, fetch_backs=fetch_backs, top_k=top_k)
+    wanted: Dict[str, Card] = {}
+    for i, g in enumerate(groups):
+        if not g:
+            continue
+        card = g[0]
+        fname = filename_format.format(
+            index=i,
+            name=make_safe_path(card.name),
+            ext=card.extension,
+            id=card.identifier,
+        )
+        wanted[fname] = card
+
+    index = load_index(dest_path)
+    valid = _verify_entries(dest_path, index, hash_workers)
+    by_identifier = {entry["identifier"]: fname for fname, entry in valid.items()}
+
+    report = SyncReport()
+    new_index: Dict[str, Dict] = {}
+    to_reuse: Dict[str, str] = {}
+    to_download: Dict[str, Card] = {}
+    for fname, card in wanted.items():
+        entry = valid.get(fname)
+        if entry and entry["identifier"] == card.identifier:
+            new_index[fname] = entry
+            report.unchanged.append(dest_path / fname)
+        elif card.identifier in by_identifier:
+            to_reuse[fname] = by_identifier[card.identifier]
+        else:
+            to_download[fname] = card
+
+    # Stage reuse sources as temporary links first, so renames that shuffle
+    # names between cards never read a file that was already replaced.
+    staged = {}
+    for n, (fname, src) in enumerate(to_reuse.items()):
+        tmp = dest_path / f".mpcfill-stage-{os.getpid()}-{n}"
+        _place(dest_path / src, tmp)
+        staged[fname] = tmp
+    for fname, tmp in staged.items():
+        target = dest_path / fname
+        target.unlink(missing_ok=True)
+        os.replace(tmp, target)
+        new_index[fname] = dict(valid[to_reuse[fname]])
+        report.reused.append(target)
+
+    def _download_one(fname: str, card: Card) -> Path:
+        target = dest_path / fname
+        # Never write through an existing name: it may share an inode with
+        # another file in the folder.
+        target.unlink(missing_ok=True)
+        path = card.download_image(dest_path, filename=fname)
+        new_index[fname] = _entry_for(path, card)
+        return path
+
+    with make_executor(threads, max_threads) as ex:
+        futures = {ex.submit(_download_one, f, c): f for f, c in to_download.items()}
+        for future, fname in futures.items():
+            error = future.exception()
+            if error is None:
+                report.downloaded.append(future.result())
+            else:
+                report.failed[fname] = str(error)
+    if isinstance(ex, AdaptiveExecutor):
+        report.concurrency = ex.stats()
+
+    for fname, entry in index.items():
+        if fname in wanted:
+            continue
+        stale = dest_path / fname
+        if delete_stale:
+            if fname in valid:
+                stale.unlink()
+                report.deleted.append(stale)
+            elif stale.exists():
+                report.kept.append(stale)
+        elif fname in valid:
+            new_index[fname] = entry
+
+    save_index(dest_path, new_index)
+    return report
+
+
+def _place(src: Path, dest: Path):
+    """Reflink or hardlink ``src`` to ``dest``, copying when neither works."""
+    dest.unlink(missing_ok=True)
+    materialize(src, dest, modes=("reflink", "hardlink", "copy"))
@@ -58,3 +58,15 @@ def normalize_query(query_str: str) -> str:
     s = re.sub(r"\d+", "", s)
     s = re.sub(r"\s+", " ", s).strip()
     return s
+
+
+def format_bytes(n: int) -> str:
+    """Return a byte count in human-readable binary units (e.g. ``3.2 MiB``)."""
+    if n < 1024:
+        return f"{n} B"
+    value = n / 1024
+    for unit in ("KiB", "MiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .concurrency import DEFAULT_MAX_THREADS, MAX_RETRY_DELAY, make_executor
+from .deck import item_query, read_decklist
+from .exceptions import MPCFillError
+from .layout import DEFAULT_LINK_MODES, OutputLayout
+from .models.card import Card
+from .search import search_cards_per_query
+from .search_settings import SearchSettings
+from .services.catalog import fetch_dfc_index
+from .types import CardType
+
+# Indexes shift whenever a line is inserted, so they are left out by default.
+DEFAULT_WATCH_FILENAME_FORMAT = "{name}.{ext}"
+
+
+@dataclass
+class WatchUpdate:
+    """What one :meth:`DeckWatcher.update` changed."""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    written: List[Path] = field(default_factory=list)
+    deleted: List[Path] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        return (
+            f"+{len(self.added)} -{len(self.removed)} lines: "
+            f"wrote {len(self.written)}, deleted {len(self.deleted)}, "
+            f"{len(self.missing)} not found, {len(self.failed)} failed"
+        )
+
+
+class DeckWatcher:
+    """Keep ``dest`` in line with a decklist file as it is edited.
+
+    Each :meth:`update` diffs the parsed list against the previous one and
+    only searches and downloads the items that were added (a changed line
+    is a removed item plus an added one); outputs of removed items are
+    deleted. Quantities and letter case do not count as changes. The state
+    lives in memory, so the work per update scales with the edit, not with
+    the deck. Files in ``dest`` that the watcher did not write are never
+    touched.
+
+    Items with no results are remembered and not searched again until their
+    line changes. Items whose download failed, and whole updates that
+    failed, are retried by :meth:`watch` on later polls even if the file
+    does not change, backing off up to ``MAX_RETRY_DELAY`` seconds while
+    they keep failing.
+    """
+
+    def __init__(
+        self,
+        deck: str | Path,
+        dest: str | Path,
+        settings: SearchSettings,
+        fetch_backs: bool = True,
+        filename_format: str = DEFAULT_WATCH_FILENAME_FORMAT,
+        modes: Sequence[str] = DEFAULT_LINK_MODES,
+        threads: int | str = 1,
+        max_threads: int = DEFAULT_MAX_THREADS,
+    ):
+        """Initialize; nothing is read or fetched until :meth:`update`."""
+        self.deck = Path(deck)
+        self.settings = settings
+        self.fetch_backs = fetch_backs
+        self.layout = OutputLayout(dest, filename_format, modes=modes)
+        self.threads = threads
+        self.max_threads = max_threads
+        # item key (lower case) -> output paths written for it
+        self.outputs: Dict[str, List[Path]] = {}
+        self._refs: Counter = Counter()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._retry_at: Optional[float] = None
+        self._retry_delay = 0.0
+
+    def changed(self) -> bool:
+        """Return True if the decklist file changed since the last update."""
+        try:
+            st = self.deck.stat()
+        except FileNotFoundError:
+            return False
+        return (st.st_mtime_ns, st.st_size) != self._signature
+
+    def _retry_due(self) -> bool:
+        return self._retry_at is not None and time.monotonic() >= self._retry_at
+
+    def _schedule_retry(self, interval: float):
+        self._retry_delay = min(max(interval, self._retry_delay * 2), MAX_RETRY_DELAY)
+        self._retry_at = time.monotonic() + self._retry_delay
+
+    def update(self) -> WatchUpdate:
+        """Re-read the decklist and apply the lines that changed."""
+        st = self.deck.stat()
+        self._signature = (st.st_mtime_ns, st.st_size)
+        items = read_decklist(self.deck)
+        current = {item.lower(): item for item in items}
+        positions = {key: i for i, key in enumerate(current)}
+        report = WatchUpdate(
+            added=[item for key, item in current.items() if key not in self.outputs],
+            removed=[key for key in self.outputs if key not in current],
+        )
+        if report.added:
+            self._add(report.added, positions, report)
+        # Removals last: an edited line whose card keeps its file name must
+        # not lose the file in between.
+        for key in report.removed:
+            for path in self.outputs.pop(key):
+                self._refs[path] -= 1
+                if self._refs[path] <= 0:
+                    del self._refs[path]
+                    if path.is_symlink() or path.exists():
+                        path.unlink()
+                        report.deleted.append(path)
+        return report
+
+    def _resolve(self, items: List[str]) -> Dict[str, List[Card]]:
+        """Return the best card (and DFC back) per item, searched in one pass."""
+        dfc_index = fetch_dfc_index() if self.fetch_backs else None
+        queries: List[Dict] = []
+        owners: List[str] = []
+        for item in items:
+            query = item_query(item)
+            queries.append(query)
+            owners.append(item)
+            back = dfc_index.back_of(query["query"]) if dfc_index else None
+            if back is not None:
+                queries.append({"query": back, "cardType": CardType.CARD})
+                owners.append(item)
+
+        resolved: Dict[str, List[Card]] = {item: [] for item in items}
+        groups = search_cards_per_query(queries, self.settings)
+        for item, group in zip(owners, groups):
+            if group:
+                resolved[item].append(group[0])
+        return resolved
+
+    def _add(self, items: List[str], positions: Dict[str, int], report: WatchUpdate):
+        resolved = self._resolve(items)
+        jobs = []
+        for item, cards in resolved.items():
+            if not cards:
+                report.missing.append(item)
+                self.outputs[item.lower()] = []
+                continue
+            jobs.append((item, cards))
+
+        self.layout.dest.mkdir(parents=True, exist_ok=True)
+        lock = threading.Lock()
+
+        def place(item: str, cards: List[Card]):
+            index = positions[item.lower()]
+            paths: List[Path] = []
+            try:
+                for card in cards:
+                    paths.append(self.layout.place(card, index))
+            except Exception:
+                # Retried as a whole next time; drop what is not shared.
+                with lock:
+                    for path in paths:
+                        if not self._refs[path]:
+                            path.unlink(missing_ok=True)
+                raise
+            with lock:
+                self.outputs[item.lower()] = paths
+                self._refs.update(paths)
+                report.written.extend(paths)
+
+        with make_executor(self.threads, self.max_threads) as ex:
+            futures = {ex.submit(place, item, cards): item for item, cards in jobs}
+            for future, item in futures.items():
+                error = future.exception()
+                if error is not None:
+                    report.failed[item] = str(error)
+
+    def watch(
+        self,
+        interval: float = 1.0,
+        on_update: Optional[Callable[[WatchUpdate], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        stop: Optional[threading.Event] = None,
+    ):
+        """Poll the decklist every ``interval`` seconds and apply each change.
+
+        ``on_update`` receives every :class:`WatchUpdate`. If an update
+        raises (e.g. the service is unreachable or throttling), ``on_error``
+        gets the exception. Failed updates and failed downloads are retried
+        on a later poll. Runs until ``stop`` is set.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if self.changed() or self._retry_due():
+                try:
+                    update = self.update()
+                except (OSError, MPCFillError, RuntimeError, ValueError) as exc:
+                    if on_error is None:
+                        raise
+                    self._schedule_retry(interval)
+                    on_error(exc)
+                else:
+                    if update.failed:
+                        self._schedule_retry(interval)
+                    else:
+                        self._retry_at, self._retry_delay = None, 0.0
+                    if on_update is not None:
+                        on_update(update)
+            stop.wait(interval)
+
+
+__all__ = ["DEFAULT_WATCH_FILENAME_FORMAT", "DeckWatcher", "WatchUpdate"]
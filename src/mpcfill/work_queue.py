@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from . import json_backend
+from .concurrency import (
+    DEFAULT_MAX_THREADS,
+    AdaptiveExecutor,
+    ConcurrencyStats,
+    make_executor,
+)
+from .search import SEARCH_CHUNK_SIZE, search_cards_per_query
+from .search_settings import SearchSettings
+from .types import CardType
+from .utils import make_safe_path, normalize_query
+
+QUEUE_VERSION = 1
+DEFAULT_LEASE = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    card_type TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    identifier TEXT,
+    path TEXT,
+    error TEXT,
+    updated REAL,
+    UNIQUE (query, card_type)
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (state, lease_expires, position);
+"""
+
+STATES = ("pending", "leased", "done", "failed")
+
+
+@dataclass
+class Task:
+    """One queued query, as claimed by a worker."""
+
+    id: int
+    position: int
+    query: str
+    card_type: str
+    attempts: int
+
+
+@dataclass
+class WorkReport:
+    """What one worker run did."""
+
+    done: List[Path] = field(default_factory=list)
+    retried: int = 0
+    failed: int = 0
+    concurrency: Optional[ConcurrencyStats] = None
+
+    def summary(self) -> str:
+        """Return a one-line human-readable summary."""
+        text = (
+            f"downloaded {len(self.done)}, retried {self.retried}, failed {self.failed}"
+        )
+        if self.concurrency is not None:
+            text += f"; {self.concurrency.summary()}"
+        return text
+
+
+def default_worker_id() -> str:
+    """Return ``host:pid``, unique across the processes sharing a queue."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """SQLite-backed queue of search-and-download tasks.
+
+    One file holds the job: destination folder, search settings and one row
+    per query. Any number of worker processes, on this machine or on others
+    that see the same file, claim tasks in batches under a time-limited
+    lease, so a crashed worker's tasks are picked up again once its lease
+    runs out. Failed tasks are retried up to ``max_attempts`` times.
+
+    The file uses SQLite's default rollback journal (not WAL) so that it
+    also works on shared filesystems with working POSIX locks; with many
+    hosts, a per-node queue is the safer choice.
+    """
+
+    def __init__(self, path: str | Path):
+        """Open an existing queue file."""
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Queue not found: {self.path}")
+        self._conn = self._connect(self.path)
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        if int(meta.get("version", 0)) != QUEUE_VERSION:
+            raise ValueError(f"Unsupported queue version in {self.path}")
+        self.dest = Path(meta["dest"])
+        self.max_attempts = int(meta["max_attempts"])
+        self.filename_format = meta["filename_format"]
+        self._settings_payload = json_backend.loads(meta["settings"])
+
+    @staticmethod
+    def _connect(path: Path) -> sqlite3.Connection:
+        # Autocommit mode; transactions are opened explicitly where needed.
+        conn = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 60000")
+        return conn
+
+    @classmethod
+    def create(
+        cls,
+        path: str | Path,
+        dest: str | Path,
+        settings: SearchSettings,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        filename_format: str = "{index}_{name}.{ext}",
+    ) -> "WorkQueue":
+        """Create a queue file for downloading into ``dest`` with ``settings``.
+
+        Supports placeholders in ``filename_format``:
+        ``{index}``, ``{name}``, ``{ext}``, ``{id}``.
+        """
+        path = Path(path)
+        if path.exists():
+            raise FileExistsError(f"Queue already exists: {path}")
+        meta = {
+            "version": str(QUEUE_VERSION),
+            "dest": str(Path(dest).resolve()),
+            "max_attempts": str(max_attempts),
+            "filename_format": filename_format,
+            "settings": json_backend.dumps_str(settings.to_dict(), default=str),
+        }
+        conn = cls._connect(path)
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        conn.close()
+        return cls(path)
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        """Return self for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the queue on exit."""
+        self.close()
+
+    def settings(self) -> SearchSettings:
+        """Return the job's search settings."""
+        return SearchSettings.from_dict(self._settings_payload)
+
+    def add(self, queries: List[Dict], fetch_backs: bool = True) -> int:
+        """Queue queries (``{"query", "cardType"}`` dicts); return how many were new.
+
+        Queries are normalized, DFC backs are added as their own tasks when
+        ``fetch_backs`` is set, and queries already in the queue are skipped.
+        """
+        rows = []
+        dfc_index = None
+        if fetch_backs:
+            from .services.catalog import fetch_dfc_index
+
+            dfc_index = fetch_dfc_index()
+        for query in queries:
+            rows.append((normalize_query(query["query"]), CardType(query["cardType"])))
+            back = dfc_index.back_of(query["query"]) if dfc_index else None
+            if back is not None:
+                rows.append((normalize_query(back), CardType.CARD))
+
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (start,) = conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM tasks"
+            ).fetchone()
+            before = conn.total_changes
+            for query, card_type in rows:
+                conn.execute(
+                    "INSERT OR IGNORE INTO tasks (position, query, card_type, updated)"
+                    " VALUES (?, ?, ?, ?)",
+                    (start + conn.total_changes - before, query, card_type.value, now),
+                )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(
+        self, worker: str, limit: int = SEARCH_CHUNK_SIZE, lease: float = DEFAULT_LEASE
+    ) -> List[Task]:
+        """Lease up to ``limit`` pending (or lease-expired) tasks to ``worker``.
+
+        Every claim counts as an attempt. A task whose lease expired after
+        its last allowed attempt (e.g. its worker keeps crashing on it) is
+        marked failed instead of being leased again.
+        """
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE tasks SET state = 'failed',"
+                " error = 'lease expired after ' || attempts || ' attempts',"
+                " lease_owner = NULL, lease_expires = NULL, updated = ?"
+                " WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            rows = conn.execute(
+                "SELECT id, position, query, card_type, attempts FROM tasks"
+                " WHERE state = 'pending'"
+                " OR (state = 'leased' AND lease_expires < ?)"
+                " ORDER BY position LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET state = 'leased', lease_owner = ?,"
+                " lease_expires = ?, attempts = attempts + 1, updated = ?"
+                " WHERE id = ?",
+                [(worker, now + lease, now, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [Task(r[0], r[1], r[2], r[3], r[4] + 1) for r in rows]
+
+    def renew(self, tasks: List[Task], worker: str, lease: float = DEFAULT_LEASE):
+        """Extend the leases ``worker`` still holds on ``tasks`` by ``lease``."""
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE tasks SET lease_expires = ?, updated = ?"
+            " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            [(now + lease, now, task.id, worker) for task in tasks],
+        )
+
+    def complete(self, task: Task, worker: str, identifier: str, path: Path):
+        """Mark a task done (ignored if the lease was lost to another worker)."""
+        self._conn.execute(
+            "UPDATE tasks SET state = 'done', identifier = ?, path = ?, error = NULL,"
+            " lease_owner = NULL, lease_expires = NULL, updated = ?"
+            " WHERE id = ? AND lease_owner = ?",
+            (identifier, str(path), time.time(), task.id, worker),
+        )
+
+    def fail(self, task: Task, worker: str, error: str, retry: bool = True) -> bool:
+        """Record a failure; return True if the task will be retried.
+
+        Pass ``retry=False`` for permanent failures such as a query without
+        results.
+        """
+        retry = retry and task.attempts < self.max_attempts
+        self._conn.execute(
+            "UPDATE tasks SET state = ?, error = ?, lease_owner = NULL,"
+            " lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+            ("pending" if retry else "failed", error, time.time(), task.id, worker),
+        )
+        return retry
+
+    def status(self) -> Dict[str, int]:
+        """Return task counts per state.
+
+        Expired leases count as pending, or as failed once out of attempts.
+        """
+        counts = dict.fromkeys(STATES, 0)
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT CASE WHEN state = 'leased' AND lease_expires < ?"
+            " THEN CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END"
+            " ELSE state END, COUNT(*) FROM tasks GROUP BY 1",
+            (now, self.max_attempts),
+        )
+        counts.update(rows)
+        return counts
+
+    def failures(self) -> List[Dict]:
+        """Return the permanently failed tasks with their last error."""
+        rows = self._conn.execute(
+            "SELECT position, query, card_type, attempts, error FROM tasks"
+            " WHERE state = 'failed' ORDER BY position"
+        )
+        keys = ("position", "query", "cardType", "attempts", "error")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def work(
+    queue: WorkQueue,
+    worker: Optional[str] = None,
+    threads: int | str = 1,
+    batch_size: int = SEARCH_CHUNK_SIZE,
+    lease: float = DEFAULT_LEASE,
+    on_done: Optional[Callable[[Path], None]] = None,
+    max_threads: int = DEFAULT_MAX_THREADS,
+) -> WorkReport:
+    """Claim and process batches until the queue has nothing left to lease.
+
+    Each batch is resolved with one :func:`search_cards_per_query` call and
+    the best card of every task is downloaded with ``threads`` threads into
+    the queue's destination folder. Leases of the tasks still in progress
+    are renewed every ``lease / 2`` seconds, so a slow batch is not taken
+    over by another worker. Run this in as many processes (or on as many
+    hosts) as needed; they split the work through the queue file.
+    ``threads="auto"`` adapts the number of parallel downloads (up to
+    ``max_threads``) to the server's responses.
+    """
+    worker = worker or default_worker_id()
+    settings = queue.settings()
+    queue.dest.mkdir(parents=True, exist_ok=True)
+    report = WorkReport()
+
+    def _record_failure(task: Task, error: str, retry: bool = True):
+        if queue.fail(task, worker, error, retry=retry):
+            report.retried += 1
+        else:
+            report.failed += 1
+
+    with make_executor(threads, max_threads) as ex:
+        while True:
+            tasks = queue.claim(worker, limit=batch_size, lease=lease)
+            if not tasks:
+                break
+            renew_at = time.monotonic() + lease / 2
+            queries = [{"query": t.query, "cardType": t.card_type} for t in tasks]
+            try:
+                groups = search_cards_per_query(queries, settings)
+            except Exception as exc:
+                for task in tasks:
+                    _record_failure(task, f"search failed: {exc}")
+                continue
+            if time.monotonic() >= renew_at:
+                queue.renew(tasks, worker, lease)
+                renew_at = time.monotonic() + lease / 2
+
+            futures = {}
+            for task, group in zip(tasks, groups):
+                if not group:
+                    _record_failure(task, "no results", retry=False)
+                    continue
+                card = group[0]
+                fname = queue.filename_format.format(
+                    index=task.position,
+                    name=make_safe_path(card.name),
+                    ext=card.extension,
+                    id=card.identifier,
+                )
+                future = ex.submit(card.download_image, queue.dest, filename=fname)
+                futures[future] = (task, card)
+
+            pending = set(futures)
+            while pending:
+                timeout = max(0.0, renew_at - time.monotonic())
+                done, pending = wait(pending, timeout, FIRST_COMPLETED)
+                for future in done:
+                    task, card = futures[future]
+                    try:
+                        path = future.result()
+                    except Exception as exc:
+                        _record_failure(task, f"download failed: {exc}")
+                        continue
+                    queue.complete(task, worker, card.identifier, path)
+                    report.done.append(path)
+                    if on_done is not None:
+                        on_done(path)
+                if pending and time.monotonic() >= renew_at:
+                    queue.renew([futures[f][0] for f in pending], worker, lease)
+                    renew_at = time.monotonic() + lease / 2
+    if isinstance(ex, AdaptiveExecutor):
+        report.concurrency = ex.stats()
+    return report
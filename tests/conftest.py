@@ -0,0 +1,117 @@
+"""Offline fake of the MPCFill service for the test suite.
+
+The transport of every ``requests`` session is replaced before ``mpcfill``
+is imported (some modules fetch the catalog at import time), so no test
+touches the network. Tests change :data:`SERVICE` to shape the responses.
+"""
+
+import io
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+import pytest
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+
+
+class FakeService:
+    """In-memory catalog, search index and image host."""
+
+    def __init__(self):
+        """Start with five sources and no cards."""
+        self.sources = {
+            str(i): {"pk": i, "key": f"src{i}", "name": f"Source{i}"}
+            for i in range(1, 6)
+        }
+        self.cards: Dict[str, Dict] = {}
+        # query -> card identifiers in the order the service ranks them
+        self.results: Dict[str, List[str]] = {}
+        self.calls: List[str] = []
+        # url -> HTTP status to answer with instead of 200
+        self.status: Dict[str, int] = {}
+
+    def add_card(self, identifier: str, name: str, source: int, **fields) -> Dict:
+        """Add a card; it is returned for ``name`` after those added before."""
+        card = {
+            "identifier": identifier,
+            "cardType": "CARD",
+            "name": name,
+            "priority": 0,
+            "sourceId": source,
+            "source": f"src{source}",
+            "sourceName": f"Source{source}",
+            "extension": "png",
+            "dpi": 600,
+            "size": 1_000_000,
+            "language": "EN",
+            "tags": [],
+            "searchq": name.lower(),
+            "downloadLink": f"http://img.test/{identifier}",
+        }
+        card.update(fields)
+        self.cards[identifier] = card
+        self.results.setdefault(name.lower(), []).append(identifier)
+        return card
+
+    def handle(self, url: str, body: bytes) -> bytes:
+        """Return the response body for a request."""
+        self.calls.append(url)
+        if url.startswith("http://img.test/"):
+            return url.rsplit("/", 1)[1].encode()
+        path = "/" + url.split("://", 1)[1].split("/", 1)[1].split("?")[0]
+        data = json.loads(body) if body else {}
+        if path.startswith("/2/sources"):
+            result = {"results": self.sources}
+        elif path.startswith("/2/languages"):
+            result = {"languages": [{"code": "EN", "name": "English"}]}
+        elif path.startswith("/2/tags"):
+            result = {"tags": [{"name": "NSFW", "parent": None, "children": []}]}
+        elif path.startswith("/2/DFCPairs"):
+            result = {"dfcPairs": {}}
+        elif path.startswith("/2/editorSearch"):
+            result = {"results": {}}
+            for q in data["queries"]:
+                ids = self.results.get(q["query"], [])
+                result["results"].setdefault(q["query"], {})[q["cardType"]] = ids
+        elif path.startswith("/2/cards"):
+            ids = data["cardIdentifiers"]
+            result = {"results": {i: self.cards[i] for i in ids if i in self.cards}}
+        else:
+            raise KeyError(path)
+        return json.dumps(result).encode()
+
+
+SERVICE = FakeService()
+
+
+def _send(adapter, request, **kwargs):
+    body = request.body
+    if isinstance(body, str):
+        body = body.encode()
+    response = Response()
+    response.status_code = SERVICE.status.get(request.url, 200)
+    response.raw = io.BytesIO(SERVICE.handle(request.url, body))
+    response.url = request.url
+    response.request = request
+    response.encoding = "utf-8"
+    return response
+
+
+def pytest_configure(config):
+    """Isolate caches and install the fake transport before any import."""
+    os.environ["MPCFILL_CACHE_DIR"] = tempfile.mkdtemp(prefix="mpcfill-tests-")
+    os.environ["MPCFILL_RATE_LIMIT"] = "10000"
+    os.environ["MPCFILL_NO_DAEMON"] = "1"
+    HTTPAdapter.send = _send
+
+
+@pytest.fixture
+def service():
+    """Return the fake service with no cards and an empty call log."""
+    SERVICE.cards.clear()
+    SERVICE.results.clear()
+    SERVICE.calls.clear()
+    SERVICE.status.clear()
+    return SERVICE
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+# Modules that must stay unloaded until a command needs them
+HEAVY = (
+    "requests",
+    "urllib3",
+    "PIL",
+    "concurrent.futures.process",
+    "mpcfill.search",
+    "mpcfill.http.client",
+)
+# Generous, to catch an eager import of requests or PIL, not to benchmark
+BUDGET_SECONDS = 0.5
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import mpcfill.cli
+elapsed = time.perf_counter() - start
+if sys.argv[1:] == ["--help"]:
+    try:
+        mpcfill.cli.main(["--help"])
+    except SystemExit:
+        pass
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def _probe(*args):
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def test_cli_import_stays_light():
+    """Importing the CLI loads no heavy modules and is fast."""
+    result = _probe()
+    assert [m for m in HEAVY if m in result["modules"]] == []
+    assert result["seconds"] < BUDGET_SECONDS
+
+
+def test_cli_help_stays_light():
+    """``mpcfill --help`` builds the parser without importing any command."""
+    result = _probe("--help")
+    assert [m for m in HEAVY if m in result["modules"]] == []
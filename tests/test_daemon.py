@@ -0,0 +1,28 @@
+from mpcfill.daemon import _env_mismatch, command_env
+
+
+def test_command_env_keeps_settings_and_proxies():
+    """Only variables that change how a command runs are compared."""
+    environ = {
+        "MPCFILL_CACHE_DIR": "/tmp/a",
+        "MPCFILL_DAEMON": "127.0.0.1:8765",
+        "MPCFILL_NO_DAEMON": "",
+        "https_proxy": "http://proxy:3128",
+        "HOME": "/home/a",
+    }
+    assert command_env(environ) == {
+        "MPCFILL_CACHE_DIR": "/tmp/a",
+        "https_proxy": "http://proxy:3128",
+    }
+
+
+def test_env_mismatch_lists_differences():
+    """Variables set on one side only count as different."""
+    client = {"MPCFILL_CACHE_DIR": "/tmp/a", "MPCFILL_RATE_LIMIT": "5"}
+    daemon = {"MPCFILL_CACHE_DIR": "/tmp/b", "MPCFILL_STORE": "s.db"}
+    assert _env_mismatch(client, daemon) == [
+        "MPCFILL_CACHE_DIR",
+        "MPCFILL_RATE_LIMIT",
+        "MPCFILL_STORE",
+    ]
+    assert _env_mismatch(client, dict(client)) == []
@@ -0,0 +1,27 @@
+import importlib.util
+
+import mpcfill
+
+
+def test_exports_do_not_shadow_submodules():
+    """An export named like a submodule is rebound when the module loads."""
+    for name in mpcfill.__all__:
+        spec = importlib.util.find_spec(f"mpcfill.{name}")
+        assert spec is None, f"export {name!r} collides with a submodule"
+
+
+def test_prefetch_cards_after_submodule_import(service, tmp_path):
+    """``mpcfill.prefetch_cards`` still works once ``mpcfill.prefetch`` exists."""
+    import mpcfill.prefetch  # noqa: F401  (binds mpcfill.prefetch)
+
+    service.add_card("bolt-1", "Lightning Bolt", 1)
+    settings = mpcfill.SearchSettings()
+    report = mpcfill.prefetch_cards(
+        [{"query": "lightning bolt", "cardType": "CARD"}],
+        settings,
+        fetch_backs=False,
+        store=tmp_path / "store.sqlite3",
+    )
+    assert report.resolved == 1
+    assert [p.name for p in report.fetched] == ["bolt-1.png"]
+    assert report.failed == {}
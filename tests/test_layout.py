@@ -0,0 +1,32 @@
+from mpcfill import layout
+from mpcfill.cache import image_store_path
+from mpcfill.layout import OutputLayout
+from mpcfill.search import get_card_metadata
+
+
+def test_store_on_other_device_is_bypassed(service, tmp_path, monkeypatch):
+    """New images go straight to the output folder, not through the store."""
+    service.add_card("far-1", "Opt", 1)
+    (card,) = get_card_metadata(["far-1"])
+    monkeypatch.setattr(layout, "_same_device", lambda a, b: False)
+    out = OutputLayout(tmp_path / "out")
+
+    path = out.place(card, 0)
+
+    assert path.read_bytes() == b"far-1"
+    assert not image_store_path("far-1", "png").exists()
+    assert out.report.methods == {"download": 1}
+    assert out.report.bytes_saved == 0
+
+
+def test_store_on_same_device_is_used(service, tmp_path):
+    """On one filesystem images are stored once and linked into the folder."""
+    service.add_card("near-1", "Opt", 1)
+    (card,) = get_card_metadata(["near-1"])
+    out = OutputLayout(tmp_path / "out")
+
+    path = out.place(card, 0)
+
+    assert path.read_bytes() == b"near-1"
+    assert image_store_path("near-1", "png").exists()
+    assert "download" not in out.report.methods
@@ -0,0 +1,19 @@
+from mpcfill.name_index import NameIndex, load_name_index, record_names
+from mpcfill.services import catalog
+
+
+def test_dfc_names_are_merged_after_recorded_names(tmp_path, monkeypatch):
+    """Names recorded before the first load do not prevent seeding."""
+    monkeypatch.setattr(
+        catalog, "fetch_dfcs", lambda: {"Delver of Secrets": "Insectile Aberration"}
+    )
+    path = tmp_path / "names.json"
+    record_names(["Lightning Bolt"], path)
+
+    index = load_name_index(path)
+
+    assert "lightning bolt" in index
+    assert "insectile aberration" in index
+    assert NameIndex.load(path).seeded
+    record_names(["Opt"], path)
+    assert NameIndex.load(path).seeded
@@ -0,0 +1,51 @@
+import pytest
+
+from mpcfill import SearchSettings, rerank, search_cards
+
+# Candidates for one name, in the order the service returns them for the
+# default settings: by the position of the source in the priority list
+# (Source1 first), then by card priority.
+FIXTURE = [
+    ("bolt-s1-p2", 1, 2),
+    ("bolt-s1-p5", 1, 5),
+    ("bolt-s2-p1", 2, 1),
+    ("bolt-s3-p0", 3, 0),
+]
+SERVER_ORDER = [identifier for identifier, _, _ in FIXTURE]
+# The service's order once Source3 is moved to the front.
+SERVER_ORDER_SOURCE3_FIRST = ["bolt-s3-p0", "bolt-s1-p2", "bolt-s1-p5", "bolt-s2-p1"]
+
+
+@pytest.fixture
+def bolt(service):
+    """Serve the fixture candidates for "lightning bolt"."""
+    for identifier, source, priority in FIXTURE:
+        service.add_card(identifier, "Lightning Bolt", source, priority=priority)
+    return [{"query": "lightning bolt", "cardType": "CARD"}]
+
+
+def _ids(group):
+    return [card.identifier for card in group]
+
+
+def test_default_order_is_card_priority(bolt):
+    """Without local ranking, groups keep the baseline priority order."""
+    (group,) = search_cards(bolt, SearchSettings(), fetch_backs=False)
+    assert _ids(group) == ["bolt-s3-p0", "bolt-s2-p1", "bolt-s1-p2", "bolt-s1-p5"]
+
+
+def test_local_ranking_matches_server_order(bolt):
+    """``local_ranking=True`` reproduces the service's ordering."""
+    (group,) = search_cards(
+        bolt, SearchSettings(), fetch_backs=False, local_ranking=True
+    )
+    assert _ids(group) == SERVER_ORDER
+
+
+def test_rerank_matches_server_order_for_new_settings(bolt):
+    """Re-ranking after a priority change matches what the service would return."""
+    settings = SearchSettings()
+    groups = search_cards(bolt, settings, fetch_backs=False)
+    settings.set_source_priority_order(["Source3"])
+    (group,) = rerank(groups, settings)
+    assert _ids(group) == SERVER_ORDER_SOURCE3_FIRST
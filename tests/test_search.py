@@ -0,0 +1,16 @@
+from mpcfill import SearchSettings, search_cards, search_cards_multi
+
+
+def test_multi_drops_repeated_identifiers(service):
+    """An identifier listed twice by the service appears once in its group."""
+    service.add_card("opt-1", "Opt", 1)
+    service.add_card("opt-2", "Opt", 2, priority=1)
+    service.results["opt"] = ["opt-1", "opt-1", "opt-2"]
+    queries = [{"query": "opt", "cardType": "CARD"}]
+    settings = SearchSettings()
+
+    (groups,) = search_cards_multi(queries, [settings], fetch_backs=False, top_k=2)
+    (expected,) = search_cards([dict(q) for q in queries], settings, fetch_backs=False)
+
+    assert [c.identifier for c in groups[0]] == ["opt-1", "opt-2"]
+    assert [c.identifier for c in expected] == ["opt-1", "opt-2"]
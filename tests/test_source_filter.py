@@ -0,0 +1,16 @@
+from mpcfill.models.source_filter import SourceFilter
+
+
+def test_assigning_enabled_copies_the_flags(service):
+    """Assignment replaces flags without touching the caller or other filters."""
+    base = SourceFilter()
+    clone = base.copy()
+    flags = {1: False, "Source2": False, 99: False}
+
+    clone.enabled = flags
+    flags[3] = False
+
+    assert clone.enabled == {1: False, 2: False, 3: True, 4: True, 5: True}
+    assert all(base.enabled.values())
+    assert all(SourceFilter().enabled.values())
+    assert clone.to_api_format()[:2] == [[1, False], [2, False]]
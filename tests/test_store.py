@@ -0,0 +1,57 @@
+from mpcfill import store as store_module
+from mpcfill.ranking import Ranker
+from mpcfill.search_settings import SearchSettings
+from mpcfill.store import MetadataStore
+
+
+def _card(identifier, searchq, **fields):
+    data = {
+        "identifier": identifier,
+        "cardType": "CARD",
+        "name": searchq.title(),
+        "searchq": searchq,
+        "sourceId": 1,
+        "priority": 0,
+        "dpi": 600,
+        "size": 1_000_000,
+        "language": "EN",
+        "tags": [],
+    }
+    data.update(fields)
+    return data
+
+
+def _search(store, queries, **settings):
+    ranker = Ranker.for_settings(SearchSettings(**settings))
+    queries = [{"query": q, "cardType": "CARD"} for q in queries]
+    return sorted(card.identifier for card in store.search(queries, ranker))
+
+
+def test_missing_dpi_and_size_are_not_filtered(tmp_path):
+    """Cards without DPI or size pass the range filters, like Ranker.accepts."""
+    store = MetadataStore(tmp_path / "store.db")
+    store.add_cards(
+        [
+            _card("no-dpi", "opt", dpi=None),
+            _card("no-size", "opt", size=None),
+            _card("low-dpi", "opt", dpi=100),
+        ]
+    )
+    assert _search(store, ["opt"], minimum_dpi=300) == ["no-dpi", "no-size"]
+
+
+def test_fuzzy_search_matches_wildcards_literally(tmp_path):
+    """``%`` and ``_`` in a fuzzy query are not LIKE wildcards."""
+    store = MetadataStore(tmp_path / "store.db")
+    store.add_cards([_card("a", "50_50 split"), _card("b", "50x50 split")])
+    assert _search(store, ["50_50"], fuzzy_search=True) == ["a"]
+    assert _search(store, ["%"], fuzzy_search=True) == []
+
+
+def test_many_queries_stay_under_parameter_limit(tmp_path, monkeypatch):
+    """Long query lists are split into statements SQLite accepts."""
+    monkeypatch.setattr(store_module, "_max_params", lambda conn: 20)
+    store = MetadataStore(tmp_path / "store.db")
+    store.add_cards([_card(f"c{i}", f"card {i}") for i in range(100)])
+    found = _search(store, [f"card {i}" for i in range(100)])
+    assert found == sorted(f"c{i}" for i in range(100))
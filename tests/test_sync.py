@@ -0,0 +1,41 @@
+from mpcfill import SearchSettings
+from mpcfill.sync import sync_folder
+
+
+def _queries(*names):
+    return [{"query": name, "cardType": "CARD"} for name in names]
+
+
+def test_delete_stale_keeps_modified_files(service, tmp_path):
+    """Stale files edited since the sync are reported, not deleted."""
+    for identifier, name in [("a", "Alpha"), ("b", "Beta"), ("c", "Gamma")]:
+        service.add_card(identifier, name, 1)
+    settings = SearchSettings()
+    sync_folder(_queries("alpha", "beta", "gamma"), tmp_path, settings)
+    edited = tmp_path / "1_Beta.png"
+    edited.write_bytes(b"edited by hand")
+
+    report = sync_folder(_queries("alpha"), tmp_path, settings, delete_stale=True)
+
+    assert report.deleted == [tmp_path / "2_Gamma.png"]
+    assert report.kept == [edited]
+    assert edited.read_bytes() == b"edited by hand"
+    assert "kept 1 modified" in report.summary()
+
+
+def test_failed_download_keeps_the_rest_indexed(service, tmp_path):
+    """One failed download is reported and the others are still indexed."""
+    service.add_card("fail-a", "Alpha", 1)
+    service.add_card("fail-b", "Beta", 1)
+    service.status["http://img.test/fail-b"] = 404
+    settings = SearchSettings()
+
+    report = sync_folder(_queries("alpha", "beta"), tmp_path, settings)
+
+    assert report.downloaded == [tmp_path / "0_Alpha.png"]
+    assert list(report.failed) == ["1_Beta.png"]
+    assert "1 failed" in report.summary()
+    del service.status["http://img.test/fail-b"]
+    report = sync_folder(_queries("alpha", "beta"), tmp_path, settings)
+    assert report.unchanged == [tmp_path / "0_Alpha.png"]
+    assert report.downloaded == [tmp_path / "1_Beta.png"]
@@ -0,0 +1,15 @@
+from mpcfill import SearchSettings
+from mpcfill.watch import DeckWatcher
+
+
+def test_update_pairs_results_by_line(service, tmp_path):
+    """A result whose ``searchq`` differs from the line is still written."""
+    service.add_card("opt-1", "Opt", 1, searchq="opt fuzzy match")
+    deck = tmp_path / "deck.txt"
+    deck.write_text("1 Opt\n")
+    watcher = DeckWatcher(deck, tmp_path / "out", SearchSettings(), fetch_backs=False)
+
+    update = watcher.update()
+
+    assert update.missing == []
+    assert [p.name for p in update.written] == ["Opt.png"]
@@ -0,0 +1,50 @@
+from mpcfill.search_settings import SearchSettings
+from mpcfill.work_queue import WorkQueue, work
+
+
+def _queue(tmp_path, max_attempts=2):
+    queue = WorkQueue.create(
+        tmp_path / "queue.db", tmp_path / "out", SearchSettings(), max_attempts
+    )
+    queue.add([{"query": "Opt", "cardType": "CARD"}], fetch_backs=False)
+    return queue
+
+
+def test_claim_counts_attempts(tmp_path):
+    """Each claim is an attempt, also when the previous lease just expired."""
+    with _queue(tmp_path, max_attempts=3) as queue:
+        (first,) = queue.claim("a", lease=-1)
+        (second,) = queue.claim("b", lease=-1)
+        assert first.id == second.id
+        assert (first.attempts, second.attempts) == (1, 2)
+
+
+def test_expired_leases_stop_after_max_attempts(tmp_path):
+    """A task whose worker never reports back is failed, not leased forever."""
+    with _queue(tmp_path, max_attempts=2) as queue:
+        for _ in range(2):
+            assert len(queue.claim("crashy", lease=-1)) == 1
+        assert queue.status()["failed"] == 1
+        assert queue.claim("crashy", lease=-1) == []
+        (failure,) = queue.failures()
+        assert failure["attempts"] == 2
+        assert "lease expired" in failure["error"]
+        assert queue.status() == {"pending": 0, "leased": 0, "done": 0, "failed": 1}
+
+
+def test_renew_keeps_the_lease(tmp_path):
+    """A renewed lease is not taken over by another worker."""
+    with _queue(tmp_path) as queue:
+        tasks = queue.claim("slow", lease=-1)
+        queue.renew(tasks, "slow", lease=60)
+        assert queue.claim("other") == []
+        assert queue.status()["leased"] == 1
+
+
+def test_work_pairs_results_by_query(service, tmp_path):
+    """A result whose ``searchq`` differs from the query still completes it."""
+    service.add_card("opt-1", "Opt", 1, searchq="opt fuzzy match")
+    with _queue(tmp_path) as queue:
+        report = work(queue, worker="w")
+        assert [p.name for p in report.done] == ["0_Opt.png"]
+        assert queue.status()["done"] == 1